@@ -0,0 +1,64 @@
+"""Benchmark application import time with ``python -X importtime``.
+
+Imports ``mirustech.betting.main`` in fresh interpreters from an empty working
+directory, reports the median total import time and the slowest modules of the
+package, and checks that importing created no files.
+
+Usage:
+    python benchmarks/bench_import.py [runs]
+"""
+
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+MODULE = "mirustech.betting.main"
+PACKAGE = "mirustech.betting"
+
+
+def _import_once(cwd: Path) -> dict[str, int]:
+    """Import the module once and return cumulative microseconds per module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {MODULE}"],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:") :].split("|"))
+        timings[name] = int(cumulative)
+    return timings
+
+
+def main(runs: int = 5) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        samples = [_import_once(cwd) for _ in range(runs)]
+        created = sorted(p.name for p in cwd.iterdir())
+
+    totals = [s[MODULE] for s in samples]
+    print(f"import {MODULE}: median {statistics.median(totals) / 1000:.1f} ms over {runs} runs")
+
+    last = samples[-1]
+    ours = sorted(
+        ((name, us) for name, us in last.items() if name.startswith(PACKAGE)),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+    for name, us in ours[:10]:
+        print(f"  {name:<48} {us / 1000:8.1f} ms")
+
+    if created:
+        print(f"FAIL: importing created files in the working directory: {created}")
+        sys.exit(1)
+    print("OK: no files created at import")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
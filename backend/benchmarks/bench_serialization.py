@@ -0,0 +1,160 @@
+"""Benchmark response serialization: validated Pydantic path vs. the fast path.
+
+Compares building and encoding a 1,000-bet listing and a 10,000-wager history
+from the same ORM rows and bet book entries two ways: the way FastAPI does by
+default (build a response model per row, then serialize through the response
+model), and the way the routes do now (``BettingService.to_list_response`` and
+``to_wager_response`` build trusted dicts, encoded with orjson).
+
+Usage:
+    python benchmarks/bench_serialization.py
+"""
+
+import timeit
+from array import array
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+
+from pydantic import TypeAdapter
+
+from mirustech.betting.models import Bet, BetStatus, Outcome, User, Wager
+from mirustech.betting.models.wager import WEIGHT_SCALE
+from mirustech.betting.schemas import BetListResponse, WagerResponse
+from mirustech.betting.serialization import dumps
+from mirustech.betting.services.bet_book import BookEntry
+from mirustech.betting.services.betting import BettingService
+
+REPEAT = 5
+
+# The response builders do not touch the session
+service = BettingService(None)  # type: ignore[arg-type]
+
+
+def _bets(count: int) -> tuple[list[Bet], dict[int, BookEntry]]:
+    """Build detached bets with a creator and three outcomes, and their book entries."""
+    now = datetime.now(UTC).replace(tzinfo=None)
+    creator = User(id=1, username="alice", password_hash="", balance=1000)
+    bets = []
+    entries = {}
+    for i in range(count):
+        bet = Bet(
+            id=i,
+            creator_id=1,
+            title=f"Bet number {i}",
+            description="Some description of the bet. " * 10,
+            close_time=now + timedelta(hours=i),
+            status=BetStatus.OPEN,
+            created_at=now,
+            version=i,
+        )
+        bet.creator = creator
+        bet.outcomes = [Outcome(id=i * 3 + j, bet_id=i, name=f"Outcome {j}") for j in range(3)]
+        pools = array("q", [i * 50, i * 20, i * 10])
+        entries[i] = BookEntry(
+            i,
+            array("q", [o.id for o in bet.outcomes]),
+            pools,
+            array("q", [pool * WEIGHT_SCALE for pool in pools]),
+            bet.close_time,
+            bet.created_at,
+            bet.version,
+        )
+        bets.append(bet)
+    return bets, entries
+
+
+def _wagers(count: int) -> list[tuple[Wager, Outcome, Bet]]:
+    """Build detached wagers with their outcome and bet, as a user's history loads them."""
+    now = datetime.now(UTC).replace(tzinfo=None)
+    bets, _ = _bets(100)
+    rows = []
+    for i in range(count):
+        bet = bets[i % 100]
+        outcome = bet.outcomes[i % 3]
+        wager = Wager(
+            id=i,
+            user_id=1,
+            outcome_id=outcome.id,
+            amount=50 + i % 500,
+            weight=1.2 if i % 2 else 1.0,
+            payout=None,
+            created_at=now - timedelta(minutes=i),
+        )
+        rows.append((wager, outcome, bet))
+    return rows
+
+
+def _measure(label: str, func: Callable[[], bytes]) -> float:
+    best = min(timeit.repeat(func, number=1, repeat=REPEAT))
+    print(f"  {label:<28} {best * 1000:8.2f} ms")
+    return best
+
+
+def _compare(
+    name: str, count: int, validated: Callable[[], bytes], fast: Callable[[], bytes]
+) -> None:
+    print(f"{name} ({count} rows)")
+    slow = _measure("validated + pydantic json", validated)
+    quick = _measure("service dicts + orjson", fast)
+    print(f"  speedup                      {slow / quick:8.2f}x")
+
+
+def bench_listing(count: int) -> None:
+    bets, entries = _bets(count)
+    adapter = TypeAdapter(list[BetListResponse])
+
+    def validated() -> bytes:
+        return adapter.dump_json(
+            [
+                BetListResponse(
+                    id=bet.id,
+                    title=bet.title,
+                    description=bet.description,
+                    close_time=bet.close_time,
+                    status=bet.status,
+                    created_at=bet.created_at,
+                    creator_username=bet.creator.username,
+                    total_pool=float(entries[bet.id].total_pool),
+                    outcome_count=len(bet.outcomes),
+                )
+                for bet in bets
+            ]
+        )
+
+    def fast() -> bytes:
+        return dumps([service.to_list_response(bet, entries[bet.id]) for bet in bets])
+
+    _compare("Bet listing", count, validated, fast)
+
+
+def bench_wager_history(count: int) -> None:
+    rows = _wagers(count)
+    adapter = TypeAdapter(list[WagerResponse])
+
+    def validated() -> bytes:
+        return adapter.dump_json(
+            [
+                WagerResponse(
+                    id=wager.id,
+                    outcome_id=wager.outcome_id,
+                    outcome_name=outcome.name,
+                    bet_id=bet.id,
+                    bet_title=bet.title,
+                    amount=wager.amount,
+                    weight=wager.weight,
+                    payout=wager.payout,
+                    created_at=wager.created_at,
+                )
+                for wager, outcome, bet in rows
+            ]
+        )
+
+    def fast() -> bytes:
+        return dumps([service.to_wager_response(*row) for row in rows])
+
+    _compare("Wager history", count, validated, fast)
+
+
+if __name__ == "__main__":
+    bench_listing(1_000)
+    bench_wager_history(10_000)
@@ -0,0 +1,402 @@
+"""Simulate many users against the API and check ledger invariants afterwards.
+
+Each simulated user registers, logs in, and then repeatedly picks an action
+from a scenario profile: browse the bet list, view a bet, wager on an open bet
+(preferring bets about to close), create a bet, or resolve a bet it created
+once it has closed. Requests go to the ASGI app in-process through httpx, using
+a fresh temporary database, or to a running server given with ``--url``.
+
+Afterwards it reports throughput, latency percentiles and status codes per
+endpoint, and checks the ledger:
+
+- coins are conserved: balances plus stakes on unresolved bets plus pools
+  forfeited by resolved bets without winning stakes equal the coins granted
+- payouts of every resolved bet with winning stakes add up to its pool
+- no balance is negative
+- every wager on a resolved bet has a payout
+- the daily leaderboard totals add up to the stakes and payouts of all wagers
+
+Usage:
+    python benchmarks/loadsim.py [--users 200] [--duration 30] [--profile mixed]
+    python benchmarks/loadsim.py --url http://localhost:8000 --database-url sqlite+aiosqlite:///./data/betting.db
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import httpx
+from sqlalchemy import case, func, select
+
+from mirustech.betting.config import Settings, configure_settings, get_settings
+from mirustech.betting.database import (
+    ARCHIVE_EXECUTION_OPTIONS,
+    archive_enabled,
+    async_session,
+    dispose_engine,
+)
+from mirustech.betting.models import Bet, BetStatus, Outcome, User, UserDailyStats, Wager
+
+
+@dataclass(frozen=True)
+class Profile:
+    """Relative action weights and timing of a scenario."""
+
+    browse: float
+    detail: float
+    wager: float
+    create: float
+    resolve: float
+    bet_seconds: tuple[float, float]  # Range of how long new bets stay open
+    close_bias: float  # How strongly wagers favour bets about to close; 0 is uniform
+    think_seconds: float  # Mean pause between a user's actions
+
+
+PROFILES = {
+    "browse": Profile(0.70, 0.20, 0.07, 0.02, 0.01, (30, 120), 0.0, 0.5),
+    "mixed": Profile(0.40, 0.20, 0.30, 0.05, 0.05, (10, 60), 1.0, 0.3),
+    "close-rush": Profile(0.15, 0.10, 0.65, 0.05, 0.05, (5, 20), 2.0, 0.1),
+}
+
+
+@dataclass
+class EndpointStats:
+    latencies: list[float] = field(default_factory=list)
+    statuses: dict[int, int] = field(default_factory=lambda: defaultdict(int))
+    failures: int = 0  # Transport errors, no response at all
+
+
+class Simulation:
+    """Shared state of a run: the client, open bets seen so far and stats."""
+
+    def __init__(self, client: httpx.AsyncClient, profile: Profile, deadline: float):
+        self.client = client
+        self.profile = profile
+        self.deadline = deadline
+        self.stats: dict[str, EndpointStats] = defaultdict(EndpointStats)
+        self.bets: dict[int, dict] = {}  # Open bets by id, from listings
+
+    async def request(
+        self, endpoint: str, method: str, url: str, **kwargs
+    ) -> httpx.Response | None:
+        stats = self.stats[endpoint]
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            stats.failures += 1
+            return None
+        stats.latencies.append(time.perf_counter() - start)
+        stats.statuses[response.status_code] += 1
+        return response
+
+    def pick_bet_to_wager(self) -> dict | None:
+        """Pick an open bet, weighted towards those closing soonest."""
+        now = datetime.now(UTC).replace(tzinfo=None)
+        candidates = [b for b in self.bets.values() if b["close_time"] > now]
+        if not candidates:
+            return None
+        weights = [
+            1.0 / (1.0 + (b["close_time"] - now).total_seconds()) ** self.profile.close_bias
+            for b in candidates
+        ]
+        return random.choices(candidates, weights)[0]
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.removesuffix("Z"))
+
+
+async def simulate_user(sim: Simulation, index: int, run_id: str) -> None:
+    username = f"sim{run_id}u{index}"
+    credentials = {"username": username, "password": "loadsim"}
+    await sim.request("POST /api/auth/register", "POST", "/api/auth/register", json=credentials)
+    response = await sim.request(
+        "POST /api/auth/login", "POST", "/api/auth/login", data=credentials
+    )
+    if response is None or response.status_code != 200:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    created: list[dict] = []
+
+    profile = sim.profile
+    actions = ["browse", "detail", "wager", "create", "resolve"]
+    weights = [profile.browse, profile.detail, profile.wager, profile.create, profile.resolve]
+    while time.monotonic() < sim.deadline:
+        action = random.choices(actions, weights)[0]
+        if action == "browse" or (action in ("detail", "wager") and not sim.bets):
+            response = await sim.request(
+                "GET /api/bets", "GET", "/api/bets", params={"status": "open"}
+            )
+            if response is not None and response.status_code == 200:
+                sim.bets = {
+                    b["id"]: {**b, "close_time": _parse_time(b["close_time"])}
+                    for b in response.json()
+                }
+        elif action == "detail":
+            bet_id = random.choice(list(sim.bets))
+            await sim.request("GET /api/bets/{id}", "GET", f"/api/bets/{bet_id}")
+        elif action == "wager":
+            bet = sim.pick_bet_to_wager()
+            if bet is not None:
+                response = await sim.request("GET /api/bets/{id}", "GET", f"/api/bets/{bet['id']}")
+                if response is not None and response.status_code == 200:
+                    outcome = random.choice(response.json()["outcomes"])
+                    amount = random.choice([50, 50, 100, 200])
+                    await sim.request(
+                        "POST /api/bets/{id}/wager",
+                        "POST",
+                        f"/api/bets/{bet['id']}/wager",
+                        json={"outcome_id": outcome["id"], "amount": amount},
+                        headers=headers,
+                    )
+        elif action == "create":
+            close_time = datetime.now(UTC) + timedelta(seconds=random.uniform(*profile.bet_seconds))
+            names = ("Yes", "No", "Maybe")[: random.randint(2, 3)]
+            response = await sim.request(
+                "POST /api/bets",
+                "POST",
+                "/api/bets",
+                json={
+                    "title": f"Simulated bet by {username}",
+                    "outcomes": [{"name": name} for name in names],
+                    "close_time": close_time.isoformat(),
+                },
+                headers=headers,
+            )
+            if response is not None and response.status_code == 201:
+                bet = response.json()
+                created.append({**bet, "close_time": _parse_time(bet["close_time"])})
+        elif action == "resolve":
+            now = datetime.now(UTC).replace(tzinfo=None)
+            closed = [b for b in created if b["close_time"] <= now]
+            if closed:
+                bet = random.choice(closed)
+                created.remove(bet)
+                winner = random.choice(bet["outcomes"])
+                await sim.request(
+                    "POST /api/bets/{id}/resolve",
+                    "POST",
+                    f"/api/bets/{bet['id']}/resolve",
+                    json={"winning_outcome_id": winner["id"]},
+                    headers=headers,
+                )
+        await asyncio.sleep(random.expovariate(1.0 / profile.think_seconds))
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def report(stats: dict[str, EndpointStats], elapsed: float) -> bool:
+    """Print per-endpoint statistics and return whether there were server errors."""
+    print(
+        f"\n{'endpoint':<30} {'requests':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'max ms':>8}  statuses"
+    )
+    server_errors = False
+    for endpoint in sorted(stats):
+        s = stats[endpoint]
+        latencies = sorted(s.latencies)
+        count = len(latencies)
+        if count:
+            p50, p95, p99 = (_percentile(latencies, q) * 1000 for q in (0.5, 0.95, 0.99))
+            worst = latencies[-1] * 1000
+        else:
+            p50 = p95 = p99 = worst = 0.0
+        statuses = " ".join(f"{code}:{n}" for code, n in sorted(s.statuses.items()))
+        if s.failures:
+            statuses += f" failed:{s.failures}"
+        server_errors |= s.failures > 0 or any(code >= 500 for code in s.statuses)
+        print(
+            f"{endpoint:<30} {count:>8} {count / elapsed:>8.1f} {p50:>8.1f} {p95:>8.1f} "
+            f"{p99:>8.1f} {worst:>8.1f}  {statuses}"
+        )
+    total = sum(len(s.latencies) for s in stats.values())
+    if total:
+        mean = statistics.fmean(lat for s in stats.values() for lat in s.latencies) * 1000
+        print(f"{'total':<30} {total:>8} {total / elapsed:>8.1f}  mean {mean:.1f} ms")
+    return server_errors
+
+
+async def _ledger(archived: bool) -> dict[str, int]:
+    """Sum stakes and payouts of wagers by whether their bet is resolved."""
+    resolved = Bet.status == BetStatus.RESOLVED
+    query = (
+        select(
+            func.coalesce(func.sum(case((resolved, 0), else_=Wager.amount)), 0),
+            func.coalesce(func.sum(case((resolved, Wager.amount), else_=0)), 0),
+            func.coalesce(func.sum(case((resolved, Wager.payout), else_=0)), 0),
+            func.count().filter(resolved, Wager.payout.is_(None)),
+        )
+        .select_from(Wager)
+        .join(Outcome, Wager.outcome_id == Outcome.id)
+        .join(Bet, Outcome.bet_id == Bet.id)
+    )
+    if archived:
+        query = query.execution_options(**ARCHIVE_EXECUTION_OPTIONS)
+    async with async_session() as db:
+        unresolved, resolved_stakes, payouts, missing = (await db.execute(query)).one()
+    return {
+        "unresolved": int(unresolved),
+        "resolved": int(resolved_stakes),
+        "payouts": int(payouts),
+        "missing_payouts": int(missing),
+    }
+
+
+async def _unbalanced_bets() -> list[int]:
+    """Resolved bets with winning stakes whose payouts do not add up to the pool."""
+    won = (
+        select(Outcome.bet_id)
+        .join(Bet, Outcome.bet_id == Bet.id)
+        .join(Wager, Wager.outcome_id == Outcome.id)
+        .where(Outcome.id == Bet.winning_outcome_id)
+        .group_by(Outcome.bet_id)
+        .having(func.sum(Wager.weighted_stake) > 0)
+    )
+    query = (
+        select(Outcome.bet_id)
+        .join(Wager, Wager.outcome_id == Outcome.id)
+        .where(Outcome.bet_id.in_(won))
+        .group_by(Outcome.bet_id)
+        .having(func.sum(Wager.amount) != func.sum(Wager.payout))
+    )
+    async with async_session() as db:
+        return list((await db.execute(query)).scalars())
+
+
+async def check_invariants(initial_balance: int) -> bool:
+    """Check the ledger invariants against the database and print the results."""
+    async with async_session() as db:
+        users, balances, negative = (
+            await db.execute(
+                select(
+                    func.count(),
+                    func.coalesce(func.sum(User.balance), 0),
+                    func.count().filter(User.balance < 0),
+                )
+            )
+        ).one()
+
+    ledger = await _ledger(archived=False)
+    if archive_enabled():
+        for key, value in (await _ledger(archived=True)).items():
+            ledger[key] += value
+    forfeited = ledger["resolved"] - ledger["payouts"]
+    granted = users * initial_balance
+    accounted = balances + ledger["unresolved"] + forfeited
+    unbalanced = await _unbalanced_bets()
+    async with async_session() as db:
+        staked, settled, paid = (
+            await db.execute(
+                select(
+                    func.coalesce(func.sum(UserDailyStats.staked), 0),
+                    func.coalesce(func.sum(UserDailyStats.settled_stake), 0),
+                    func.coalesce(func.sum(UserDailyStats.payout), 0),
+                )
+            )
+        ).one()
+    daily = (staked, settled, paid)
+    wagers = (ledger["unresolved"] + ledger["resolved"], ledger["resolved"], ledger["payouts"])
+
+    checks = [
+        (
+            "coins conserved",
+            accounted == granted,
+            f"balances {balances} + open stakes {ledger['unresolved']} + forfeited "
+            f"{forfeited} = {accounted}, granted {granted}",
+        ),
+        ("payouts equal pools", not unbalanced, f"unbalanced bets: {unbalanced[:10]}"),
+        ("no negative balances", negative == 0, f"{negative} negative"),
+        (
+            "resolved wagers paid",
+            ledger["missing_payouts"] == 0,
+            f"{ledger['missing_payouts']} without payout",
+        ),
+        (
+            "daily totals match",
+            daily == wagers,
+            f"staked/settled/paid {daily}, wagers {wagers}",
+        ),
+    ]
+    print()
+    for name, ok, detail in checks:
+        print(f"{'OK  ' if ok else 'FAIL'} {name:<22} {detail}")
+    return all(ok for _, ok, _ in checks)
+
+
+async def run(args: argparse.Namespace) -> bool:
+    profile = PROFILES[args.profile]
+    run_id = f"{int(time.time()) % 100000}"
+    random.seed(args.seed)
+
+    async def drive(client: httpx.AsyncClient) -> tuple[dict[str, EndpointStats], float]:
+        start = time.monotonic()
+        sim = Simulation(client, profile, start + args.duration)
+        # Stagger arrivals over the first second so logins do not all collide
+        users = []
+        for i in range(args.users):
+            users.append(asyncio.create_task(simulate_user(sim, i, run_id)))
+            await asyncio.sleep(1.0 / args.users)
+        await asyncio.gather(*users)
+        return sim.stats, time.monotonic() - start
+
+    if args.url:
+        if args.database_url:
+            configure_settings(Settings(database_url=args.database_url))
+        async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+            stats, elapsed = await drive(client)
+    else:
+        from mirustech.betting.main import create_app
+
+        tmp = tempfile.mkdtemp(prefix="loadsim-")
+        database_url = f"sqlite+aiosqlite:///{Path(tmp) / 'betting.db'}"
+        app = create_app(Settings(database_url=database_url))
+        # Unhandled app errors become 500 responses, as they would behind a server
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        client = httpx.AsyncClient(
+            transport=transport, base_url="http://loadsim", timeout=args.timeout
+        )
+        async with app.router.lifespan_context(app), client:
+            stats, elapsed = await drive(client)
+        print(f"database: {database_url}")
+
+    print(f"profile {args.profile}, {args.users} users, {elapsed:.1f} s")
+    server_errors = report(stats, elapsed)
+
+    if args.url and not args.database_url:
+        print("\nSkipping invariant checks: pass --database-url to check the server's database")
+        return not server_errors
+    try:
+        ok = await check_invariants(get_settings().initial_balance)
+    finally:
+        await dispose_engine()
+    return ok and not server_errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of activity")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="mixed")
+    parser.add_argument("--url", help="base URL of a running server (default: in-process)")
+    parser.add_argument("--database-url", help="database of the server, for invariant checks")
+    parser.add_argument("--timeout", type=float, default=30.0, help="request timeout in seconds")
+    parser.add_argument("--seed", type=int, help="random seed")
+    args = parser.parse_args()
+
+    ok = asyncio.run(run(args))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
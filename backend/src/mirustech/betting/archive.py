@@ -0,0 +1,235 @@
+"""Archival of old resolved bets into an attached SQLite database.
+
+Resolved bets are never written again, so once they are older than
+``archive_after_days`` they are moved, with their outcomes and wagers, into the
+archive database attached to every connection as ``archive``. Transactions
+spanning both files are not atomic in WAL mode, so each batch is copied in one
+transaction and deleted from the main database in the next: a bet is never
+lost, and one left in both files by an interrupted batch is copied again, as
+a no-op, and deleted by the next run. Reads fall back to the archive through
+``ARCHIVE_EXECUTION_OPTIONS``.
+
+Odds history rows stay in the main database; they are one compact row per bet.
+
+Usage:
+    python -m mirustech.betting.archive [--older-than-days N] [--compact]
+"""
+
+import argparse
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import (
+    Column,
+    ColumnElement,
+    Connection,
+    Index,
+    MetaData,
+    Table,
+    delete,
+    func,
+    insert,
+    inspect,
+    select,
+    union,
+)
+
+from mirustech.betting.config import get_settings
+from mirustech.betting.database import (
+    ARCHIVE_SCHEMA,
+    archive_enabled,
+    dispose_engine,
+    get_engine,
+    init_db,
+)
+from mirustech.betting.models import Bet, BetStatus, Outcome, Wager
+
+archive_metadata = MetaData()
+
+
+def _archive_table(table: Table, *indexed: str) -> Table:
+    """Mirror a table in the archive schema, without constraints other than its key."""
+    archived = Table(
+        table.name,
+        archive_metadata,
+        *(Column(c.name, c.type, primary_key=c.primary_key) for c in table.columns),
+        schema=ARCHIVE_SCHEMA,
+    )
+    for column in indexed:
+        Index(f"ix_{table.name}_{column}", archived.c[column])
+    return archived
+
+
+archived_bets = _archive_table(Bet.__table__, "resolved_at")
+archived_outcomes = _archive_table(Outcome.__table__, "bet_id")
+archived_wagers = _archive_table(Wager.__table__, "user_id", "outcome_id")
+
+
+def upgrade_archive(conn: Connection) -> None:
+    """Create the archive tables and add columns the main schema gained since.
+
+    Added columns that main migrations fill from other columns are filled the
+    same way for archived rows.
+    """
+    from mirustech.betting.migrations import (
+        BET_TOTAL_SQL,
+        BET_TOTALS,
+        SCHEMA_VERSION,
+        WEIGHTED_STAKE_SQL,
+    )
+
+    backfills = {("wagers", "weighted_stake"): WEIGHTED_STAKE_SQL}
+    for column, aggregate in BET_TOTALS.items():
+        backfills["bets", column] = BET_TOTAL_SQL.format(aggregate=aggregate, schema=ARCHIVE_SCHEMA)
+
+    version = int(conn.exec_driver_sql(f"PRAGMA {ARCHIVE_SCHEMA}.user_version").scalar_one())
+    if version == SCHEMA_VERSION:
+        return
+
+    archive_metadata.create_all(conn)
+    inspector = inspect(conn)
+    for table in archive_metadata.tables.values():
+        existing = {c["name"] for c in inspector.get_columns(table.name, schema=ARCHIVE_SCHEMA)}
+        for column in table.columns:
+            if column.name not in existing:
+                ddl = column.type.compile(dialect=conn.dialect)
+                conn.exec_driver_sql(
+                    f"ALTER TABLE {ARCHIVE_SCHEMA}.{table.name} ADD COLUMN {column.name} {ddl}"
+                )
+                backfill = backfills.get((table.name, column.name))
+                if backfill is not None:
+                    conn.exec_driver_sql(
+                        f"UPDATE {ARCHIVE_SCHEMA}.{table.name} SET {column.name} = {backfill}"
+                    )
+    conn.exec_driver_sql(f"PRAGMA {ARCHIVE_SCHEMA}.user_version = {int(SCHEMA_VERSION)}")
+
+
+def _select_batch(conn: Connection, cutoff: datetime, batch_size: int) -> list[int]:
+    """Select the ids of one batch of resolved bets to archive."""
+    # SQLite hands out the ids of deleted rows at the top of a table again, which
+    # would collide with their archived copies, so bets holding the highest bet,
+    # outcome or wager id stay in the main database.
+    newest = union(
+        select(func.max(Bet.id)),
+        select(Outcome.bet_id).where(Outcome.id == select(func.max(Outcome.id)).scalar_subquery()),
+        select(Outcome.bet_id)
+        .join(Wager, Wager.outcome_id == Outcome.id)
+        .where(Wager.id == select(func.max(Wager.id)).scalar_subquery()),
+    )
+    return list(
+        conn.scalars(
+            select(Bet.id)
+            .where(
+                Bet.status == BetStatus.RESOLVED,
+                # Bets resolved before resolved_at existed are aged by close time
+                func.coalesce(Bet.resolved_at, Bet.close_time) < cutoff,
+                Bet.id.not_in(newest),
+            )
+            .order_by(Bet.id)
+            .limit(batch_size)
+        )
+    )
+
+
+def _batch_moves(bet_ids: list[int]) -> list[tuple[Table, Table, ColumnElement[bool]]]:
+    outcome_ids = select(Outcome.id).where(Outcome.bet_id.in_(bet_ids))
+    return [
+        (Bet.__table__, archived_bets, Bet.id.in_(bet_ids)),
+        (Outcome.__table__, archived_outcomes, Outcome.bet_id.in_(bet_ids)),
+        (Wager.__table__, archived_wagers, Wager.outcome_id.in_(outcome_ids)),
+    ]
+
+
+def _copy_batch(conn: Connection, cutoff: datetime, batch_size: int) -> list[int]:
+    """Copy one batch of resolved bets to the archive and return their ids."""
+    bet_ids = _select_batch(conn, cutoff, batch_size)
+    for source, target, criteria in _batch_moves(bet_ids):
+        columns = [c.name for c in source.columns]
+        # Rows already copied by an interrupted batch are identical; resolved bets never change
+        conn.execute(
+            insert(target)
+            .prefix_with("OR IGNORE")
+            .from_select(columns, select(source).where(criteria))
+        )
+    return bet_ids
+
+
+def _delete_batch(conn: Connection, bet_ids: list[int]) -> None:
+    """Delete a copied batch from the main database."""
+    # Delete children first, as the outcome id subquery reads the outcomes table
+    for source, _, criteria in reversed(_batch_moves(bet_ids)):
+        conn.execute(delete(source).where(criteria))
+
+
+async def archive_resolved_bets(
+    older_than: timedelta | None = None, batch_size: int | None = None
+) -> int:
+    """Move resolved bets older than ``older_than`` to the archive.
+
+    Returns the number of bets moved. Batches commit separately, so other
+    requests can write between them.
+    """
+    if not archive_enabled():
+        raise RuntimeError("Archiving requires a file-based SQLite database")
+    settings = get_settings()
+    if older_than is None:
+        older_than = timedelta(days=settings.archive_after_days)
+    cutoff = datetime.now(UTC).replace(tzinfo=None) - older_than
+    batch_size = batch_size or settings.archive_batch_size
+
+    total = 0
+    while True:
+        async with get_engine().begin() as conn:
+            bet_ids = await conn.run_sync(_copy_batch, cutoff, batch_size)
+        if bet_ids:
+            async with get_engine().begin() as conn:
+                await conn.run_sync(_delete_batch, bet_ids)
+        moved = len(bet_ids)
+        total += moved
+        if moved < batch_size:
+            return total
+
+
+async def compact() -> None:
+    """Rebuild the main database file to reclaim space freed by archiving.
+
+    This also switches databases created before incremental auto-vacuum was
+    enabled over to it, so maintenance can reclaim free pages from then on.
+    """
+    async with get_engine().connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.exec_driver_sql("VACUUM main")
+
+
+async def _run(args: argparse.Namespace) -> int:
+    try:
+        await init_db()
+        older_than = None
+        if args.older_than_days is not None:
+            older_than = timedelta(days=args.older_than_days)
+        moved = await archive_resolved_bets(older_than, args.batch_size)
+        if args.compact:
+            await compact()
+    finally:
+        await dispose_engine()
+    return moved
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m mirustech.betting.archive",
+        description="Move old resolved bets to the archive database.",
+    )
+    parser.add_argument("--older-than-days", type=float, help="default: BETTING_ARCHIVE_AFTER_DAYS")
+    parser.add_argument("--batch-size", type=int, help="default: BETTING_ARCHIVE_BATCH_SIZE")
+    parser.add_argument(
+        "--compact", action="store_true", help="vacuum the main database afterwards"
+    )
+    args = parser.parse_args(argv)
+
+    moved = asyncio.run(_run(args))
+    print(f"Archived {moved} bets")
+
+
+if __name__ == "__main__":
+    main()
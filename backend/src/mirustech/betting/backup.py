@@ -0,0 +1,379 @@
+"""Online snapshots of SQLite databases and verified restores.
+
+Snapshots are taken with SQLite's online backup API from a worker thread, a
+few pages per step, pausing between steps so writers are never locked out for
+more than one step. A write by another connection restarts the copy; after
+``MAX_RESTARTS`` restarts the rest is copied in one step so busy databases
+still get a snapshot.
+
+Each snapshot is ``<database>-<timestamp>.db``, gzip-compressed by default,
+next to a ``.json`` manifest recording its schema version, checksum and the
+row count of every table. Verifying a snapshot checks its checksum, runs
+``PRAGMA integrity_check`` on it and compares its row counts to the manifest;
+restores only replace a database with a snapshot that verifies. The archive
+database is not included; it only changes when archiving runs.
+
+With ``backup_interval_hours`` set, app maintenance snapshots every database
+on that schedule, keeping the newest ``backup_retention`` snapshots of each.
+
+Usage:
+    python -m mirustech.betting.backup create [--office ID] [--no-compress]
+    python -m mirustech.betting.backup list [--office ID]
+    python -m mirustech.betting.backup verify SNAPSHOT
+    python -m mirustech.betting.backup restore SNAPSHOT [--to PATH | --office ID]
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import re
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+
+from sqlalchemy.engine import make_url
+
+from mirustech.betting.config import get_settings
+from mirustech.betting.database import current_tenant, get_database_url
+from mirustech.betting.serialization import JSONDict
+
+# Restarts of a copy, caused by concurrent writes, before the rest is copied in one step
+MAX_RESTARTS = 3
+
+_MAIN = "main"
+_TIMESTAMP = "%Y%m%dT%H%M%S%fZ"
+_SNAPSHOT_NAME = re.compile(r"(?P<database>[a-z0-9][a-z0-9-]*)-(?P<timestamp>\d{8}T\d{12}Z)")
+_CHUNK_SIZE = 1024 * 1024
+_GZIP_LEVEL = 6
+
+_locks: dict[str, threading.Lock] = {}
+
+
+class SnapshotInProgressError(RuntimeError):
+    """A snapshot of the same database is already being taken."""
+
+
+class _TooManyRestartsError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """A snapshot file and its manifest."""
+
+    path: Path
+    manifest: JSONDict
+
+    @property
+    def name(self) -> str:
+        return self.manifest["name"]
+
+    def to_dict(self) -> JSONDict:
+        return {**self.manifest, "path": str(self.path)}
+
+
+def database_path() -> Path | None:
+    """Get the current tenant's database file, or None if it is not a file."""
+    url = make_url(get_database_url())
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        return None
+    return Path(url.database)
+
+
+def backup_directory() -> Path:
+    """Get the snapshot directory, by default ``backups`` beside the main database."""
+    directory = get_settings().backup_directory
+    if directory:
+        return Path(directory)
+    url = make_url(get_settings().database_url)
+    return Path(url.database or ".").parent / "backups"
+
+
+def database_name() -> str:
+    """Get the name snapshots of the current tenant's database start with."""
+    return current_tenant.get() or _MAIN
+
+
+def _manifest_path(path: Path) -> Path:
+    return path.with_name(path.name.split(".", 1)[0] + ".json")
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as file:
+        while chunk := file.read(_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _copy_online(source: sqlite3.Connection, target: sqlite3.Connection) -> int:
+    """Copy ``source`` into ``target`` in steps, returning how many times it restarted."""
+    settings = get_settings()
+    pause = settings.backup_step_pause_ms / 1000
+    restarts = 0
+    remaining_before: int | None = None
+
+    def progress(_status: int, remaining: int, _total: int) -> None:
+        nonlocal restarts, remaining_before
+        # The copy starts over when another connection writes to the source
+        if remaining_before is not None and remaining > remaining_before:
+            restarts += 1
+            if restarts >= MAX_RESTARTS:
+                raise _TooManyRestartsError
+        remaining_before = remaining
+        if remaining:
+            time.sleep(pause)
+
+    try:
+        source.backup(target, pages=settings.backup_step_pages, progress=progress)
+    except _TooManyRestartsError:
+        source.backup(target)
+    return restarts
+
+
+def _table_counts(connection: sqlite3.Connection) -> dict[str, int]:
+    names = [
+        name
+        for (name,) in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' "
+            "AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )
+    ]
+    return {
+        name: connection.execute(f'SELECT count(*) FROM "{name}"').fetchone()[0] for name in names
+    }
+
+
+def take_snapshot(
+    source_path: Path, directory: Path, name: str, compress: bool, scheduled: bool = False
+) -> Snapshot:
+    """Snapshot the database at ``source_path`` into ``directory``, blocking the caller.
+
+    Raises ``SnapshotInProgressError`` if the same database is already being copied.
+    """
+    lock = _locks.setdefault(str(source_path.resolve()), threading.Lock())
+    if not lock.acquire(blocking=False):
+        raise SnapshotInProgressError(f"A snapshot of {name} is already being taken")
+    started = datetime.now(UTC).replace(tzinfo=None)
+    stem = f"{name}-{started.strftime(_TIMESTAMP)}"
+    copy_path = directory / f"{stem}.db.partial"
+    path = directory / (f"{stem}.db.gz" if compress else f"{stem}.db")
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        source = sqlite3.connect(f"{source_path.resolve().as_uri()}?mode=ro", uri=True)
+        with closing(source), closing(sqlite3.connect(copy_path)) as target:
+            restarts = _copy_online(source, target)
+            schema_version = target.execute("PRAGMA user_version").fetchone()[0]
+            tables = _table_counts(target)
+
+        size = copy_path.stat().st_size
+        if compress:
+            with copy_path.open("rb") as raw, gzip.open(path, "wb", _GZIP_LEVEL) as packed:
+                shutil.copyfileobj(raw, packed, _CHUNK_SIZE)
+            copy_path.unlink()
+        else:
+            copy_path.replace(path)
+
+        manifest: JSONDict = {
+            "name": stem,
+            "database": name,
+            "created_at": started.isoformat() + "Z",
+            "duration_seconds": round(
+                (datetime.now(UTC).replace(tzinfo=None) - started).total_seconds(), 3
+            ),
+            "scheduled": scheduled,
+            "compressed": compress,
+            "database_bytes": size,
+            "file_bytes": path.stat().st_size,
+            "sha256": _sha256(path),
+            "restarts": restarts,
+            "schema_version": schema_version,
+            "tables": tables,
+        }
+        # Written last: snapshots without a manifest are never listed or restored
+        _manifest_path(path).write_text(json.dumps(manifest, indent=2) + "\n")
+        return Snapshot(path, manifest)
+    except BaseException:
+        copy_path.unlink(missing_ok=True)
+        path.unlink(missing_ok=True)
+        raise
+    finally:
+        lock.release()
+
+
+def list_snapshots(directory: Path, name: str | None = None) -> list[Snapshot]:
+    """List the snapshots in ``directory``, of the database ``name`` if given, newest first."""
+    snapshots = []
+    for manifest_path in directory.glob("*.json"):
+        match = _SNAPSHOT_NAME.fullmatch(manifest_path.stem)
+        if match is None or (name is not None and match["database"] != name):
+            continue
+        manifest = json.loads(manifest_path.read_text())
+        suffix = ".db.gz" if manifest.get("compressed") else ".db"
+        path = manifest_path.with_name(manifest_path.stem + suffix)
+        if path.exists():
+            snapshots.append(Snapshot(path, manifest))
+    return sorted(snapshots, key=lambda snapshot: snapshot.name, reverse=True)
+
+
+def load_snapshot(path: Path) -> Snapshot:
+    """Load the manifest of the snapshot file at ``path``."""
+    manifest_path = _manifest_path(path)
+    if not path.exists() or not manifest_path.exists():
+        raise FileNotFoundError(f"No snapshot with a manifest at {path}")
+    return Snapshot(path, json.loads(manifest_path.read_text()))
+
+
+def _unpack(snapshot: Snapshot, destination: Path) -> None:
+    opener = gzip.open if snapshot.manifest.get("compressed") else open
+    with opener(snapshot.path, "rb") as packed, destination.open("wb") as raw:
+        shutil.copyfileobj(packed, raw, _CHUNK_SIZE)
+
+
+def _check_database(path: Path, manifest: JSONDict) -> list[str]:
+    """Check an unpacked snapshot's integrity and row counts against its manifest."""
+    problems = []
+    with closing(sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)) as conn:
+        integrity = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+        if integrity != ["ok"]:
+            problems.extend(f"integrity: {message}" for message in integrity)
+            return problems
+        expected = manifest.get("tables", {})
+        counted = _table_counts(conn)
+        for table in sorted(expected.keys() | counted.keys()):
+            if expected.get(table) != counted.get(table):
+                problems.append(
+                    f"rows in {table}: expected {expected.get(table)}, found {counted.get(table)}"
+                )
+    return problems
+
+
+def verify_snapshot(snapshot: Snapshot, keep_as: Path | None = None) -> list[str]:
+    """Check a snapshot's checksum, integrity and row counts, returning any problems.
+
+    The unpacked database is kept at ``keep_as`` if it verifies.
+    """
+    if _sha256(snapshot.path) != snapshot.manifest.get("sha256"):
+        return ["checksum does not match the manifest"]
+    unpacked = (keep_as or snapshot.path).with_name(f"{snapshot.name}.verify.partial")
+    try:
+        _unpack(snapshot, unpacked)
+        problems = _check_database(unpacked, snapshot.manifest)
+        if not problems and keep_as is not None:
+            unpacked.replace(keep_as)
+        return problems
+    except (OSError, EOFError, sqlite3.DatabaseError) as exc:
+        return [f"unreadable: {exc}"]
+    finally:
+        unpacked.unlink(missing_ok=True)
+
+
+def restore_snapshot(snapshot: Snapshot, target: Path) -> None:
+    """Replace the database at ``target`` with a snapshot, if it verifies.
+
+    Nothing may have the target open: stop the app first.
+    """
+    target.parent.mkdir(parents=True, exist_ok=True)
+    staged = target.with_name(f"{target.name}.restore")
+    problems = verify_snapshot(snapshot, keep_as=staged)
+    if problems:
+        raise RuntimeError(f"Snapshot {snapshot.name} failed verification: {'; '.join(problems)}")
+    # Journals of the replaced database would be applied to the snapshot
+    for suffix in ("-wal", "-shm", "-journal"):
+        target.with_name(target.name + suffix).unlink(missing_ok=True)
+    staged.replace(target)
+
+
+def prune_snapshots(directory: Path, name: str, keep: int) -> int:
+    """Delete all but the newest ``keep`` snapshots of a database, returning how many."""
+    expired = list_snapshots(directory, name)[keep:]
+    for snapshot in expired:
+        snapshot.path.unlink(missing_ok=True)
+        _manifest_path(snapshot.path).unlink(missing_ok=True)
+    return len(expired)
+
+
+async def create_snapshot(compress: bool | None = None, scheduled: bool = False) -> Snapshot:
+    """Snapshot the current tenant's database without blocking the event loop."""
+    source = database_path()
+    if source is None:
+        raise RuntimeError("Snapshots require a file-based SQLite database")
+    if compress is None:
+        compress = get_settings().backup_compress
+    return await asyncio.to_thread(
+        take_snapshot, source, backup_directory(), database_name(), compress, scheduled
+    )
+
+
+async def scheduled_snapshot() -> JSONDict:
+    """Snapshot the current tenant's database and prune its old snapshots."""
+    snapshot = await create_snapshot(scheduled=True)
+    pruned = await asyncio.to_thread(
+        prune_snapshots, backup_directory(), database_name(), get_settings().backup_retention
+    )
+    return {
+        "snapshot": snapshot.name,
+        "bytes": snapshot.manifest["file_bytes"],
+        "restarts": snapshot.manifest["restarts"],
+        "pruned": pruned,
+    }
+
+
+def _target_path(args: argparse.Namespace) -> Path:
+    if args.to:
+        return Path(args.to)
+    path = database_path()
+    if path is None:
+        raise SystemExit("The configured database is not a file; pass --to")
+    return path
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m mirustech.betting.backup",
+        description="Take, list, verify and restore database snapshots.",
+    )
+    parser.add_argument("command", choices=["create", "list", "verify", "restore"])
+    parser.add_argument("snapshot", nargs="?", help="Snapshot file to verify or restore")
+    parser.add_argument("--office", help="Office database instead of the main one")
+    parser.add_argument("--to", help="Database file to restore into (default: the configured one)")
+    parser.add_argument("--no-compress", action="store_true", help="write an uncompressed snapshot")
+    args = parser.parse_args(argv)
+    if args.command in ("verify", "restore") and not args.snapshot:
+        parser.error(f"{args.command} requires a snapshot file")
+
+    current_tenant.set(args.office)
+    if args.command == "create":
+        snapshot = asyncio.run(create_snapshot(False if args.no_compress else None))
+        print(json.dumps(snapshot.to_dict(), indent=2))
+    elif args.command == "list":
+        for snapshot in list_snapshots(backup_directory(), database_name()):
+            print(f"{snapshot.path}  {snapshot.manifest['file_bytes']} bytes")
+    else:
+        snapshot = load_snapshot(Path(args.snapshot))
+        if args.command == "verify":
+            problems = verify_snapshot(snapshot)
+            for problem in problems:
+                print(problem, file=sys.stderr)
+            print(f"{snapshot.name}: {'FAILED' if problems else 'OK'}")
+            if problems:
+                raise SystemExit(1)
+        else:
+            target = _target_path(args)
+            try:
+                restore_snapshot(snapshot, target)
+            except RuntimeError as exc:
+                raise SystemExit(str(exc)) from None
+            print(f"Restored {snapshot.name} to {target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Cache of serialized responses, invalidated by the bets they show.
+
+Bet details and listing pages are cached as the JSON bytes sent to clients,
+tagged with what they depend on: each bet they show, plus the set of bets a
+listing could show. Writes invalidate tags once their transaction commits:
+wagers invalidate their bets, and creating, closing or resolving bets also
+invalidates listings. Closing expired bets, which happens at the start of
+reads, invalidates at once as well, so the read that closed them never sees
+them cached as open.
+
+Concurrent misses on the same key are coalesced, so a burst of requests for a
+cold page runs one computation and the rest await its result. Entries live in
+a ``CacheBackend``; the default keeps them in process memory, least recently
+used first, and ``response_cache_backend`` names a shared one instead.
+
+Invalidation is also checked on every hit: an entry is fresh only if none of
+its tags was invalidated after its computation started, so a computation that
+raced a write is never served, even before the backend has dropped it.
+"""
+
+import asyncio
+import importlib
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Collection, Iterable
+from functools import partial
+from typing import NamedTuple, Protocol
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from mirustech.betting.config import get_settings
+from mirustech.betting.database import current_tenant, run_after_commit
+
+# Invalidated whenever the bets a listing could show change: created, closed or resolved
+LISTING_TAG = "bets"
+# Invalidated by every wager, for listings sorted by pool or wager count
+TOTALS_TAG = "bets:totals"
+
+
+def bet_tag(bet_id: int) -> str:
+    """Tag of the entries showing a bet."""
+    return f"bet:{bet_id}"
+
+
+class CacheEntry(NamedTuple):
+    """A cached body, the tags it depends on and when its computation started."""
+
+    body: bytes
+    tags: frozenset[str]
+    created: float  # Wall-clock seconds
+
+
+class CacheBackend(Protocol):
+    """Storage for cache entries; keys and tags are already scoped to an office."""
+
+    async def get(self, key: str) -> CacheEntry | None:
+        """Get an unexpired entry."""
+        ...
+
+    async def set(self, key: str, entry: CacheEntry, ttl: float) -> None:
+        """Store an entry for ``ttl`` seconds."""
+        ...
+
+    async def invalidate(self, tags: Collection[str]) -> None:
+        """Drop the entries tagged with any of ``tags``."""
+        ...
+
+
+class MemoryCacheBackend:
+    """In-process entries bounded by total body size, least recently used first."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[float, CacheEntry]] = OrderedDict()
+        self._keys_by_tag: dict[str, set[str]] = {}
+        self._size = 0
+
+    async def get(self, key: str) -> CacheEntry | None:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires, entry = item
+        if expires <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: CacheEntry, ttl: float) -> None:
+        if len(entry.body) > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, entry)
+        self._size += len(entry.body)
+        for tag in entry.tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+        while self._size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    async def invalidate(self, tags: Collection[str]) -> None:
+        for tag in tags:
+            for key in self._keys_by_tag.pop(tag, set()):
+                self._remove(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        item = self._entries.pop(key, None)
+        if item is None:
+            return
+        _, entry = item
+        self._size -= len(entry.body)
+        for tag in entry.tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+
+# A computation's body, the tags it depends on and an optional shorter lifetime
+Computed = tuple[bytes, Iterable[str], float | None]
+
+
+class ResponseCache:
+    """Coalesced, tag-invalidated cache of response bodies in a backend."""
+
+    # Invalidation times kept before ones older than any entry are pruned
+    _MAX_INVALIDATIONS = 10_000
+
+    def __init__(self, backend: CacheBackend, ttl: float) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self._invalidated: dict[str, float] = {}
+        self._last_invalidation = 0.0
+        self._inflight: dict[str, tuple[float, asyncio.Future[CacheEntry]]] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    @staticmethod
+    def _scoped(name: str) -> str:
+        return f"{current_tenant.get() or ''}/{name}"
+
+    def _is_fresh(self, entry: CacheEntry) -> bool:
+        return all(self._invalidated.get(tag, 0.0) < entry.created for tag in entry.tags)
+
+    async def get_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[Computed]]
+    ) -> tuple[bytes, bool]:
+        """Get the body cached under ``key``, computing it on a miss.
+
+        Returns the body and whether it came from the cache or another request's
+        computation. Errors raised by ``compute`` are not cached.
+        """
+        key = self._scoped(key)
+        entry = await self.backend.get(key)
+        if entry is not None and self._is_fresh(entry):
+            return entry.body, True
+
+        while (inflight := self._inflight.get(key)) is not None:
+            started, future = inflight
+            # Computations begun before a write may miss it; start a new one
+            if started <= self._last_invalidation:
+                break
+            try:
+                return (await asyncio.shield(future)).body, True
+            except asyncio.CancelledError:
+                task = asyncio.current_task()
+                if not future.cancelled() or (task is not None and task.cancelling()):
+                    raise
+                # The computing request went away; compute here instead
+
+        started = time.time()
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = (started, future)
+        try:
+            body, tags, max_age = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # Retrieved by waiters, if any
+            raise
+        finally:
+            if self._inflight.get(key, (None, None))[1] is future:
+                del self._inflight[key]
+
+        entry = CacheEntry(body, frozenset(self._scoped(tag) for tag in tags), started)
+        future.set_result(entry)
+        ttl = self.ttl if max_age is None else min(self.ttl, max_age)
+        if ttl > 0:
+            await self.backend.set(key, entry, ttl)
+        return body, False
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        """Invalidate ``tags`` at once; the backend drops their entries in the background."""
+        now = time.time()
+        scoped = [self._scoped(tag) for tag in tags]
+        if len(self._invalidated) > self._MAX_INVALIDATIONS:
+            self._invalidated = {
+                tag: at for tag, at in self._invalidated.items() if at > now - self.ttl
+            }
+        for tag in scoped:
+            self._invalidated[tag] = now
+        self._last_invalidation = now
+        task = asyncio.get_running_loop().create_task(self.backend.invalidate(scoped))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+def _load_backend(path: str) -> CacheBackend:
+    """Create a backend from a ``module:factory`` path."""
+    module_name, _, name = path.partition(":")
+    factory = getattr(importlib.import_module(module_name), name)
+    return factory()
+
+
+_cache: ResponseCache | None = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Get the response cache, creating its backend from the settings on first use."""
+    global _cache
+    if _cache is None:
+        settings = get_settings()
+        backend = (
+            _load_backend(settings.response_cache_backend)
+            if settings.response_cache_backend
+            else MemoryCacheBackend(settings.response_cache_bytes)
+        )
+        _cache = ResponseCache(backend, settings.response_cache_ttl_seconds)
+    return _cache
+
+
+def invalidate_after_commit(db: AsyncSession, tags: Iterable[str]) -> None:
+    """Invalidate ``tags`` once the session's transaction commits."""
+    run_after_commit(db, partial(get_response_cache().invalidate, list(tags)))
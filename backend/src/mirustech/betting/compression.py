@@ -0,0 +1,162 @@
+"""Gzip compression of responses.
+
+Responses of at least ``compression_minimum_size`` bytes are compressed for
+clients that accept gzip. Compressed bodies of complete responses are cached by
+a digest of their content, so hot responses that repeat byte for byte, such as
+an unchanged bet list polled by every client, are compressed only once.
+Streaming responses, such as exports, are compressed chunk by chunk.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import zlib
+from collections import OrderedDict
+from typing import Any
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from mirustech.betting.config import get_settings
+
+# Content types worth compressing; everything else is passed through
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+# Bodies at least this large are compressed in a worker thread, off the event loop
+_THREAD_THRESHOLD = 256 * 1024
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Check whether an ``Accept-Encoding`` header allows gzip."""
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            try:
+                return float(params.strip().removeprefix("q=") or 1) > 0
+            except ValueError:
+                return False
+    return False
+
+
+class CompressedCache:
+    """Compressed bodies keyed by a digest of their content, least recently used first."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[bytes, bytes] = OrderedDict()
+        self._size = 0
+
+    def get(self, digest: bytes) -> bytes | None:
+        compressed = self._entries.get(digest)
+        if compressed is not None:
+            self._entries.move_to_end(digest)
+        return compressed
+
+    def put(self, digest: bytes, compressed: bytes) -> None:
+        if digest in self._entries or len(compressed) > self.max_bytes:
+            return
+        self._entries[digest] = compressed
+        self._size += len(compressed)
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+
+class CompressionMiddleware:
+    """Compress responses for clients that accept gzip."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.cache = CompressedCache(get_settings().compression_cache_bytes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not accepts_gzip(
+            Headers(scope=scope).get("accept-encoding", "")
+        ):
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _GzipResponder(send, self.cache).send)
+
+    @staticmethod
+    def compress(body: bytes) -> bytes:
+        """Compress a complete body; the output depends only on the input."""
+        return gzip.compress(body, compresslevel=get_settings().compression_level, mtime=0)
+
+
+class _GzipResponder:
+    """Rewrites the messages of one response, deciding on its first body chunk."""
+
+    def __init__(self, send: Send, cache: CompressedCache) -> None:
+        self._send = send
+        self._cache = cache
+        self._start: Message | None = None
+        self._compressor: Any = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self._start = message
+            return
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+        if self._compressor is not None:
+            data = self._compressor.compress(body)
+            data += self._compressor.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+            await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+            return
+
+        assert self._start is not None
+        start, self._start = self._start, None
+        headers = MutableHeaders(scope=start)
+        if not self._compressible(start["status"], headers, body, more_body):
+            self._passthrough = True
+            await self._send(start)
+            await self._send(message)
+            return
+
+        headers["Content-Encoding"] = "gzip"
+        headers.add_vary_header("Accept-Encoding")
+        # The bytes differ from the uncompressed representation
+        etag = headers.get("etag")
+        if etag is not None and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+
+        if more_body:
+            del headers["Content-Length"]
+            level = get_settings().compression_level
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            data = self._compressor.compress(body) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+            await self._send(start)
+            await self._send({"type": "http.response.body", "body": data, "more_body": True})
+            return
+
+        compressed = await self._compress_cached(body)
+        headers["Content-Length"] = str(len(compressed))
+        await self._send(start)
+        await self._send({"type": "http.response.body", "body": compressed})
+
+    @staticmethod
+    def _compressible(status: int, headers: MutableHeaders, body: bytes, more_body: bool) -> bool:
+        if status < 200 or status in (204, 304):
+            return False
+        if "content-encoding" in headers:
+            return False
+        if not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES):
+            return False
+        # Streams of unknown length are always compressed
+        return more_body or len(body) >= get_settings().compression_minimum_size
+
+    async def _compress_cached(self, body: bytes) -> bytes:
+        digest = hashlib.blake2b(body, digest_size=16).digest()
+        compressed = self._cache.get(digest)
+        if compressed is None:
+            if len(body) >= _THREAD_THRESHOLD:
+                compressed = await asyncio.to_thread(CompressionMiddleware.compress, body)
+            else:
+                compressed = CompressionMiddleware.compress(body)
+            self._cache.put(digest, compressed)
+        return compressed
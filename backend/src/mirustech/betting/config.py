@@ -19,10 +19,87 @@ class Settings(BaseSettings):
     initial_balance: int = 1000
     minimum_wager: int = 50
     early_bet_bonus: float = 1.2
+    admin_usernames: list[str] = []  # /api/admin users; "<office>/<name>" for offices
+
+    # Logging
+    log_level: str = "INFO"
+    log_format: str = "json"  # "json", or "console" for development
+    log_requests: bool = False  # Log every request as a "request" event
+    log_sample_rates: dict[str, float] = {}  # Share of each event kept, by event name
+    log_rate_limits: dict[str, float] = {}  # Most of each event logged per second, by name
+    log_queue_size: int = 10_000  # Records waiting to be written before new ones are dropped
+    log_summary_interval_seconds: float = 60.0  # How often sampled and dropped counts are logged
+
+    # Compression
+    compression_minimum_size: int = 1024  # Smaller responses are sent uncompressed
+    compression_level: int = 6
+    compression_cache_bytes: int = 8 * 1024 * 1024  # Compressed hot responses kept in memory
+
+    # Response cache
+    response_cache_ttl_seconds: float = 30.0  # Longest a response is cached; 0 disables
+    response_cache_bytes: int = 16 * 1024 * 1024  # Cached response bodies kept in memory
+    response_cache_backend: str | None = None  # "module:factory" of a shared cache backend
+
+    # Tenancy
+    tenants_directory: str | None = None  # Holds one <office>.db per office; unset disables
+    max_open_tenants: int = 32  # Office engines kept open before idle ones are closed
+
+    # Tracing
+    trace_sample_rate: float = 0.0  # Share of requests traced in full; 0 disables tracing
+    trace_buffer_size: int = 200  # Recent sampled traces kept for /api/debug/traces
+    trace_export_path: str | None = None  # Also append sampled spans here as JSON lines
+
+    # Export
+    export_watermark_lag_seconds: float = 60.0  # Longest a write takes from stamping rows to commit
+
+    # Archive
+    archive_database_path: str | None = None  # Defaults to <database>_archive.db alongside it
+    archive_after_days: int = 180  # Age of resolved bets moved to the archive
+    archive_batch_size: int = 500  # Bets moved per transaction
+
+    # Maintenance
+    sqlite_journal_mode: str = "wal"
+    maintenance_tick_seconds: float = 5.0  # How often the scheduler checks for due jobs
+    maintenance_quiet_seconds: float = 2.0  # Idle time without requests that counts as quiet
+    maintenance_optimize_hours: float = 6.0  # PRAGMA optimize; 0 disables any job
+    maintenance_checkpoint_seconds: float = 300.0  # WAL checkpoints, truncating when quiet
+    maintenance_vacuum_hours: float = 24.0  # Incremental vacuum of free pages, when quiet
+    maintenance_vacuum_pages: int = 2000  # Most free pages reclaimed per vacuum
+    maintenance_integrity_hours: float = 24.0 * 7  # PRAGMA integrity_check, when quiet
+    maintenance_templates_seconds: float = 60.0  # Creating due bets of bet templates
+
+    # Backups
+    backup_directory: str | None = None  # Defaults to "backups" beside the main database
+    backup_compress: bool = True  # Gzip snapshots
+    backup_step_pages: int = 256  # Pages copied per step, while the source is read-locked
+    backup_step_pause_ms: float = 5.0  # Pause between steps, letting writers in
+    backup_interval_hours: float = 0.0  # Scheduled snapshots of every database; 0 disables
+    backup_retention: int = 7  # Snapshots of each database kept by the schedule
+
+    # Events
+    event_retention_hours: int = 24 * 7  # Events older than this are pruned
+    event_prune_interval_seconds: int = 60 * 60
+
+    # Odds history
+    odds_history_capacity: int = 512  # Snapshots kept per bet before downsampling
 
     class Config:
         env_file = ".env"
         env_prefix = "BETTING_"
 
 
-settings = Settings()
+_settings: Settings | None = None
+
+
+def get_settings() -> Settings:
+    """Get the active settings, loading them from the environment on first use."""
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
+
+
+def configure_settings(settings: Settings) -> None:
+    """Replace the active settings, e.g. with ones passed to the app factory."""
+    global _settings
+    _settings = settings
@@ -1,12 +1,36 @@
-"""Database connection and session management."""
+"""Database connection and session management.
 
-from collections.abc import AsyncGenerator
+The engine and session factory are built lazily from the active settings on
+first use, so importing this module has no side effects.
+
+When tenancy is enabled, each office has its own SQLite file with its own
+engine. ``current_tenant`` selects the database that ``get_engine``,
+``async_session`` and ``get_db`` use; None is the main database. Office engines
+are opened on first use and the least recently used idle ones are closed once
+more than ``max_open_tenants`` are open, along with the in-process state kept
+for them in mappings passed to ``register_tenant_state``.
+"""
+
+import asyncio
+from collections import Counter, OrderedDict
+from collections.abc import AsyncGenerator, Callable
+from contextvars import ContextVar
+from functools import partial
 from pathlib import Path
+from typing import Any
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import DeclarativeBase, Session
 
-from mirustech.betting.config import settings
+from mirustech.betting.config import get_settings
+from mirustech.betting.tracing import instrument_engine, span
 
 
 class Base(DeclarativeBase):
@@ -15,36 +39,261 @@ class Base(DeclarativeBase):
     pass
 
 
-# Ensure data directory exists
-data_dir = Path("./data")
-data_dir.mkdir(exist_ok=True)
+# Schema name of the attached archive database holding old resolved bets
+ARCHIVE_SCHEMA = "archive"
 
-# Create async engine
-engine = create_async_engine(
-    settings.database_url,
-    echo=settings.debug,
-)
+# Execution options that run a statement against the archive's copies of the tables
+ARCHIVE_EXECUTION_OPTIONS = {"schema_translate_map": {None: ARCHIVE_SCHEMA}}
+
+# Office whose database the current request or task uses; None for the main one
+current_tenant: ContextVar[str | None] = ContextVar("current_tenant", default=None)
+
+_engine: AsyncEngine | None = None
+_session_factory: async_sessionmaker[AsyncSession] | None = None
+
+
+def _ensure_sqlite_directory(database_url: str) -> None:
+    """Create the parent directory of a file-based SQLite database."""
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:"):
+        Path(url.database).parent.mkdir(parents=True, exist_ok=True)
+
+
+def tenant_database_url(tenant: str) -> str:
+    """Get the database URL of an office's SQLite file."""
+    directory = get_settings().tenants_directory
+    if not directory:
+        raise RuntimeError("Tenancy is not enabled; set BETTING_TENANTS_DIRECTORY")
+    return f"sqlite+aiosqlite:///{Path(directory) / f'{tenant}.db'}"
+
+
+def get_database_url() -> str:
+    """Get the URL of the current tenant's database."""
+    tenant = current_tenant.get()
+    if tenant is None:
+        return get_settings().database_url
+    return tenant_database_url(tenant)
+
+
+def _archive_path_for(database_url: str) -> str | None:
+    url = make_url(database_url)
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        return None
+    path = Path(url.database)
+    return str(path.with_name(f"{path.stem}_archive{path.suffix}"))
+
+
+def get_archive_path() -> str | None:
+    """Get the archive database file, or None when archiving is unavailable.
+
+    Unless configured, the archive sits next to a file-based SQLite database as
+    ``<name>_archive<suffix>``. Offices always use their own archive file.
+    """
+    settings = get_settings()
+    if settings.archive_database_path and current_tenant.get() is None:
+        return settings.archive_database_path
+    return _archive_path_for(get_database_url())
+
+
+def archive_enabled() -> bool:
+    """Check whether the archive database is attached to connections."""
+    return get_archive_path() is not None
+
+
+def _attach_archive(path: str, dbapi_connection: Any, _record: object) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (path,))
+    cursor.close()
+
+
+def _set_pragmas(dbapi_connection: Any, _record: object) -> None:
+    cursor = dbapi_connection.cursor()
+    # Only takes effect on new databases, or on existing ones when they are vacuumed;
+    # set first, as switching the journal mode writes a new database's header
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    # Persistent, so only the first connection to a database file changes it
+    cursor.execute(f"PRAGMA journal_mode = {get_settings().sqlite_journal_mode}")
+    cursor.close()
+
+
+def _create_engine(database_url: str, archive_path: str | None) -> AsyncEngine:
+    _ensure_sqlite_directory(database_url)
+    # SQL is logged through the logging pipeline in debug mode rather than by ``echo``
+    engine = create_async_engine(database_url)
+    instrument_engine(engine.sync_engine)
+    if engine.dialect.name == "sqlite":
+        event.listen(engine.sync_engine, "connect", _set_pragmas)
+    if archive_path is not None:
+        event.listen(engine.sync_engine, "connect", partial(_attach_archive, archive_path))
+    return engine
+
+
+_tenant_states: list[dict[str | None, Any]] = []
+
+
+def register_tenant_state(state: dict[str | None, Any]) -> None:
+    """Drop an office's entry from ``state`` whenever its engine is closed.
+
+    For in-process state kept per office, which is rebuilt on the office's
+    next use, so evicted offices do not hold on to theirs.
+    """
+    _tenant_states.append(state)
+
+
+def _drop_tenant_state(tenant: str) -> None:
+    for state in _tenant_states:
+        state.pop(tenant, None)
 
-# Session factory
-async_session = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-)
+
+def _create_sessionmaker(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+class TenantEngines:
+    """Bounded registry of office engines, opened lazily and evicted least recently used.
+
+    Only idle offices are evicted, i.e. ones without active users as counted by
+    ``acquire`` and ``release``, so the registry may briefly hold more engines
+    than its capacity while they are all busy.
+    """
+
+    def __init__(self) -> None:
+        self._open: OrderedDict[str, tuple[AsyncEngine, async_sessionmaker[AsyncSession]]] = (
+            OrderedDict()
+        )
+        self._active: Counter[str] = Counter()
+        self._disposals: set[asyncio.Task[None]] = set()
+
+    def __contains__(self, tenant: str) -> bool:
+        return tenant in self._open
+
+    def __len__(self) -> int:
+        return len(self._open)
+
+    def get(self, tenant: str) -> tuple[AsyncEngine, async_sessionmaker[AsyncSession]]:
+        """Get an office's engine and session factory, opening them on first use."""
+        entry = self._open.get(tenant)
+        if entry is not None:
+            self._open.move_to_end(tenant)
+            return entry
+        database_url = tenant_database_url(tenant)
+        engine = _create_engine(database_url, _archive_path_for(database_url))
+        entry = self._open[tenant] = (engine, _create_sessionmaker(engine))
+        self._evict_idle(keep=tenant)
+        return entry
+
+    def acquire(self, tenant: str) -> None:
+        """Mark an office as in use, so its engine is not evicted."""
+        self._active[tenant] += 1
+
+    def release(self, tenant: str) -> None:
+        """Undo ``acquire``."""
+        self._active[tenant] -= 1
+        if self._active[tenant] <= 0:
+            del self._active[tenant]
+        self._evict_idle()
+
+    def _evict_idle(self, keep: str | None = None) -> None:
+        excess = len(self._open) - get_settings().max_open_tenants
+        if excess <= 0:
+            return
+        idle = [t for t in self._open if t != keep and not self._active[t]][:excess]
+        for tenant in idle:
+            engine, _ = self._open.pop(tenant)
+            _drop_tenant_state(tenant)
+            # Connections still checked out are closed when they are returned
+            task = asyncio.get_running_loop().create_task(engine.dispose())
+            self._disposals.add(task)
+            task.add_done_callback(self._disposals.discard)
+
+    async def dispose_all(self) -> None:
+        """Dispose of every open office engine."""
+        engines = [engine for engine, _ in self._open.values()]
+        for tenant in self._open:
+            _drop_tenant_state(tenant)
+        self._open.clear()
+        await asyncio.gather(*self._disposals, *(engine.dispose() for engine in engines))
+
+
+_tenant_engines = TenantEngines()
+
+
+def get_tenant_engines() -> TenantEngines:
+    """Get the process-wide registry of office engines."""
+    return _tenant_engines
+
+
+def get_engine() -> AsyncEngine:
+    """Get the current tenant's async engine, creating it on first use."""
+    global _engine
+    tenant = current_tenant.get()
+    if tenant is not None:
+        return _tenant_engines.get(tenant)[0]
+    if _engine is None:
+        _engine = _create_engine(get_settings().database_url, get_archive_path())
+    return _engine
+
+
+def get_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    """Get the current tenant's session factory, creating it on first use."""
+    global _session_factory
+    tenant = current_tenant.get()
+    if tenant is not None:
+        return _tenant_engines.get(tenant)[1]
+    if _session_factory is None:
+        _session_factory = _create_sessionmaker(get_engine())
+    return _session_factory
+
+
+def async_session() -> AsyncSession:
+    """Open a new session on the current tenant's database."""
+    return get_sessionmaker()()
+
+
+async def dispose_engine() -> None:
+    """Dispose of all engines; the next use rebuilds them from the active settings."""
+    global _engine, _session_factory
+    if _engine is not None:
+        await _engine.dispose()
+    _engine = None
+    _session_factory = None
+    await _tenant_engines.dispose_all()
+
+
+def run_after_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """Run ``callback`` once the session's current transaction commits.
+
+    Callbacks are discarded if the transaction rolls back, so in-process state
+    updated from them never gets ahead of the database.
+    """
+    session.sync_session.info.setdefault("after_commit", []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit_callbacks(session: Session) -> None:
+    for callback in session.info.pop("after_commit", []):
+        callback()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_commit_callbacks(session: Session) -> None:
+    session.info.pop("after_commit", None)
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    """Dependency that provides a database session."""
+    """Dependency that provides a session on the requesting office's database."""
     async with async_session() as session:
         try:
             yield session
-            await session.commit()
+            with span("commit"):
+                await session.commit()
         except Exception:
             await session.rollback()
             raise
 
 
 async def init_db() -> None:
-    """Initialize the database by creating all tables."""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    """Bring the current tenant's database schema up to date."""
+    from mirustech.betting.migrations import ensure_schema
+
+    await ensure_schema(get_engine())
@@ -0,0 +1,233 @@
+"""Streaming export of bets, outcomes, wagers and payouts as NDJSON or CSV.
+
+Rows are read through a server-side cursor in partitions of ``BATCH_SIZE`` and
+encoded as they arrive, so memory use does not grow with the size of the
+export. Each export covers the half-open window ``[since, until)``; passing the
+returned ``until`` as the next ``since`` gives gap-free incremental pulls.
+``until`` is never later than ``export_watermark()``, which trails the clock far
+enough that every row stamped before it has committed.
+
+Usage:
+    python -m mirustech.betting.export wagers --format csv --since 2026-01-01T00:00:00
+"""
+
+import argparse
+import asyncio
+import csv
+import enum
+import io
+import sys
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import ColumnElement, Select, and_, or_, select
+
+from mirustech.betting.config import get_settings
+from mirustech.betting.database import ARCHIVE_EXECUTION_OPTIONS, async_session, dispose_engine
+from mirustech.betting.models import Bet, BetStatus, Outcome, Wager
+from mirustech.betting.serialization import dumps
+
+BATCH_SIZE = 1000
+
+EXPORT_KINDS = ("bets", "outcomes", "wagers", "payouts")
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _in_window(
+    column: ColumnElement[datetime], since: datetime | None, until: datetime
+) -> ColumnElement[bool]:
+    if since is None:
+        return column < until
+    return and_(column >= since, column < until)
+
+
+def build_query(
+    kind: str,
+    since: datetime | None,
+    until: datetime,
+    bet_status: BetStatus | None = None,
+    archived: bool = False,
+) -> Select:
+    """Build the ordered query of one export kind.
+
+    Bets are included when created or resolved within the window, outcomes
+    with their bet's creation, wagers by placement and payouts by resolution.
+    With ``archived`` the query reads the archive database instead.
+    """
+    if kind == "bets":
+        query = select(
+            Bet.id,
+            Bet.creator_id,
+            Bet.title,
+            Bet.description,
+            Bet.status,
+            Bet.winning_outcome_id,
+            Bet.close_time,
+            Bet.created_at,
+            Bet.resolved_at,
+        ).where(
+            or_(
+                _in_window(Bet.created_at, since, until),
+                _in_window(Bet.resolved_at, since, until),
+            )
+        )
+        order = Bet.id
+    elif kind == "outcomes":
+        query = (
+            select(Outcome.id, Outcome.bet_id, Outcome.name)
+            .join(Bet, Outcome.bet_id == Bet.id)
+            .where(_in_window(Bet.created_at, since, until))
+        )
+        order = Outcome.id
+    elif kind == "wagers":
+        query = (
+            select(
+                Wager.id,
+                Wager.user_id,
+                Outcome.bet_id,
+                Wager.outcome_id,
+                Wager.amount,
+                Wager.weight,
+                Wager.created_at,
+            )
+            .join(Outcome, Wager.outcome_id == Outcome.id)
+            .join(Bet, Outcome.bet_id == Bet.id)
+            .where(_in_window(Wager.created_at, since, until))
+        )
+        order = Wager.id
+    elif kind == "payouts":
+        query = (
+            select(
+                Wager.id.label("wager_id"),
+                Wager.user_id,
+                Outcome.bet_id,
+                Wager.outcome_id,
+                Wager.amount,
+                Wager.payout,
+                Bet.resolved_at,
+            )
+            .join(Outcome, Wager.outcome_id == Outcome.id)
+            .join(Bet, Outcome.bet_id == Bet.id)
+            .where(Bet.status == BetStatus.RESOLVED, _in_window(Bet.resolved_at, since, until))
+        )
+        order = Wager.id
+    else:
+        raise ValueError(f"Unknown export kind: {kind}")
+
+    if bet_status is not None:
+        query = query.where(Bet.status == bet_status)
+    if archived:
+        query = query.execution_options(**ARCHIVE_EXECUTION_OPTIONS)
+    return query.order_by(order)
+
+
+def _csv_value(value: object) -> object:
+    if isinstance(value, datetime):
+        return value.isoformat() + "Z"
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+async def stream_export(
+    kind: str,
+    fmt: str = "ndjson",
+    since: datetime | None = None,
+    until: datetime | None = None,
+    bet_status: BetStatus | None = None,
+    archived: bool = False,
+) -> AsyncIterator[bytes]:
+    """Yield an export as encoded chunks, one per cursor partition.
+
+    The generator opens its own session, so it can outlive the request that
+    started it.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    query = build_query(kind, since, export_until(until), bet_status, archived)
+
+    async with async_session() as db:
+        result = await db.stream(query.execution_options(yield_per=BATCH_SIZE))
+        columns = list(result.keys())
+
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            async for partition in result.partitions():
+                writer.writerows([_csv_value(v) for v in row] for row in partition)
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue().encode()
+        else:
+            async for partition in result.partitions():
+                yield b"".join(
+                    dumps(dict(zip(columns, row, strict=True))) + b"\n" for row in partition
+                )
+
+
+def export_watermark() -> datetime:
+    """Get the latest upper bound an export can have without missing rows.
+
+    Timestamps are set when rows are flushed, before their transaction
+    commits, so rows stamped just before now may not be visible yet. The
+    watermark trails now by ``export_watermark_lag_seconds``, by when they
+    have committed or rolled back.
+    """
+    lag = timedelta(seconds=get_settings().export_watermark_lag_seconds)
+    return datetime.now(UTC).replace(tzinfo=None) - lag
+
+
+def export_until(until: datetime | None) -> datetime:
+    """Get the upper bound of an export, capping a requested one at the watermark."""
+    watermark = export_watermark()
+    return watermark if until is None else min(until, watermark)
+
+
+def _parse_datetime(value: str) -> datetime:
+    """Parse an ISO timestamp, converting aware values to naive UTC."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(UTC).replace(tzinfo=None)
+    return parsed
+
+
+async def _export_to(out: io.BufferedIOBase, args: argparse.Namespace) -> datetime:
+    until = export_until(args.until)
+    try:
+        bet_status = BetStatus(args.status) if args.status else None
+        async for chunk in stream_export(
+            args.kind, args.format, args.since, until, bet_status, args.archived
+        ):
+            out.write(chunk)
+    finally:
+        await dispose_engine()
+    return until
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m mirustech.betting.export", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("kind", choices=EXPORT_KINDS)
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="ndjson")
+    parser.add_argument("--since", type=_parse_datetime, help="inclusive lower bound (UTC)")
+    parser.add_argument("--until", type=_parse_datetime, help="exclusive upper bound (UTC)")
+    parser.add_argument("--status", choices=[s.value for s in BetStatus])
+    parser.add_argument("--archived", action="store_true", help="export from the archive")
+    parser.add_argument("--output", "-o", help="output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    if args.output:
+        with open(args.output, "wb") as out:
+            until = asyncio.run(_export_to(out, args))
+    else:
+        until = asyncio.run(_export_to(sys.stdout.buffer, args))
+    # The watermark goes to stderr so stdout stays a clean data stream
+    print(f"watermark: {until.isoformat()}Z", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Logging pipeline keeping log output off the event loop.
+
+Log calls on the event loop only decide whether to keep an event and bind
+the request's context variables; the record is then put on a bounded queue
+and a ``QueueListener`` thread renders it as JSON and writes it. structlog
+events and standard library records, such as SQL echoed by SQLAlchemy in
+debug mode, share the pipeline.
+
+Events can be thinned by name before they cost anything else:
+``log_sample_rates`` keeps a share of an event, marking kept ones with their
+``sample_rate``, and ``log_rate_limits`` caps how many are logged per
+second. Records that arrive while the queue is full are dropped rather than
+blocking the loop. Every ``log_summary_interval_seconds`` a ``log_summary``
+event reports how many events were sampled out, rate limited or dropped.
+"""
+
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+import structlog
+from structlog.types import EventDict, WrappedLogger
+
+from mirustech.betting.config import get_settings
+from mirustech.betting.serialization import dumps
+
+SUMMARY_EVENT = "log_summary"
+
+logger = structlog.get_logger()
+
+
+def _render_json(event_dict: EventDict, **_: Any) -> str:
+    return dumps(event_dict).decode()
+
+
+def _add_timestamp(_logger: WrappedLogger, _name: str, event_dict: EventDict) -> EventDict:
+    """Stamp the time the record was created, not when the listener got to it."""
+    record: logging.LogRecord = event_dict["_record"]
+    event_dict["timestamp"] = (
+        time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+        + f".{int(record.msecs):03d}Z"
+    )
+    return event_dict
+
+
+def _add_record_context(_logger: WrappedLogger, _name: str, event_dict: EventDict) -> EventDict:
+    """Add the context variables captured with a standard library record."""
+    context = getattr(event_dict["_record"], "structlog_context", None)
+    if context:
+        event_dict.update(context)
+    return event_dict
+
+
+def _capture_exc_info(_logger: WrappedLogger, _name: str, event_dict: EventDict) -> EventDict:
+    """Resolve ``exc_info=True`` while the exception is still being handled."""
+    if event_dict.get("exc_info") is True:
+        event_dict["exc_info"] = sys.exc_info()
+    return event_dict
+
+
+class _TokenBucket:
+    """Allows ``rate`` events per second, in bursts of up to one second's worth."""
+
+    __slots__ = ("rate", "tokens", "updated")
+
+    def __init__(self, rate: float) -> None:
+        self.rate = rate
+        self.tokens = max(rate, 1.0)
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(max(self.rate, 1.0), self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """Queue handler that leaves formatting to the listener and never blocks."""
+
+    def __init__(self, records: queue.Queue[logging.LogRecord], dropped: Counter[str]) -> None:
+        super().__init__(records)
+        self.dropped = dropped
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # structlog events merged them already; capture them for other records
+        # while still in the task that logged them, e.g. to tag SQL with its trace
+        if not isinstance(record.msg, dict):
+            record.structlog_context = structlog.contextvars.get_contextvars()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # By event for structlog events, by logger for other records
+            name = record.msg.get("event") if isinstance(record.msg, dict) else None
+            self.dropped[str(name or record.name)] += 1
+
+
+class LogPipeline:
+    """The queue, listener thread, sampling and summaries of the app's logging."""
+
+    def __init__(self) -> None:
+        settings = get_settings()
+        self.sample_rates = dict(settings.log_sample_rates)
+        self.buckets = {
+            event: _TokenBucket(rate) for event, rate in settings.log_rate_limits.items()
+        }
+        self.sampled: Counter[str] = Counter()
+        self.rate_limited: Counter[str] = Counter()
+        self.dropped: Counter[str] = Counter()
+
+        formatter = structlog.stdlib.ProcessorFormatter(
+            foreign_pre_chain=[
+                structlog.stdlib.add_logger_name,
+                structlog.stdlib.add_log_level,
+                _add_record_context,
+            ],
+            processors=[
+                _add_timestamp,
+                structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+                structlog.processors.format_exc_info,
+                (
+                    structlog.dev.ConsoleRenderer()
+                    if settings.log_format == "console"
+                    else structlog.processors.JSONRenderer(serializer=_render_json)
+                ),
+            ],
+        )
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(formatter)
+        records: queue.Queue[logging.LogRecord] = queue.Queue(settings.log_queue_size)
+        self.handler = _DroppingQueueHandler(records, self.dropped)
+        self.listener = QueueListener(records, output)
+        self._stop = threading.Event()
+        self._summaries = threading.Thread(target=self._summarize, name="log-summary", daemon=True)
+
+    def filter(self, _logger: WrappedLogger, _name: str, event_dict: EventDict) -> EventDict:
+        """Drop events sampled out or over their rate limit, counting them."""
+        event = event_dict.get("event")
+        rate = self.sample_rates.get(event)
+        if rate is not None:
+            if random.random() >= rate:
+                self.sampled[event] += 1
+                raise structlog.DropEvent
+            event_dict["sample_rate"] = rate
+        bucket = self.buckets.get(event)
+        if bucket is not None and not bucket.take():
+            self.rate_limited[event] += 1
+            raise structlog.DropEvent
+        return event_dict
+
+    def start(self) -> None:
+        self.listener.start()
+        self._summaries.start()
+
+    def stop(self) -> None:
+        """Stop summarizing, report the last counts and flush the queue."""
+        self._stop.set()
+        self._summaries.join()
+        self._report()
+        self.listener.stop()
+
+    def _summarize(self) -> None:
+        interval = get_settings().log_summary_interval_seconds
+        while not self._stop.wait(interval):
+            self._report()
+
+    def _report(self) -> None:
+        counts = {}
+        for kind, counter in (
+            ("sampled", self.sampled),
+            ("rate_limited", self.rate_limited),
+            ("dropped", self.dropped),
+        ):
+            if counter:
+                # Another thread may add to a counter while it is copied; at worst
+                # an event is reported in the next summary or not at all
+                counts[kind] = dict(counter)
+                counter.clear()
+        if counts:
+            logger.info(SUMMARY_EVENT, **counts)
+
+
+_pipeline: LogPipeline | None = None
+
+
+def _filter(logger: WrappedLogger, name: str, event_dict: EventDict) -> EventDict:
+    # Loggers cache their processors, so the running pipeline is looked up per event
+    if _pipeline is None:
+        return event_dict
+    return _pipeline.filter(logger, name, event_dict)
+
+
+def configure_logging() -> None:
+    """Route structlog and standard library logging through a new pipeline.
+
+    Any previous pipeline is stopped first. SQL is logged when ``debug`` is set.
+    """
+    global _pipeline
+    shutdown_logging()
+    settings = get_settings()
+    pipeline = LogPipeline()
+
+    level = logging.getLevelName(settings.log_level.upper())
+    root = logging.getLogger()
+    root.addHandler(pipeline.handler)
+    root.setLevel(level)
+    # Logged at INFO through the pipeline, instead of the handler ``echo`` would add
+    logging.getLogger("sqlalchemy.engine").setLevel(
+        logging.INFO if settings.debug else logging.WARNING
+    )
+
+    structlog.configure(
+        processors=[
+            _filter,
+            _capture_exc_info,
+            structlog.contextvars.merge_contextvars,
+            structlog.processors.add_log_level,
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+        ],
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.make_filtering_bound_logger(level),
+        cache_logger_on_first_use=True,
+    )
+    pipeline.start()
+    _pipeline = pipeline
+
+
+def shutdown_logging() -> None:
+    """Flush and stop the pipeline, if running."""
+    global _pipeline
+    if _pipeline is not None:
+        _pipeline.stop()
+        logging.getLogger().removeHandler(_pipeline.handler)
+        _pipeline = None
@@ -1,15 +1,33 @@
 """FastAPI application for the office betting platform."""
 
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from typing import AsyncGenerator
 
 import structlog
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from mirustech.betting.config import settings
-from mirustech.betting.database import init_db
-from mirustech.betting.routers import auth_router, bets_router, leaderboard_router
+from mirustech.betting.compression import CompressionMiddleware
+from mirustech.betting.config import Settings, configure_settings, get_settings
+from mirustech.betting.database import async_session, dispose_engine, init_db
+from mirustech.betting.logs import configure_logging, shutdown_logging
+from mirustech.betting.maintenance import RequestGaugeMiddleware, run_maintenance
+from mirustech.betting.routers import (
+    admin_router,
+    auth_router,
+    bet_templates_router,
+    bets_router,
+    debug_router,
+    events_router,
+    leaderboard_router,
+    users_router,
+    wagers_router,
+)
+from mirustech.betting.serialization import FastJSONResponse
+from mirustech.betting.services.bet_book import get_bet_book
+from mirustech.betting.tenancy import TenantMiddleware
+from mirustech.betting.tracing import TracedRoute, TracingMiddleware
 
 logger = structlog.get_logger()
 
@@ -17,50 +35,93 @@ logger = structlog.get_logger()
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Application lifespan handler for startup/shutdown."""
+    configure_logging()
     logger.info("starting_application")
     await init_db()
     logger.info("database_initialized")
+    async with async_session() as db:
+        open_bets = await get_bet_book().rebuild(db)
+    logger.info("bet_book_rebuilt", open_bets=open_bets)
+    maintenance = asyncio.create_task(run_maintenance())
     yield
     logger.info("shutting_down_application")
+    maintenance.cancel()
+    with suppress(asyncio.CancelledError):
+        await maintenance
+    await dispose_engine()
+    shutdown_logging()
 
 
-app = FastAPI(
-    title="Office Betting Platform",
-    description=(
-        "A play-money pari-mutuel betting platform using OfficeCoins. "
-        "This application uses virtual play money only. No real money is wagered or paid out. "
-        "For entertainment purposes only."
-    ),
-    version="1.0.0",
-    lifespan=lifespan,
-)
-
-# CORS middleware for frontend
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:5173", "http://localhost:3000", "http://frontend:5173"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include routers
-app.include_router(auth_router)
-app.include_router(bets_router)
-app.include_router(leaderboard_router)
-
-
-@app.get("/api/health")
 async def health_check() -> dict[str, str]:
     """Health check endpoint."""
     return {"status": "healthy"}
 
 
-@app.get("/api/config")
 async def get_public_config() -> dict[str, int | float]:
     """Get public configuration values."""
+    settings = get_settings()
     return {
         "minimum_wager": settings.minimum_wager,
         "early_bet_bonus": settings.early_bet_bonus,
         "initial_balance": settings.initial_balance,
     }
+
+
+def create_app(settings: Settings | None = None) -> FastAPI:
+    """Create the application.
+
+    When ``settings`` is given it replaces the active settings; otherwise they
+    are loaded from the environment on first use. The database engine is only
+    created when the app starts.
+    """
+    if settings is not None:
+        configure_settings(settings)
+
+    app = FastAPI(
+        title="Office Betting Platform",
+        description=(
+            "A play-money pari-mutuel betting platform using OfficeCoins. "
+            "This application uses virtual play money only. No real money is wagered or paid out. "
+            "For entertainment purposes only."
+        ),
+        version="1.0.0",
+        lifespan=lifespan,
+        default_response_class=FastJSONResponse,
+    )
+    app.router.route_class = TracedRoute
+
+    # Innermost, so only requests that reach the app keep maintenance waiting
+    app.add_middleware(RequestGaugeMiddleware)
+    # Route requests to their office's database; CORS wraps it, so errors get CORS headers
+    app.add_middleware(TenantMiddleware)
+    app.add_middleware(CompressionMiddleware)
+    # Outside compression, so traces include it
+    app.add_middleware(TracingMiddleware)
+
+    # CORS middleware for frontend
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:5173", "http://localhost:3000", "http://frontend:5173"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Include routers
+    app.include_router(admin_router)
+    app.include_router(auth_router)
+    app.include_router(bet_templates_router)
+    app.include_router(bets_router)
+    app.include_router(debug_router)
+    app.include_router(events_router)
+    app.include_router(leaderboard_router)
+    app.include_router(users_router)
+    app.include_router(wagers_router)
+
+    app.add_api_route("/api/health", health_check, methods=["GET"])
+    app.add_api_route("/api/config", get_public_config, methods=["GET"])
+
+    return app
+
+
+app = create_app()
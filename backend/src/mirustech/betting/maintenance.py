@@ -0,0 +1,306 @@
+"""Scheduled maintenance of every database, run from the app lifespan.
+
+One scheduler task checks every ``maintenance_tick_seconds`` for due jobs and
+runs each against every database:
+
+- ``optimize``: ``PRAGMA optimize``, refreshing planner statistics of tables
+  whose contents changed enough to matter, with ``analysis_limit`` bounding
+  how much of each table ``ANALYZE`` reads.
+- ``checkpoint``: ``PRAGMA wal_checkpoint``, truncating the WAL when the app is
+  quiet and otherwise checkpointing passively, which never waits for readers
+  or writers, so the WAL stops growing during bursts.
+- ``vacuum``: ``PRAGMA incremental_vacuum``, returning up to
+  ``maintenance_vacuum_pages`` free pages to the file system.
+- ``integrity``: ``PRAGMA integrity_check``.
+- ``prune_events``: deletes events past their retention.
+- ``templates``: creates the bets of bet templates that have come due.
+- ``snapshot``: an online snapshot, when ``backup_interval_hours`` is set.
+
+The app is quiet when no request has been in flight for
+``maintenance_quiet_seconds``, as counted by ``RequestGauge``. Jobs that lock
+the database for long wait for a quiet moment, for up to one interval, then
+run anyway. Each run is logged as a ``maintenance_job`` event with its
+duration and status: ``ok``, ``throttled`` when it ran in a lighter form
+because the app was busy, ``skipped`` when it did not apply or was deferred,
+or ``failed``. The latest report of each job and database is kept for
+``/api/admin/maintenance``.
+"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Literal
+
+import structlog
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from mirustech.betting.backup import database_path, scheduled_snapshot
+from mirustech.betting.config import get_settings
+from mirustech.betting.database import current_tenant, get_engine
+from mirustech.betting.serialization import JSONDict
+from mirustech.betting.services.bet_templates import create_due_bets
+from mirustech.betting.services.events import prune_expired_events
+from mirustech.betting.tenancy import for_each_tenant
+
+logger = structlog.get_logger()
+
+JobStatus = Literal["ok", "throttled", "skipped", "failed"]
+
+# Rows ANALYZE samples per index when optimizing
+ANALYSIS_LIMIT = 400
+
+# PRAGMA optimize mask for long-lived connections: also check tables this connection never used
+_OPTIMIZE_ALL_TABLES = 0x10002
+
+
+class RequestGauge:
+    """Counts requests in flight and when the last one finished."""
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.last_finished = time.monotonic()
+
+    def is_quiet(self) -> bool:
+        idle = time.monotonic() - self.last_finished
+        return self.in_flight == 0 and idle >= get_settings().maintenance_quiet_seconds
+
+
+_gauge = RequestGauge()
+
+
+def get_request_gauge() -> RequestGauge:
+    """Get the process-wide count of requests in flight."""
+    return _gauge
+
+
+class RequestGaugeMiddleware:
+    """Count the requests in flight, for judging when the app is quiet."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        _gauge.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _gauge.in_flight -= 1
+            _gauge.last_finished = time.monotonic()
+
+
+async def _pragma(sql: str) -> list[tuple]:
+    """Run a pragma outside a transaction on the current database, reading every row."""
+    async with get_engine().connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        result = await conn.exec_driver_sql(sql)
+        return [tuple(row) for row in result.fetchall()] if result.returns_rows else []
+
+
+async def _pragma_to_completion(sql: str) -> None:
+    """Run a pragma that does its work one step at a time, such as ``incremental_vacuum``.
+
+    ``sqlite3`` steps statements without result columns only once, freeing one
+    page; ``executescript`` steps them until done.
+    """
+    async with get_engine().connect() as conn:
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.executescript(sql)
+
+
+async def optimize(quiet: bool) -> tuple[JobStatus, JSONDict]:
+    await _pragma(f"PRAGMA main.analysis_limit = {ANALYSIS_LIMIT}")
+    await _pragma(f"PRAGMA main.optimize = {_OPTIMIZE_ALL_TABLES}")
+    return "ok", {}
+
+
+async def checkpoint(quiet: bool) -> tuple[JobStatus, JSONDict]:
+    [(journal_mode,)] = await _pragma("PRAGMA main.journal_mode")
+    if journal_mode != "wal":
+        return "skipped", {"reason": f"journal mode is {journal_mode}"}
+    # Truncating waits for readers and writers; a passive checkpoint never does
+    mode = "TRUNCATE" if quiet else "PASSIVE"
+    [(busy, wal_pages, checkpointed)] = await _pragma(f"PRAGMA main.wal_checkpoint({mode})")
+    details = {"mode": mode, "wal_pages": wal_pages, "checkpointed": checkpointed}
+    if busy:
+        return "throttled", {**details, "reason": "busy"}
+    return ("ok" if quiet else "throttled"), details
+
+
+async def vacuum(quiet: bool) -> tuple[JobStatus, JSONDict]:
+    [(auto_vacuum,)] = await _pragma("PRAGMA main.auto_vacuum")
+    if auto_vacuum != 2:
+        # Existing databases switch over when compacted, e.g. by archive --compact
+        return "skipped", {"reason": "auto_vacuum is not incremental"}
+    [(free_before,)] = await _pragma("PRAGMA main.freelist_count")
+    if free_before:
+        pages = get_settings().maintenance_vacuum_pages
+        await _pragma_to_completion(f"PRAGMA main.incremental_vacuum({int(pages)})")
+    [(free_after,)] = await _pragma("PRAGMA main.freelist_count")
+    return "ok", {"freed_pages": free_before - free_after, "free_pages": free_after}
+
+
+async def integrity(quiet: bool) -> tuple[JobStatus, JSONDict]:
+    messages = [message for (message,) in await _pragma("PRAGMA main.integrity_check(20)")]
+    if messages != ["ok"]:
+        return "failed", {"problems": messages}
+    return "ok", {}
+
+
+async def prune_events(quiet: bool) -> tuple[JobStatus, JSONDict]:
+    return "ok", {"pruned": await prune_expired_events()}
+
+
+async def templates(quiet: bool) -> tuple[JobStatus, JSONDict]:
+    return "ok", {"created": await create_due_bets()}
+
+
+async def snapshot(quiet: bool) -> tuple[JobStatus, JSONDict]:
+    if database_path() is None:
+        return "skipped", {"reason": "not a database file"}
+    return "ok", await scheduled_snapshot()
+
+
+JobFunction = Callable[[bool], Awaitable[tuple[JobStatus, JSONDict]]]
+
+
+@dataclass
+class _Job:
+    name: str
+    interval: float  # Seconds; 0 disables the job
+    run: JobFunction
+    waits_for_quiet: bool = False
+    run_at_start: bool = False
+    next_run: float = 0.0
+    deferred_since: float | None = None
+
+
+@dataclass
+class JobReport:
+    """The outcome of one run of a job against one database."""
+
+    job: str
+    database: str
+    status: JobStatus
+    started_at: datetime
+    duration_ms: float
+    details: JSONDict = field(default_factory=dict)
+
+    def to_dict(self) -> JSONDict:
+        return {
+            "job": self.job,
+            "database": self.database,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            **self.details,
+        }
+
+
+_reports: dict[tuple[str, str], JobReport] = {}
+
+
+def get_job_reports() -> list[JobReport]:
+    """Get the latest report of each job on each database."""
+    return sorted(_reports.values(), key=lambda report: (report.job, report.database))
+
+
+def _jobs() -> list[_Job]:
+    settings = get_settings()
+    hour = 3600.0
+    return [
+        _Job("optimize", settings.maintenance_optimize_hours * hour, optimize, run_at_start=True),
+        _Job("checkpoint", settings.maintenance_checkpoint_seconds, checkpoint),
+        _Job("vacuum", settings.maintenance_vacuum_hours * hour, vacuum, waits_for_quiet=True),
+        _Job(
+            "integrity",
+            settings.maintenance_integrity_hours * hour,
+            integrity,
+            waits_for_quiet=True,
+        ),
+        _Job(
+            "prune_events",
+            settings.event_prune_interval_seconds,
+            prune_events,
+            run_at_start=True,
+        ),
+        _Job(
+            "templates",
+            settings.maintenance_templates_seconds,
+            templates,
+            run_at_start=True,
+        ),
+        _Job("snapshot", settings.backup_interval_hours * hour, snapshot),
+    ]
+
+
+def _record(report: JobReport) -> None:
+    _reports[report.job, report.database] = report
+    log = logger.error if report.status == "failed" else logger.info
+    log("maintenance_job", **report.to_dict())
+
+
+async def _run_on_database(job: _Job, quiet: bool) -> None:
+    started_at = datetime.now(UTC).replace(tzinfo=None)
+    started = time.perf_counter()
+    try:
+        status, details = await job.run(quiet)
+    except Exception as exc:
+        logger.exception("maintenance_job_error", job=job.name)
+        status, details = "failed", {"error": f"{type(exc).__name__}: {exc}"}
+    _record(
+        JobReport(
+            job.name,
+            current_tenant.get() or "main",
+            status,
+            started_at,
+            round((time.perf_counter() - started) * 1000, 3),
+            details,
+        )
+    )
+
+
+async def _run_due(job: _Job, now: float) -> None:
+    quiet = _gauge.is_quiet()
+    if job.waits_for_quiet and not quiet:
+        if job.deferred_since is None:
+            job.deferred_since = now
+            _record(
+                JobReport(
+                    job.name,
+                    "*",
+                    "skipped",
+                    datetime.now(UTC).replace(tzinfo=None),
+                    0.0,
+                    {"reason": "busy", "in_flight": _gauge.in_flight},
+                )
+            )
+        # Deferred for at most one interval, so constant load cannot starve it
+        if now - job.deferred_since < job.interval:
+            return
+    job.deferred_since = None
+    job.next_run = now + job.interval
+    await for_each_tenant(lambda: _run_on_database(job, quiet))
+
+
+async def run_maintenance() -> None:
+    """Run maintenance jobs on every database as they come due, until cancelled."""
+    settings = get_settings()
+    jobs = [job for job in _jobs() if job.interval > 0]
+    start = time.monotonic()
+    for job in jobs:
+        job.next_run = start if job.run_at_start else start + job.interval
+    while True:
+        now = time.monotonic()
+        for job in jobs:
+            if now >= job.next_run:
+                try:
+                    await _run_due(job, now)
+                except Exception:
+                    logger.exception("maintenance_failed", job=job.name)
+                    job.next_run = now + job.interval
+        await asyncio.sleep(settings.maintenance_tick_seconds)
@@ -0,0 +1,213 @@
+"""Schema versioning using SQLite's ``user_version`` pragma.
+
+Startup only reads the stored version, which is a single pragma query. Tables
+are created when the database is new, and migration steps run only when the
+stored version is behind ``SCHEMA_VERSION``.
+"""
+
+from collections.abc import Callable
+
+from sqlalchemy import (
+    Connection,
+    Integer,
+    Table,
+    cast,
+    delete,
+    func,
+    insert,
+    inspect,
+    literal,
+    select,
+    text,
+    union_all,
+)
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql import Select
+
+import mirustech.betting.models  # noqa: F401  # Register all tables on Base.metadata
+from mirustech.betting.database import ARCHIVE_SCHEMA, Base, archive_enabled
+from mirustech.betting.models import (
+    Bet,
+    BetStatus,
+    BetTemplate,
+    Event,
+    Outcome,
+    UserDailyStats,
+    Wager,
+)
+from mirustech.betting.models.wager import WEIGHT_SCALE
+from mirustech.betting.search import create_search_index
+
+SCHEMA_VERSION = 10
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl: str) -> None:
+    """Add a column unless it already exists."""
+    existing = {c["name"] for c in inspect(conn).get_columns(table)}
+    if column not in existing:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def _add_bet_version(conn: Connection) -> None:
+    _add_column(conn, "bets", "version", "INTEGER NOT NULL DEFAULT 0")
+
+
+def _add_export_watermarks(conn: Connection) -> None:
+    _add_column(conn, "bets", "resolved_at", "DATETIME")
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_bets_resolved_at ON bets (resolved_at)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_wagers_created_at ON wagers (created_at)"))
+
+
+# Converts float weights to integer weighted stakes, also used for archived wagers
+WEIGHTED_STAKE_SQL = f"CAST(ROUND(amount * weight * {WEIGHT_SCALE}) AS INTEGER)"
+
+
+def _add_weighted_stakes(conn: Connection) -> None:
+    _add_column(conn, "wagers", "weighted_stake", "INTEGER NOT NULL DEFAULT 0")
+    conn.execute(text(f"UPDATE wagers SET weighted_stake = {WEIGHTED_STAKE_SQL}"))
+
+
+def _add_events(conn: Connection) -> None:
+    Base.metadata.create_all(conn, tables=[Event.__table__])
+
+
+# Computes a bet's wager totals for the bet being updated; ``{schema}`` selects
+# the database, so archived bets are filled from archived wagers
+BET_TOTAL_SQL = (
+    "(SELECT {aggregate} FROM {schema}.wagers AS w"
+    " JOIN {schema}.outcomes AS o ON o.id = w.outcome_id WHERE o.bet_id = bets.id)"
+)
+BET_TOTALS = {"pool": "coalesce(sum(w.amount), 0)", "wager_count": "count(w.id)"}
+
+
+def _add_bet_totals(conn: Connection) -> None:
+    for column, aggregate in BET_TOTALS.items():
+        _add_column(conn, "bets", column, "INTEGER NOT NULL DEFAULT 0")
+        total = BET_TOTAL_SQL.format(aggregate=aggregate, schema="main")
+        conn.execute(text(f"UPDATE bets SET {column} = {total}"))
+    for model in (Bet, Outcome, Wager):
+        for index in model.__table__.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def _daily_stats_rows(bets: Table, outcomes: Table, wagers: Table) -> list[Select]:
+    """Select each wager's stake on its placement day and its settlement on its resolution day."""
+    zero = literal(0)
+    placed = select(
+        wagers.c.user_id,
+        func.date(wagers.c.created_at).label("day"),
+        wagers.c.amount.label("staked"),
+        zero.label("settled_stake"),
+        zero.label("payout"),
+    )
+    settled = (
+        select(
+            wagers.c.user_id,
+            # Bets resolved before resolved_at existed count on their close day
+            func.date(func.coalesce(bets.c.resolved_at, bets.c.close_time)),
+            zero,
+            wagers.c.amount,
+            cast(func.coalesce(wagers.c.payout, 0), Integer),
+        )
+        .join(outcomes, outcomes.c.id == wagers.c.outcome_id)
+        .join(bets, bets.c.id == outcomes.c.bet_id)
+        .where(bets.c.status == BetStatus.RESOLVED)
+    )
+    return [placed, settled]
+
+
+def _add_daily_stats(conn: Connection) -> None:
+    stats = UserDailyStats.__table__
+    stats.create(conn, checkfirst=True)
+    for index in stats.indexes:
+        index.create(conn, checkfirst=True)
+    rows = _daily_stats_rows(Bet.__table__, Outcome.__table__, Wager.__table__)
+    if archive_enabled() and inspect(conn).has_table("wagers", schema=ARCHIVE_SCHEMA):
+        from mirustech.betting.archive import archived_bets, archived_outcomes, archived_wagers
+
+        rows += _daily_stats_rows(archived_bets, archived_outcomes, archived_wagers)
+    combined = union_all(*rows).subquery()
+    conn.execute(delete(stats))
+    conn.execute(
+        insert(stats).from_select(
+            ["user_id", "day", "staked", "settled_stake", "payout"],
+            select(
+                combined.c.user_id,
+                combined.c.day,
+                func.sum(combined.c.staked),
+                func.sum(combined.c.settled_stake),
+                func.sum(combined.c.payout),
+            ).group_by(combined.c.user_id, combined.c.day),
+        )
+    )
+
+
+def _add_bet_templates(conn: Connection) -> None:
+    Base.metadata.create_all(conn, tables=[BetTemplate.__table__])
+
+
+def _add_wager_stakes_index(conn: Connection) -> None:
+    for index in Wager.__table__.indexes:
+        index.create(conn, checkfirst=True)
+
+
+# Migration steps keyed by the version they upgrade to. Steps must be idempotent,
+# because databases created before versioning run every step once.
+MIGRATIONS: dict[int, Callable[[Connection], None]] = {
+    2: _add_bet_version,
+    3: _add_export_watermarks,
+    4: create_search_index,
+    5: _add_weighted_stakes,
+    6: _add_events,
+    7: _add_bet_totals,
+    8: _add_daily_stats,
+    9: _add_bet_templates,
+    10: _add_wager_stakes_index,
+}
+
+
+def get_schema_version(conn: Connection) -> int:
+    """Read the schema version stored in the database."""
+    return int(conn.exec_driver_sql("PRAGMA user_version").scalar_one())
+
+
+def _set_schema_version(conn: Connection, version: int) -> None:
+    conn.exec_driver_sql(f"PRAGMA user_version = {int(version)}")
+
+
+def upgrade(conn: Connection) -> None:
+    """Create or migrate the schema to ``SCHEMA_VERSION``."""
+    version = get_schema_version(conn)
+    if version == SCHEMA_VERSION:
+        return
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Database schema version {version} is newer than supported version {SCHEMA_VERSION}"
+        )
+
+    if version == 0:
+        # A new database, or one created before schema versioning existed
+        legacy = inspect(conn).has_table("users")
+        Base.metadata.create_all(conn)
+        if legacy:
+            steps = range(2, SCHEMA_VERSION + 1)
+        else:
+            # Objects create_all does not know about
+            create_search_index(conn)
+            steps = range(0)
+    else:
+        steps = range(version + 1, SCHEMA_VERSION + 1)
+
+    for step in steps:
+        MIGRATIONS[step](conn)
+    _set_schema_version(conn, SCHEMA_VERSION)
+
+
+async def ensure_schema(engine: AsyncEngine) -> None:
+    """Bring the database schema up to date."""
+    async with engine.begin() as conn:
+        await conn.run_sync(upgrade)
+        if archive_enabled():
+            from mirustech.betting.archive import upgrade_archive
+
+            await conn.run_sync(upgrade_archive)
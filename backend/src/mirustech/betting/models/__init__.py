@@ -1,8 +1,22 @@
 """SQLAlchemy models for the betting platform."""
 
 from mirustech.betting.models.bet import Bet, BetStatus
+from mirustech.betting.models.bet_template import BetTemplate
+from mirustech.betting.models.event import Event
+from mirustech.betting.models.odds_history import OddsHistory
 from mirustech.betting.models.outcome import Outcome
 from mirustech.betting.models.user import User
+from mirustech.betting.models.user_stats import UserDailyStats
 from mirustech.betting.models.wager import Wager
 
-__all__ = ["User", "Bet", "BetStatus", "Outcome", "Wager"]
+__all__ = [
+    "User",
+    "Bet",
+    "BetStatus",
+    "BetTemplate",
+    "Outcome",
+    "Wager",
+    "OddsHistory",
+    "Event",
+    "UserDailyStats",
+]
@@ -4,7 +4,7 @@ import enum
 from datetime import UTC, datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Enum, ForeignKey, String, Text
+from sqlalchemy import Enum, ForeignKey, Index, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from mirustech.betting.database import Base
@@ -26,6 +26,15 @@ class Bet(Base):
     """A betting event with multiple outcomes."""
 
     __tablename__ = "bets"
+    # Each listing sort is a range scan of one index; SQLite appends the id to
+    # every index, which breaks ties
+    __table_args__ = (
+        Index("ix_bets_status_close_time", "status", "close_time"),
+        Index("ix_bets_status_created_at", "status", "created_at"),
+        Index("ix_bets_status_pool", "status", "pool"),
+        Index("ix_bets_status_wager_count", "status", "wager_count"),
+        Index("ix_bets_creator_id_created_at", "creator_id", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     creator_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
@@ -35,6 +44,11 @@ class Bet(Base):
     status: Mapped[BetStatus] = mapped_column(Enum(BetStatus), default=BetStatus.OPEN)
     winning_outcome_id: Mapped[int | None] = mapped_column(ForeignKey("outcomes.id"), nullable=True)
     created_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(UTC).replace(tzinfo=None))
+    version: Mapped[int] = mapped_column(default=0)  # Bumped on every wager, close and resolve
+    resolved_at: Mapped[datetime | None] = mapped_column(nullable=True, index=True)
+    # Totals over all wagers, kept current by every wager for sorting listings
+    pool: Mapped[int] = mapped_column(default=0)
+    wager_count: Mapped[int] = mapped_column(default=0)
 
     # Relationships
     creator: Mapped["User"] = relationship(back_populates="bets_created")
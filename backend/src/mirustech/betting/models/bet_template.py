@@ -0,0 +1,34 @@
+"""Bet template model for bets asked again on a schedule."""
+
+from datetime import UTC, datetime
+
+from sqlalchemy import JSON, ForeignKey, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from mirustech.betting.database import Base
+
+
+class BetTemplate(Base):
+    """A bet created again every ``interval_seconds``, such as a weekly standup prediction.
+
+    Occurrence ``n`` (from 0) closes at ``first_close_time + n * interval`` and
+    is created once the one before it closes, so one is open at a time. A
+    title may contain ``{n}``, the occurrence's number from 1, and ``{date}``,
+    its close date. ``next_occurrence`` is the number of the next one to
+    create; without ``occurrences`` the series never ends.
+    """
+
+    __tablename__ = "bet_templates"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    creator_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
+    title: Mapped[str] = mapped_column(String(200))
+    description: Mapped[str] = mapped_column(Text, default="")
+    outcomes: Mapped[list[str]] = mapped_column(JSON)
+    first_close_time: Mapped[datetime] = mapped_column()
+    interval_seconds: Mapped[int] = mapped_column()
+    occurrences: Mapped[int | None] = mapped_column(nullable=True)
+    next_occurrence: Mapped[int] = mapped_column(default=0)
+    created_at: Mapped[datetime] = mapped_column(
+        default=lambda: datetime.now(UTC).replace(tzinfo=None)
+    )
@@ -0,0 +1,28 @@
+"""Event model for the outbox of bet and wager changes."""
+
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy import JSON, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from mirustech.betting.database import Base
+
+
+class Event(Base):
+    """A change appended in the same transaction as the write it describes.
+
+    ``seq`` uses AUTOINCREMENT so sequence numbers are never reused once old
+    events are pruned, and consumers can resume from the last one they saw.
+    """
+
+    __tablename__ = "events"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq: Mapped[int] = mapped_column(primary_key=True)
+    type: Mapped[str] = mapped_column(String(32))  # e.g. "bet.created", "wager.placed"
+    bet_id: Mapped[int] = mapped_column()
+    payload: Mapped[dict[str, Any]] = mapped_column(JSON, default=dict)
+    created_at: Mapped[datetime] = mapped_column(
+        default=lambda: datetime.now(UTC).replace(tzinfo=None), index=True
+    )
@@ -0,0 +1,27 @@
+"""Odds history model storing a packed time series of odds per bet."""
+
+from datetime import UTC, datetime
+
+from sqlalchemy import ForeignKey, LargeBinary
+from sqlalchemy.orm import Mapped, mapped_column
+
+from mirustech.betting.database import Base
+
+
+class OddsHistory(Base):
+    """Packed odds snapshots for a bet, one row per bet.
+
+    ``outcome_ids`` is a packed array of signed 64-bit outcome ids and ``samples``
+    a packed array of doubles laid out as ``[timestamp, odds_1, ..., odds_n]``
+    per snapshot, in the same outcome order.
+    """
+
+    __tablename__ = "odds_history"
+
+    bet_id: Mapped[int] = mapped_column(ForeignKey("bets.id"), primary_key=True)
+    outcome_ids: Mapped[bytes] = mapped_column(LargeBinary)
+    samples: Mapped[bytes] = mapped_column(LargeBinary, default=b"")
+    updated_at: Mapped[datetime] = mapped_column(
+        default=lambda: datetime.now(UTC).replace(tzinfo=None),
+        onupdate=lambda: datetime.now(UTC).replace(tzinfo=None),
+    )
@@ -6,6 +6,7 @@ from sqlalchemy import ForeignKey, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from mirustech.betting.database import Base
+from mirustech.betting.models.wager import WEIGHT_SCALE
 
 if TYPE_CHECKING:
     from mirustech.betting.models.bet import Bet
@@ -18,7 +19,7 @@ class Outcome(Base):
     __tablename__ = "outcomes"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    bet_id: Mapped[int] = mapped_column(ForeignKey("bets.id"))
+    bet_id: Mapped[int] = mapped_column(ForeignKey("bets.id"), index=True)
     name: Mapped[str] = mapped_column(String(100))
 
     # Relationships
@@ -33,4 +34,4 @@ class Outcome(Base):
     @property
     def weighted_total(self) -> float:
         """Sum of weighted wagers on this outcome."""
-        return sum(wager.amount * wager.weight for wager in self.wagers)
+        return sum(wager.weighted_stake for wager in self.wagers) / WEIGHT_SCALE
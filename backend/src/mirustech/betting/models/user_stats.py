@@ -0,0 +1,30 @@
+"""Daily per-user wagering totals backing the time-windowed leaderboards."""
+
+from datetime import date
+
+from sqlalchemy import ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from mirustech.betting.database import Base
+
+
+class UserDailyStats(Base):
+    """A user's stakes and payouts for one UTC day.
+
+    Stakes count on the day they are placed; profit counts on the day the bet
+    is resolved, as the winnings paid that day minus the stakes of the wagers
+    settled that day, so open wagers never count as losses.
+    """
+
+    __tablename__ = "user_daily_stats"
+    # Windows read only this index: a range of days, then sums per user
+    __table_args__ = (
+        Index("ix_user_daily_stats_day", "day", "user_id", "staked", "settled_stake", "payout"),
+    )
+
+    # Day first, so windows are a range of the key rather than a scan of every user
+    day: Mapped[date] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    staked: Mapped[int] = mapped_column(default=0)  # Placed that day
+    settled_stake: Mapped[int] = mapped_column(default=0)  # Of wagers resolved that day
+    payout: Mapped[int] = mapped_column(default=0)  # Paid out that day
@@ -3,7 +3,7 @@
 from datetime import UTC, datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from mirustech.betting.database import Base
@@ -13,18 +13,37 @@ if TYPE_CHECKING:
     from mirustech.betting.models.user import User
 
 
+# Weighted stakes are stored as integers in thousandths of a coin, so pool
+# aggregates are exact integer sums
+WEIGHT_SCALE = 1000
+
+
+def to_weighted_stake(amount: int, weight: float) -> int:
+    """Convert an amount and weight to an integer weighted stake."""
+    return amount * round(weight * WEIGHT_SCALE)
+
+
 class Wager(Base):
     """A wager placed by a user on a specific outcome."""
 
     __tablename__ = "wagers"
+    __table_args__ = (
+        # Finds the bets a user wagered on without reading other users' wagers
+        Index("ix_wagers_user_id_outcome_id", "user_id", "outcome_id"),
+        # Reads a bet's stakes, e.g. to settle or preview it, from the index alone
+        Index("ix_wagers_outcome_id_stakes", "outcome_id", "user_id", "weighted_stake", "amount"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     outcome_id: Mapped[int] = mapped_column(ForeignKey("outcomes.id"))
     amount: Mapped[int] = mapped_column()  # Amount in OfficeCoins
     weight: Mapped[float] = mapped_column(default=1.0)  # 1.0 or 1.2 for early bets
+    weighted_stake: Mapped[int] = mapped_column(default=0)  # amount * weight in WEIGHT_SCALE units
     payout: Mapped[float | None] = mapped_column(nullable=True)  # Set after resolution
-    created_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(UTC).replace(tzinfo=None))
+    created_at: Mapped[datetime] = mapped_column(
+        default=lambda: datetime.now(UTC).replace(tzinfo=None), index=True
+    )
 
     # Relationships
     user: Mapped["User"] = relationship(back_populates="wagers")
@@ -0,0 +1,197 @@
+"""Statistical sampling profiler for live workers.
+
+A background thread wakes every ``interval`` seconds, reads the current stack
+of every other thread with ``sys._current_frames()`` and counts each distinct
+stack. Samples are cheap: frames are collected as tuples of code objects and
+only formatted once the profile ends, and stacks are cut at ``MAX_DEPTH``
+frames, so the cost is bounded by the sampling rate rather than by traffic.
+
+Each stack is rooted at its thread's role: ``event-loop``, ``db-worker``
+(aiosqlite connection threads), ``thread-pool`` or the thread's name. Event
+loop samples are also attributed to the route of the task running at that
+instant, read from the task's context, so time spent in shared code such as
+the ORM is charged to the request that caused it. The result is in the
+collapsed-stack format flamegraph tools read: one ``frame;frame;... count``
+line per stack.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from types import CodeType, FrameType
+
+from mirustech.betting.serialization import JSONDict
+from mirustech.betting.tracing import trace_name_of
+
+# Bounds keeping a profile safe under live traffic
+MAX_SECONDS = 60.0
+MIN_INTERVAL = 0.001
+MAX_DEPTH = 128
+
+_IDLE = "(idle)"
+
+
+@dataclass
+class Profile:
+    """Stack sample counts collected over one profiling run."""
+
+    interval: float
+    duration: float = 0.0
+    samples: int = 0
+    sampling_time: float = 0.0
+    stacks: Counter[tuple[str, str, tuple[CodeType, ...], int]] = field(default_factory=Counter)
+
+    def collapsed(self) -> str:
+        """Render the stacks as ``root;route;frame;... count`` lines, most sampled first."""
+        labels: dict[CodeType, str] = {}
+        lines = []
+        for (role, route, codes, line), count in self.stacks.most_common():
+            frames = [role, route] if route else [role]
+            for code in codes[:-1]:
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = _frame_label(code)
+                frames.append(label)
+            # The innermost line tells e.g. a worker waiting for work from one running a query
+            frames.append(_frame_label(codes[-1], line))
+            lines.append(f"{';'.join(frames)} {count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def summary(self) -> JSONDict:
+        """Summarize the samples per thread role and per route."""
+        roles: Counter[str] = Counter()
+        routes: Counter[str] = Counter()
+        for (role, route, _, _), count in self.stacks.items():
+            roles[role] += count
+            if route:
+                routes[route] += count
+        return {
+            "duration_seconds": round(self.duration, 3),
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            # Share of the sampled period spent taking samples
+            "overhead": round(self.sampling_time / self.duration, 4) if self.duration else 0.0,
+            "threads": dict(roles.most_common()),
+            "routes": dict(routes.most_common()),
+        }
+
+
+def _frame_label(code: CodeType, line: int | None = None) -> str:
+    filename = code.co_filename
+    for marker in ("site-packages/", "/src/", "/lib/python"):
+        _, found, rest = filename.rpartition(marker)
+        if found:
+            filename = rest
+            break
+    location = filename if line is None else f"{filename}:{line}"
+    return f"{code.co_qualname} ({location})"
+
+
+def _thread_role(thread: threading.Thread | None, loop_thread_id: int, thread_id: int) -> str:
+    if thread_id == loop_thread_id:
+        return "event-loop"
+    name = thread.name if thread is not None else str(thread_id)
+    if name.endswith("(_connection_worker_thread)"):
+        return "db-worker"
+    if name.startswith(("asyncio_", "AnyIO worker")):
+        return "thread-pool"
+    return name
+
+
+def _running_route(loop: asyncio.AbstractEventLoop) -> str:
+    """Get the route of the task the loop is running, read from another thread."""
+    task = asyncio.current_task(loop)
+    if task is None:
+        return _IDLE
+    return trace_name_of(task.get_context()) or task.get_name()
+
+
+def _stack(frame: FrameType) -> tuple[tuple[CodeType, ...], int]:
+    """Get the code objects of a stack, outermost first, and the innermost line."""
+    line = frame.f_lineno
+    codes = []
+    current: FrameType | None = frame
+    while current is not None and len(codes) < MAX_DEPTH:
+        codes.append(current.f_code)
+        current = current.f_back
+    codes.reverse()
+    return tuple(codes), line
+
+
+def sample(
+    loop: asyncio.AbstractEventLoop,
+    loop_thread_id: int,
+    seconds: float,
+    interval: float,
+    stop: threading.Event | None = None,
+) -> Profile:
+    """Sample every other thread's stack for ``seconds``, blocking the calling thread.
+
+    ``loop`` runs on the thread ``loop_thread_id``, whose samples are attributed
+    to routes; run this in a worker thread, never on the loop itself. Setting
+    ``stop`` ends the profile early.
+    """
+    stop = stop or threading.Event()
+    seconds = min(seconds, MAX_SECONDS)
+    interval = max(interval, MIN_INTERVAL)
+    own_id = threading.get_ident()
+    profile = Profile(interval)
+
+    started = time.perf_counter()
+    deadline = started + seconds
+    next_sample = started
+    while (now := time.perf_counter()) < deadline and not stop.is_set():
+        threads = {thread.ident: thread for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            role = _thread_role(threads.get(thread_id), loop_thread_id, thread_id)
+            route = _running_route(loop) if role == "event-loop" else ""
+            profile.stacks[(role, route, *_stack(frame))] += 1
+        profile.samples += 1
+        profile.sampling_time += time.perf_counter() - now
+        next_sample += interval
+        stop.wait(max(0.0, next_sample - time.perf_counter()))
+    profile.duration = time.perf_counter() - started
+    return profile
+
+
+_running = threading.Lock()
+
+
+async def profile_process(seconds: float, interval: float) -> Profile | None:
+    """Profile this process from a worker thread, or None if a profile is already running."""
+    if not _running.acquire(blocking=False):
+        return None
+    loop = asyncio.get_running_loop()
+    loop_thread_id = threading.get_ident()
+    stop = threading.Event()
+    result: Future[Profile] = Future()
+
+    def run() -> None:
+        try:
+            result.set_result(sample(loop, loop_thread_id, seconds, interval, stop))
+        except BaseException as exc:
+            result.set_exception(exc)
+        finally:
+            # Released by the sampler itself, so a profile never starts while it runs
+            _running.release()
+
+    sampler = threading.Thread(target=run, name="profiler", daemon=True)
+    try:
+        sampler.start()
+    except BaseException:
+        _running.release()
+        raise
+    try:
+        await asyncio.to_thread(sampler.join)
+    finally:
+        # Stops the sampler if the request is cancelled, e.g. by the client
+        # disconnecting, and waits for it to exit
+        stop.set()
+        await asyncio.to_thread(sampler.join)
+    return result.result()
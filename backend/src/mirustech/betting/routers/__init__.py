@@ -1,7 +1,23 @@
 """API routers for the betting platform."""
 
+from mirustech.betting.routers.admin import router as admin_router
 from mirustech.betting.routers.auth import router as auth_router
+from mirustech.betting.routers.bet_templates import router as bet_templates_router
 from mirustech.betting.routers.bets import router as bets_router
+from mirustech.betting.routers.debug import router as debug_router
+from mirustech.betting.routers.events import router as events_router
 from mirustech.betting.routers.leaderboard import router as leaderboard_router
+from mirustech.betting.routers.users import router as users_router
+from mirustech.betting.routers.wagers import router as wagers_router
 
-__all__ = ["auth_router", "bets_router", "leaderboard_router"]
+__all__ = [
+    "admin_router",
+    "auth_router",
+    "bet_templates_router",
+    "bets_router",
+    "debug_router",
+    "events_router",
+    "leaderboard_router",
+    "users_router",
+    "wagers_router",
+]
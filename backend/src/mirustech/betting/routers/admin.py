@@ -0,0 +1,208 @@
+"""Admin routes for bulk data export, archival, backups, maintenance, the bet book and offices."""
+
+import asyncio
+from datetime import UTC, datetime, timedelta
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from mirustech.betting.archive import archive_resolved_bets, compact
+from mirustech.betting.backup import (
+    SnapshotInProgressError,
+    backup_directory,
+    create_snapshot,
+    database_name,
+    database_path,
+    list_snapshots,
+    verify_snapshot,
+)
+from mirustech.betting.database import archive_enabled, get_db
+from mirustech.betting.export import EXPORT_FORMATS, export_until, stream_export
+from mirustech.betting.maintenance import get_job_reports
+from mirustech.betting.models import BetStatus, User
+from mirustech.betting.serialization import JSONDict
+from mirustech.betting.services.auth import get_admin_user, get_platform_admin
+from mirustech.betting.services.bet_book import get_bet_book
+from mirustech.betting.tenancy import (
+    for_each_tenant,
+    is_valid_tenant,
+    migrate_tenants,
+    provision_tenant,
+    summarize_tenant,
+    tenancy_enabled,
+)
+from mirustech.betting.tracing import TracedRoute
+
+router = APIRouter(prefix="/api/admin", tags=["admin"], route_class=TracedRoute)
+
+
+@router.get("/export/{kind}")
+async def export_data(
+    kind: Literal["bets", "outcomes", "wagers", "payouts"],
+    _admin: Annotated[User, Depends(get_admin_user)],
+    format: Literal["ndjson", "csv"] = "ndjson",
+    since: Annotated[datetime | None, Query(description="Inclusive lower bound (UTC)")] = None,
+    until: Annotated[datetime | None, Query(description="Exclusive upper bound (UTC)")] = None,
+    status: BetStatus | None = None,
+    archived: bool = False,
+) -> StreamingResponse:
+    """Stream an export of bets, outcomes, wagers or payouts.
+
+    The ``X-Export-Watermark`` header holds the exclusive upper bound of the
+    export, which trails now by ``export_watermark_lag_seconds`` so rows still
+    being written are not skipped; pass it as ``since`` on the next pull to
+    fetch only newer rows.
+    """
+    if since is not None and since.tzinfo is not None:
+        since = since.astimezone(UTC).replace(tzinfo=None)
+    if until is not None and until.tzinfo is not None:
+        until = until.astimezone(UTC).replace(tzinfo=None)
+    until = export_until(until)
+    return StreamingResponse(
+        stream_export(kind, format, since, until, status, archived),
+        media_type=EXPORT_FORMATS[format],
+        headers={
+            "X-Export-Watermark": until.isoformat() + "Z",
+            "Content-Disposition": f'attachment; filename="{kind}.{format}"',
+        },
+    )
+
+
+@router.post("/archive")
+async def archive_bets(
+    _admin: Annotated[User, Depends(get_admin_user)],
+    older_than_days: Annotated[float | None, Query(ge=0)] = None,
+    compact_database: Annotated[bool, Query(alias="compact")] = False,
+) -> dict[str, int | bool]:
+    """Move old resolved bets to the archive database, optionally compacting afterwards."""
+    if not archive_enabled():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Archiving requires a file-based SQLite database",
+        )
+    older_than = timedelta(days=older_than_days) if older_than_days is not None else None
+    archived = await archive_resolved_bets(older_than)
+    if compact_database:
+        await compact()
+    return {"archived": archived, "compacted": compact_database}
+
+
+def _require_snapshots() -> None:
+    if database_path() is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Snapshots require a file-based SQLite database",
+        )
+
+
+@router.post("/backups", status_code=status.HTTP_201_CREATED)
+async def create_backup(
+    _admin: Annotated[User, Depends(get_admin_user)],
+    compress: bool | None = None,
+) -> JSONDict:
+    """Snapshot the database online, without blocking writers.
+
+    ``compress`` defaults to ``backup_compress``. Returns the snapshot's manifest.
+    """
+    _require_snapshots()
+    try:
+        snapshot = await create_snapshot(compress)
+    except SnapshotInProgressError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A snapshot is already being taken",
+        ) from None
+    return snapshot.to_dict()
+
+
+@router.get("/backups")
+async def list_backups(
+    _admin: Annotated[User, Depends(get_admin_user)],
+) -> list[JSONDict]:
+    """List the database's snapshots, newest first."""
+    _require_snapshots()
+    snapshots = await asyncio.to_thread(list_snapshots, backup_directory(), database_name())
+    return [snapshot.to_dict() for snapshot in snapshots]
+
+
+@router.post("/backups/{name}/verify")
+async def verify_backup(
+    name: str,
+    _admin: Annotated[User, Depends(get_admin_user)],
+) -> JSONDict:
+    """Check a snapshot's checksum, integrity and row counts against its manifest."""
+    _require_snapshots()
+    snapshots = await asyncio.to_thread(list_snapshots, backup_directory(), database_name())
+    snapshot = next((snapshot for snapshot in snapshots if snapshot.name == name), None)
+    if snapshot is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Snapshot not found",
+        )
+    problems = await asyncio.to_thread(verify_snapshot, snapshot)
+    return {"name": name, "ok": not problems, "problems": problems}
+
+
+@router.get("/maintenance")
+async def list_maintenance_jobs(
+    _admin: Annotated[User, Depends(get_platform_admin)],
+) -> list[JSONDict]:
+    """Get the latest run of each maintenance job on each database."""
+    return [report.to_dict() for report in get_job_reports()]
+
+
+@router.get("/bet-book")
+async def check_bet_book(
+    _admin: Annotated[User, Depends(get_admin_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> dict[str, object]:
+    """Compare the in-memory bet book against the database, repairing stale entries.
+
+    Reads every open bet's wagers, so it is for admins rather than health probes.
+    """
+    report = await get_bet_book().check_consistency(db)
+    return {"status": "inconsistent" if report["mismatched"] else "consistent", **report}
+
+
+def _require_tenancy() -> None:
+    if not tenancy_enabled():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Tenancy is not enabled",
+        )
+
+
+@router.get("/offices")
+async def list_offices(
+    _admin: Annotated[User, Depends(get_platform_admin)],
+) -> list[dict[str, int | str]]:
+    """Summarize every office, querying their databases concurrently."""
+    _require_tenancy()
+    summaries = await for_each_tenant(summarize_tenant, include_main=False)
+    return [{"office": office, **summary} for office, summary in summaries.items()]
+
+
+@router.post("/offices/{office}", status_code=status.HTTP_201_CREATED)
+async def provision_office(
+    office: str,
+    _admin: Annotated[User, Depends(get_platform_admin)],
+) -> dict[str, str | bool]:
+    """Create an office's database; existing offices are only migrated."""
+    _require_tenancy()
+    if not is_valid_tenant(office):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Office ids are lowercase letters, digits and dashes",
+        )
+    created = await provision_tenant(office)
+    return {"office": office, "created": created}
+
+
+@router.post("/migrate")
+async def migrate_offices(
+    _admin: Annotated[User, Depends(get_platform_admin)],
+) -> dict[str, int]:
+    """Bring the main and every office database up to date concurrently."""
+    return {"migrated": await migrate_tenants()}
@@ -1,5 +1,6 @@
 """Authentication routes for login, registration, and user info."""
 
+import asyncio
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -7,25 +8,38 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from mirustech.betting.config import settings
-from mirustech.betting.database import get_db
+from mirustech.betting.config import get_settings
+from mirustech.betting.database import current_tenant, get_db
 from mirustech.betting.models import User
 from mirustech.betting.schemas import Token, UserCreate, UserResponse
+from mirustech.betting.serialization import FastJSONResponse, JSONDict
 from mirustech.betting.services.auth import (
     authenticate_user,
     create_access_token,
     get_current_user,
     get_password_hash,
 )
+from mirustech.betting.tenancy import TENANT_CLAIM
+from mirustech.betting.tracing import TracedRoute
 
-router = APIRouter(prefix="/api/auth", tags=["auth"])
+router = APIRouter(prefix="/api/auth", tags=["auth"], route_class=TracedRoute)
+
+
+def _to_user_response(user: User) -> JSONDict:
+    """Convert a user to ``UserResponse`` format."""
+    return {
+        "id": user.id,
+        "username": user.username,
+        "balance": user.balance,
+        "created_at": user.created_at,
+    }
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     data: UserCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
-) -> User:
+) -> FastJSONResponse:
     """Register a new user with initial OfficeCoins balance."""
     # Check if username exists
     result = await db.execute(select(User).where(User.username == data.username))
@@ -37,12 +51,12 @@ async def register(
 
     user = User(
         username=data.username,
-        password_hash=get_password_hash(data.password),
-        balance=settings.initial_balance,
+        password_hash=await asyncio.to_thread(get_password_hash, data.password),
+        balance=get_settings().initial_balance,
     )
     db.add(user)
     await db.flush()
-    return user
+    return FastJSONResponse(_to_user_response(user), status_code=status.HTTP_201_CREATED)
 
 
 @router.post("/login", response_model=Token)
@@ -59,13 +73,18 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token = create_access_token(data={"sub": str(user.id)})
+    # The office claim routes the holder's requests to this office's database
+    claims = {"sub": str(user.id)}
+    tenant = current_tenant.get()
+    if tenant is not None:
+        claims[TENANT_CLAIM] = tenant
+    access_token = create_access_token(data=claims)
     return Token(access_token=access_token)
 
 
 @router.get("/me", response_model=UserResponse)
 async def get_me(
     current_user: Annotated[User, Depends(get_current_user)],
-) -> User:
+) -> FastJSONResponse:
     """Get current user info including balance."""
-    return current_user
+    return FastJSONResponse(_to_user_response(current_user))
@@ -0,0 +1,79 @@
+"""Bet template routes for bets asked again on a schedule."""
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from mirustech.betting.database import get_db
+from mirustech.betting.models import User
+from mirustech.betting.schemas import BetDetailResponse, BetTemplateCreate, BetTemplateResponse
+from mirustech.betting.schemas.bet import MAX_BULK_BETS
+from mirustech.betting.serialization import FastJSONResponse
+from mirustech.betting.services.auth import get_current_user
+from mirustech.betting.services.bet_templates import BetTemplateService
+from mirustech.betting.services.betting import BettingService
+from mirustech.betting.tracing import TracedRoute
+
+router = APIRouter(prefix="/api/bet-templates", tags=["bet-templates"], route_class=TracedRoute)
+
+
+@router.post("", response_model=BetTemplateResponse, status_code=status.HTTP_201_CREATED)
+async def create_template(
+    data: BetTemplateCreate,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_user)],
+) -> FastJSONResponse:
+    """Create a bet template.
+
+    Each occurrence is created when the one before it closes, the first one
+    at once if its betting window has already begun.
+    """
+    service = BetTemplateService(db)
+    template = await service.create_template(current_user, data)
+    return FastJSONResponse(service.to_response(template), status_code=status.HTTP_201_CREATED)
+
+
+@router.get("", response_model=list[BetTemplateResponse])
+async def list_templates(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_user)],
+) -> FastJSONResponse:
+    """List the current user's templates."""
+    service = BetTemplateService(db)
+    templates = await service.list_templates(current_user)
+    return FastJSONResponse([service.to_response(template) for template in templates])
+
+
+@router.post(
+    "/{template_id}/bets",
+    response_model=list[BetDetailResponse],
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_template_bets(
+    template_id: int,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    count: Annotated[int, Query(ge=1, le=MAX_BULK_BETS)] = 1,
+) -> FastJSONResponse:
+    """Create a template's next ``count`` occurrences now, e.g. a whole season at once."""
+    service = BetTemplateService(db)
+    template = await service.get_own_template(template_id, current_user)
+    bets = await service.create_occurrences(template, current_user, count)
+    betting = BettingService(db)
+    return FastJSONResponse(
+        [betting.to_created_response(bet) for bet in bets], status_code=status.HTTP_201_CREATED
+    )
+
+
+@router.delete("/{template_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_template(
+    template_id: int,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_user)],
+) -> Response:
+    """Delete a template, ending its series; bets it already created stay."""
+    service = BetTemplateService(db)
+    template = await service.get_own_template(template_id, current_user)
+    await service.delete_template(template)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
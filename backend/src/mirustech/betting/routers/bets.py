@@ -1,43 +1,220 @@
 """Betting routes for creating, viewing, and managing bets."""
 
+import hashlib
+from array import array
+from datetime import UTC, datetime
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
-from mirustech.betting.database import get_db
-from mirustech.betting.models import BetStatus, Outcome, User, Wager
+from mirustech.betting.cache import LISTING_TAG, TOTALS_TAG, bet_tag, get_response_cache
+from mirustech.betting.database import current_tenant, get_db
+from mirustech.betting.models import Bet, BetStatus, User
 from mirustech.betting.schemas import (
+    BetBulkCreate,
     BetCreate,
     BetDetailResponse,
     BetListResponse,
+    BetOddsBatch,
     BetResolve,
+    BetSearchResult,
+    OddsHistoryResponse,
+    ResolutionPreview,
     WagerCreate,
     WagerResponse,
 )
-from mirustech.betting.services.auth import get_current_user
-from mirustech.betting.services.betting import BettingService
+from mirustech.betting.serialization import FastJSONResponse, dumps, parse_fields
+from mirustech.betting.services.auth import get_current_user, get_optional_user
+from mirustech.betting.services.betting import (
+    BetSort,
+    BettingService,
+    early_betting_seconds_left,
+    needs_totals,
+)
+from mirustech.betting.services.odds_history import OddsHistoryService
 from mirustech.betting.services.payout import PayoutService
+from mirustech.betting.tracing import TracedRoute
+
+router = APIRouter(prefix="/api/bets", tags=["bets"], route_class=TracedRoute)
+
+# Most bets one odds request may name
+MAX_ODDS_IDS = 500
+
+# Header telling whether a response came from the response cache
+CACHE_HEADER = "X-Cache"
+
+
+def _versions_etag(bets: list[Bet]) -> str:
+    """Build an ETag from bet ids and versions, which every write to a bet bumps."""
+    versions = array("q", [value for bet in bets for value in (bet.id, bet.version)])
+    digest = hashlib.blake2b(versions.tobytes(), digest_size=12)
+    digest.update((current_tenant.get() or "").encode())
+    return f'W/"{digest.hexdigest()}"'
+
+
+def _cached_json(body: bytes, hit: bool) -> Response:
+    """Respond with a JSON body from the response cache."""
+    return Response(
+        body, media_type="application/json", headers={CACHE_HEADER: "HIT" if hit else "MISS"}
+    )
 
-router = APIRouter(prefix="/api/bets", tags=["bets"])
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check an ``If-None-Match`` header against an ETag, comparing weakly."""
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
 
 
 @router.get("", response_model=list[BetListResponse])
 async def list_bets(
     db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[User | None, Depends(get_optional_user)],
     status_filter: BetStatus | None = Query(None, alias="status"),
-) -> list[BetListResponse]:
-    """List all bets, optionally filtered by status."""
+    sort: BetSort = "newest",
+    creator: Annotated[str | None, Query(description="Creator's username")] = None,
+    closes_before: Annotated[datetime | None, Query(description="Exclusive (UTC)")] = None,
+    has_my_wager: Annotated[bool, Query(description="Requires authentication")] = False,
+    limit: Annotated[int | None, Query(ge=1, le=500)] = None,
+    offset: Annotated[int, Query(ge=0)] = 0,
+    fields: Annotated[
+        str | None, Query(description="Comma-separated response fields to include")
+    ] = None,
+) -> Response:
+    """List bets, filtered, sorted and paged.
+
+    Without ``limit`` every matching bet is returned. With ``fields`` only those
+    fields are returned, and columns they do not need are never read. Pages are
+    served from the response cache until a bet on them, or which bets match,
+    changes; pages filtered by ``has_my_wager`` are not cached.
+    """
+    field_names = parse_fields(fields, BetListResponse)
+    if has_my_wager and current_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if closes_before is not None and closes_before.tzinfo is not None:
+        closes_before = closes_before.astimezone(UTC).replace(tzinfo=None)
     service = BettingService(db)
 
     # First close any expired bets
     payout_service = PayoutService(db)
     await payout_service.close_expired_bets()
 
-    bets = await service.list_bets(status_filter)
-    return [service.to_list_response(bet) for bet in bets]
+    async def compute() -> tuple[bytes, list[str], None]:
+        bets = await service.list_bets(
+            status_filter,
+            sort,
+            creator,
+            closes_before,
+            current_user if has_my_wager else None,
+            limit,
+            offset,
+            field_names,
+        )
+        entries = await service.get_book_entries(bets) if needs_totals(field_names) else {}
+        body = dumps(
+            [service.to_list_response(bet, entries.get(bet.id), field_names) for bet in bets]
+        )
+        # Pages sorted by totals change order as wagers arrive on any bet
+        tags = [LISTING_TAG, *(bet_tag(bet.id) for bet in bets)]
+        if sort in ("pool_desc", "wagers_desc"):
+            tags.append(TOTALS_TAG)
+        return body, tags, None
+
+    if has_my_wager:
+        # Pages of one user's wagers are not shared, so not cached
+        body, _, _ = await compute()
+        return Response(body, media_type="application/json")
+    key = ":".join(
+        str(part)
+        for part in (
+            "bets",
+            status_filter and status_filter.value,
+            sort,
+            creator,
+            closes_before and closes_before.isoformat(),
+            limit,
+            offset,
+            field_names and ",".join(sorted(field_names)),
+        )
+    )
+    return _cached_json(*await get_response_cache().get_or_compute(key, compute))
+
+
+@router.get("/search", response_model=list[BetSearchResult])
+async def search_bets(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    status_filter: Annotated[BetStatus | None, Query(alias="status")] = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    offset: Annotated[int, Query(ge=0)] = 0,
+) -> FastJSONResponse:
+    """Search bet titles and descriptions, best matches first.
+
+    Matched terms in ``snippet`` are wrapped in ``<mark>`` tags; the rest of the
+    text is HTML-escaped.
+    """
+    service = BettingService(db)
+
+    # First close any expired bets
+    payout_service = PayoutService(db)
+    await payout_service.close_expired_bets()
+
+    results = await service.search_bets(q, status_filter, limit, offset)
+    entries = await service.get_book_entries([bet for bet, _ in results])
+    return FastJSONResponse(
+        [
+            {**service.to_list_response(bet, entries[bet.id]), "snippet": snippet}
+            for bet, snippet in results
+        ]
+    )
+
+
+@router.get("/odds", response_model=BetOddsBatch)
+async def get_odds(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    ids: Annotated[
+        str | None, Query(pattern=r"^\d+(,\d+)*$", description="Comma-separated bet ids")
+    ] = None,
+    status_filter: Annotated[BetStatus | None, Query(alias="status")] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    """Get pools and odds of many bets as parallel arrays.
+
+    Bets are selected by ``ids``, ``status`` or both; unknown ids are left out.
+    The ETag changes whenever any of the bets does, so polling clients can send
+    ``If-None-Match`` and get 304 Not Modified until then.
+    """
+    bet_ids = [int(bet_id) for bet_id in ids.split(",")] if ids else None
+    if bet_ids is None and status_filter is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Select bets by ids or status",
+        )
+    if bet_ids is not None and len(bet_ids) > MAX_ODDS_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_ODDS_IDS} ids per request",
+        )
+    service = BettingService(db)
+
+    # First close any expired bets; closing bumps their versions
+    payout_service = PayoutService(db)
+    await payout_service.close_expired_bets()
+
+    bets = await service.list_bet_versions(bet_ids, status_filter)
+    headers = {"ETag": _versions_etag(bets), "Cache-Control": "no-cache"}
+    if _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    entries = await service.get_book_entries(bets)
+    return FastJSONResponse(service.to_odds_batch(bets, entries), headers=headers)
 
 
 @router.post("", response_model=BetDetailResponse, status_code=status.HTTP_201_CREATED)
@@ -45,33 +222,79 @@ async def create_bet(
     data: BetCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
     current_user: Annotated[User, Depends(get_current_user)],
-) -> BetDetailResponse:
+) -> FastJSONResponse:
     """Create a new bet."""
     service = BettingService(db)
     bet = await service.create_bet(current_user, data)
-    # Re-fetch to load relationships
-    bet = await service.get_bet(bet.id)
-    if not bet:
-        raise HTTPException(status_code=500, detail="Failed to create bet")
-    return service.to_detail_response(bet)
+    return FastJSONResponse(service.to_created_response(bet), status_code=status.HTTP_201_CREATED)
+
+
+@router.post("/bulk", response_model=list[BetDetailResponse], status_code=status.HTTP_201_CREATED)
+async def create_bets(
+    data: BetBulkCreate,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_user)],
+) -> FastJSONResponse:
+    """Create several bets in one transaction, such as every match of a tournament.
+
+    Either every bet is created or, if any is invalid, none is. Bets are
+    returned in request order.
+    """
+    service = BettingService(db)
+    bets = await service.create_bets(current_user, data.bets)
+    return FastJSONResponse(
+        [service.to_created_response(bet) for bet in bets], status_code=status.HTTP_201_CREATED
+    )
 
 
 @router.get("/{bet_id}", response_model=BetDetailResponse)
 async def get_bet(
     bet_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-) -> BetDetailResponse:
-    """Get detailed bet information including odds."""
+    fields: Annotated[
+        str | None, Query(description="Comma-separated response fields to include")
+    ] = None,
+) -> Response:
+    """Get detailed bet information including odds, or only ``fields`` of it.
+
+    Served from the response cache until the bet next changes.
+    """
+    field_names = parse_fields(fields, BetDetailResponse)
     service = BettingService(db)
 
     # First close if expired
     payout_service = PayoutService(db)
     await payout_service.close_expired_bets()
 
-    bet = await service.get_bet(bet_id)
-    if not bet:
+    async def compute() -> tuple[bytes, list[str], float | None]:
+        bet = await service.get_bet(bet_id, field_names)
+        if not bet:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bet not found")
+        entries = await service.get_book_entries([bet]) if needs_totals(field_names) else {}
+        body = dumps(service.to_detail_response(bet, entries.get(bet.id), field_names))
+        # Cached no longer than ``is_early_betting`` stays true
+        max_age = (
+            early_betting_seconds_left(bet)
+            if field_names is None or "is_early_betting" in field_names
+            else None
+        )
+        return body, [bet_tag(bet_id)], max_age
+
+    key = f"bet:{bet_id}:{field_names and ','.join(sorted(field_names))}"
+    return _cached_json(*await get_response_cache().get_or_compute(key, compute))
+
+
+@router.get("/{bet_id}/odds-history", response_model=OddsHistoryResponse)
+async def get_odds_history(
+    bet_id: int,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    resolution: int = Query(default=100, ge=2, le=1000),
+) -> FastJSONResponse:
+    """Get how the odds of each outcome moved over the bet's lifetime."""
+    history = await OddsHistoryService(db).get_history(bet_id, resolution)
+    if history is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bet not found")
-    return service.to_detail_response(bet)
+    return FastJSONResponse(history)
 
 
 @router.post("/{bet_id}/wager", response_model=WagerResponse, status_code=status.HTTP_201_CREATED)
@@ -80,30 +303,38 @@ async def place_wager(
     data: WagerCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
     current_user: Annotated[User, Depends(get_current_user)],
-) -> WagerResponse:
+) -> FastJSONResponse:
     """Place a wager on a bet outcome."""
     service = BettingService(db)
-    wager = await service.place_wager(current_user, bet_id, data.outcome_id, data.amount)
-
-    # Fetch outcome and bet info for response
-    result = await db.execute(
-        select(Wager)
-        .options(selectinload(Wager.outcome).selectinload(Outcome.bet))
-        .where(Wager.id == wager.id)
+    wager, outcome, bet = await service.place_wager(
+        current_user, bet_id, data.outcome_id, data.amount
     )
-    wager = result.scalar_one()
-
-    return WagerResponse(
-        id=wager.id,
-        outcome_id=wager.outcome_id,
-        outcome_name=wager.outcome.name,
-        bet_id=wager.outcome.bet_id,
-        bet_title=wager.outcome.bet.title,
-        amount=wager.amount,
-        weight=wager.weight,
-        payout=wager.payout,
-        created_at=wager.created_at,
+    return FastJSONResponse(
+        service.to_wager_response(wager, outcome, bet), status_code=status.HTTP_201_CREATED
+    )
+
+
+@router.get("/{bet_id}/resolution-preview", response_model=ResolutionPreview)
+async def preview_resolution(
+    bet_id: int,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_user)],
+) -> Response:
+    """Get what each bettor would be paid under every outcome (creator only).
+
+    Payouts are rounded exactly as resolving the bet would round them. Served
+    from the response cache until the next wager on the bet.
+    """
+    payout_service = PayoutService(db)
+    bet = await payout_service.get_bet_to_preview(bet_id, current_user)
+
+    async def compute() -> tuple[bytes, list[str], float | None]:
+        return dumps(await payout_service.preview_resolution(bet)), [bet_tag(bet_id)], None
+
+    body, hit = await get_response_cache().get_or_compute(
+        f"bets/{bet_id}/resolution-preview", compute
     )
+    return _cached_json(body, hit)
 
 
 @router.post("/{bet_id}/resolve", response_model=BetDetailResponse)
@@ -112,40 +343,28 @@ async def resolve_bet(
     data: BetResolve,
     db: Annotated[AsyncSession, Depends(get_db)],
     current_user: Annotated[User, Depends(get_current_user)],
-) -> BetDetailResponse:
+) -> FastJSONResponse:
     """Resolve a bet by selecting the winning outcome."""
     payout_service = PayoutService(db)
     bet = await payout_service.resolve_bet(bet_id, data.winning_outcome_id, current_user)
 
     service = BettingService(db)
-    return service.to_detail_response(bet)
+    entries = await service.get_book_entries([bet])
+    return FastJSONResponse(service.to_detail_response(bet, entries[bet.id]))
 
 
 @router.get("/users/me/wagers", response_model=list[WagerResponse])
 async def get_my_wagers(
     db: Annotated[AsyncSession, Depends(get_db)],
     current_user: Annotated[User, Depends(get_current_user)],
-) -> list[WagerResponse]:
-    """Get all wagers placed by the current user."""
-    result = await db.execute(
-        select(Wager)
-        .options(selectinload(Wager.outcome).selectinload(Outcome.bet))
-        .where(Wager.user_id == current_user.id)
-        .order_by(Wager.created_at.desc())
+    fields: Annotated[
+        str | None, Query(description="Comma-separated response fields to include")
+    ] = None,
+) -> FastJSONResponse:
+    """Get all wagers placed by the current user, or only ``fields`` of them."""
+    field_names = parse_fields(fields, WagerResponse)
+    service = BettingService(db)
+    wagers = await service.list_user_wagers(current_user.id, field_names)
+    return FastJSONResponse(
+        [service.to_wager_response(w, w.outcome, w.outcome.bet, field_names) for w in wagers]
     )
-    wagers = result.scalars().all()
-
-    return [
-        WagerResponse(
-            id=w.id,
-            outcome_id=w.outcome_id,
-            outcome_name=w.outcome.name,
-            bet_id=w.outcome.bet_id,
-            bet_title=w.outcome.bet.title,
-            amount=w.amount,
-            weight=w.weight,
-            payout=w.payout,
-            created_at=w.created_at,
-        )
-        for w in wagers
-    ]
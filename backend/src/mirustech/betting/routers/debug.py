@@ -0,0 +1,72 @@
+"""Debugging routes for inspecting request traces and profiling the process."""
+
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from mirustech.betting.models import User
+from mirustech.betting.profiler import MAX_SECONDS, profile_process
+from mirustech.betting.serialization import FastJSONResponse
+from mirustech.betting.services.auth import get_platform_admin
+from mirustech.betting.tracing import TracedRoute, get_recent_traces
+
+router = APIRouter(prefix="/api/debug", tags=["debug"], route_class=TracedRoute)
+
+
+@router.get("/traces")
+async def list_slowest_traces(
+    _admin: Annotated[User, Depends(get_platform_admin)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+    min_duration_ms: Annotated[float, Query(ge=0)] = 0.0,
+) -> FastJSONResponse:
+    """Get the slowest of the recently sampled traces, slowest first.
+
+    Traces are sampled at ``trace_sample_rate`` and kept in memory, across
+    offices, for the last ``trace_buffer_size`` sampled requests.
+    """
+    traces = get_recent_traces().slowest(limit, min_duration_ms)
+    return FastJSONResponse([trace.to_dict() for trace in traces])
+
+
+@router.get("/traces/{trace_id}")
+async def get_trace(
+    trace_id: str,
+    _admin: Annotated[User, Depends(get_platform_admin)],
+) -> FastJSONResponse:
+    """Get a recently sampled trace by the id returned in its ``X-Trace-Id`` header."""
+    trace = get_recent_traces().get(trace_id)
+    if trace is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Trace not found",
+        )
+    return FastJSONResponse(trace.to_dict())
+
+
+@router.get("/profile", response_model=None)
+async def profile(
+    _admin: Annotated[User, Depends(get_platform_admin)],
+    seconds: Annotated[float, Query(gt=0, le=MAX_SECONDS)] = 10.0,
+    interval_ms: Annotated[float, Query(ge=1, le=1000)] = 10.0,
+    format: Literal["collapsed", "json"] = "collapsed",
+) -> PlainTextResponse | FastJSONResponse:
+    """Sample the stacks of every thread of this worker for ``seconds``.
+
+    The default output is collapsed stacks for flamegraph tools, rooted at the
+    thread's role and, on the event loop, the route being served. ``json``
+    returns per-thread and per-route sample counts alongside them. Only one
+    profile runs at a time.
+    """
+    result = await profile_process(seconds, interval_ms / 1000)
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profile is already running",
+        )
+    if format == "json":
+        return FastJSONResponse({**result.summary(), "stacks": result.collapsed()})
+    return PlainTextResponse(
+        result.collapsed(),
+        headers={"X-Profile-Samples": str(result.samples)},
+    )
@@ -0,0 +1,29 @@
+"""Event routes for following bet and wager changes."""
+
+from typing import Annotated
+
+from fastapi import APIRouter, Query
+
+from mirustech.betting.schemas import EventPage
+from mirustech.betting.serialization import FastJSONResponse
+from mirustech.betting.services.events import read_events
+from mirustech.betting.tracing import TracedRoute
+
+router = APIRouter(prefix="/api/events", tags=["events"], route_class=TracedRoute)
+
+
+@router.get("", response_model=EventPage)
+async def list_events(
+    after: Annotated[int, Query(ge=0, description="Last sequence number already seen")] = 0,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    wait: Annotated[
+        float, Query(ge=0, le=60, description="Seconds to wait for new events if there are none")
+    ] = 0,
+) -> FastJSONResponse:
+    """Get events after a sequence number, oldest first.
+
+    With ``wait`` the request long-polls: it returns as soon as new events are
+    committed, or with an empty page once the wait is over.
+    """
+    events = await read_events(after, limit, wait)
+    return FastJSONResponse({"events": events, "last_seq": events[-1]["seq"] if events else after})
@@ -2,15 +2,22 @@
 
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from mirustech.betting.database import get_db
 from mirustech.betting.models import User
+from mirustech.betting.serialization import FastJSONResponse
+from mirustech.betting.services.leaderboard import (
+    LeaderboardMetric,
+    LeaderboardService,
+    LeaderboardWindow,
+)
+from mirustech.betting.tracing import TracedRoute
 
-router = APIRouter(prefix="/api/leaderboard", tags=["leaderboard"])
+router = APIRouter(prefix="/api/leaderboard", tags=["leaderboard"], route_class=TracedRoute)
 
 
 class LeaderboardEntry(BaseModel):
@@ -24,18 +31,46 @@ class LeaderboardEntry(BaseModel):
         from_attributes = True
 
 
-@router.get("", response_model=list[LeaderboardEntry])
+class ProfitLeaderboardEntry(BaseModel):
+    """Schema for an entry of a time-windowed leaderboard."""
+
+    rank: int
+    username: str
+    profit: int  # Payouts minus stakes of the wagers settled in the window
+    roi: float  # Profit per coin of settled stakes
+    settled_stake: int
+    wagered: int  # Coins wagered in the window, settled or not
+
+
+@router.get("", response_model=list[LeaderboardEntry] | list[ProfitLeaderboardEntry])
 async def get_leaderboard(
     db: Annotated[AsyncSession, Depends(get_db)],
     limit: int = Query(default=10, ge=1, le=100),
-) -> list[LeaderboardEntry]:
-    """Get the top users by balance."""
+    window: LeaderboardWindow | None = None,
+    metric: LeaderboardMetric | None = None,
+    min_stake: Annotated[int, Query(ge=0, description="Settled stakes needed to rank")] = 0,
+) -> FastJSONResponse:
+    """Get the top users by balance, or by profit or ROI over the last ``window``.
+
+    Windowed boards are summed from daily per-user totals, so they cost the
+    same however many wagers were placed.
+    """
+    if window is not None:
+        service = LeaderboardService(db)
+        return FastJSONResponse(await service.rank(window, metric or "profit", limit, min_stake))
+    if metric is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="metric requires a window",
+        )
     result = await db.execute(
         select(User).order_by(User.balance.desc()).limit(limit)
     )
     users = result.scalars().all()
 
-    return [
-        LeaderboardEntry(rank=i + 1, username=user.username, balance=user.balance)
-        for i, user in enumerate(users)
-    ]
+    return FastJSONResponse(
+        [
+            {"rank": i + 1, "username": user.username, "balance": user.balance}
+            for i, user in enumerate(users)
+        ]
+    )
@@ -0,0 +1,30 @@
+"""User routes for viewing the current user's positions."""
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from mirustech.betting.database import get_db
+from mirustech.betting.models import User
+from mirustech.betting.schemas import PortfolioResponse
+from mirustech.betting.serialization import FastJSONResponse
+from mirustech.betting.services.auth import get_current_user
+from mirustech.betting.services.portfolio import PortfolioService
+from mirustech.betting.tracing import TracedRoute
+
+router = APIRouter(prefix="/api/users", tags=["users"], route_class=TracedRoute)
+
+
+@router.get("/me/portfolio", response_model=PortfolioResponse)
+async def get_my_portfolio(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_user)],
+) -> FastJSONResponse:
+    """Get the current user's positions on unresolved bets, valued at the current pools.
+
+    Each position shows what every outcome would pay the user if it won, the
+    best and worst of those and the expected payout at the odds the pools
+    imply, alongside totals over all positions.
+    """
+    return FastJSONResponse(await PortfolioService(db).get_portfolio(current_user))
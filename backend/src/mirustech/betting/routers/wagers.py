@@ -0,0 +1,36 @@
+"""Wager routes for placing several wagers at once."""
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from mirustech.betting.database import get_db
+from mirustech.betting.models import User
+from mirustech.betting.schemas import WagerBatchCreate, WagerResponse
+from mirustech.betting.serialization import FastJSONResponse
+from mirustech.betting.services.auth import get_current_user
+from mirustech.betting.services.betting import BettingService
+from mirustech.betting.tracing import TracedRoute
+
+router = APIRouter(prefix="/api/wagers", tags=["wagers"], route_class=TracedRoute)
+
+
+@router.post("/batch", response_model=list[WagerResponse], status_code=status.HTTP_201_CREATED)
+async def place_wagers(
+    data: WagerBatchCreate,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_user)],
+) -> FastJSONResponse:
+    """Place wagers on several outcomes or bets in one transaction.
+
+    Either every wager is placed or none is.
+    """
+    service = BettingService(db)
+    placed = await service.place_wagers(
+        current_user, [(w.bet_id, w.outcome_id, w.amount) for w in data.wagers]
+    )
+    return FastJSONResponse(
+        [service.to_wager_response(wager, outcome, bet) for wager, outcome, bet in placed],
+        status_code=status.HTTP_201_CREATED,
+    )
@@ -2,26 +2,57 @@
 
 from mirustech.betting.schemas.auth import Token, UserCreate, UserLogin, UserResponse
 from mirustech.betting.schemas.bet import (
+    BetBulkCreate,
     BetCreate,
     BetDetailResponse,
     BetListResponse,
+    BetOddsBatch,
     BetResolve,
+    BetSearchResult,
+    OddsHistoryResponse,
     OutcomeResponse,
     OutcomeWithOdds,
+    ResolutionPreview,
+)
+from mirustech.betting.schemas.bet_template import BetTemplateCreate, BetTemplateResponse
+from mirustech.betting.schemas.event import EventPage, EventResponse
+from mirustech.betting.schemas.portfolio import (
+    PortfolioOutcome,
+    PortfolioPosition,
+    PortfolioResponse,
+)
+from mirustech.betting.schemas.wager import (
+    WagerBatchCreate,
+    WagerBatchItem,
+    WagerCreate,
+    WagerResponse,
 )
-from mirustech.betting.schemas.wager import WagerCreate, WagerResponse
 
 __all__ = [
     "Token",
     "UserCreate",
     "UserLogin",
     "UserResponse",
+    "BetBulkCreate",
     "BetCreate",
     "BetListResponse",
     "BetDetailResponse",
+    "BetOddsBatch",
     "BetResolve",
+    "BetSearchResult",
+    "BetTemplateCreate",
+    "BetTemplateResponse",
+    "EventPage",
+    "EventResponse",
+    "OddsHistoryResponse",
     "OutcomeResponse",
     "OutcomeWithOdds",
+    "PortfolioOutcome",
+    "PortfolioPosition",
+    "PortfolioResponse",
+    "ResolutionPreview",
+    "WagerBatchCreate",
+    "WagerBatchItem",
     "WagerCreate",
     "WagerResponse",
 ]
@@ -43,6 +43,16 @@ class BetCreate(BaseModel):
         return v
 
 
+# Most bets one bulk request may create
+MAX_BULK_BETS = 500
+
+
+class BetBulkCreate(BaseModel):
+    """Schema for creating several bets in one all-or-nothing request."""
+
+    bets: list[BetCreate] = Field(..., min_length=1, max_length=MAX_BULK_BETS)
+
+
 class OutcomeResponse(BaseModel):
     """Schema for outcome in responses."""
 
@@ -82,6 +92,26 @@ class BetListResponse(UTCDatetimeMixin, BaseModel):
         from_attributes = True
 
 
+class BetSearchResult(BetListResponse):
+    """Schema for a bet matching a search, with highlighted matching text."""
+
+    snippet: str
+
+
+class BetOddsBatch(BaseModel):
+    """Schema for the odds of many bets as parallel arrays, one element per bet.
+
+    The nested arrays of a bet are parallel too, one element per outcome.
+    """
+
+    ids: list[int]
+    versions: list[int]
+    statuses: list[BetStatus]
+    outcome_ids: list[list[int]]
+    pools: list[list[int]]
+    odds: list[list[float]]
+
+
 class BetDetailResponse(UTCDatetimeMixin, BaseModel):
     """Schema for detailed bet view with outcomes and odds."""
 
@@ -99,6 +129,37 @@ class BetDetailResponse(UTCDatetimeMixin, BaseModel):
     is_early_betting: bool
 
 
+class OddsHistoryResponse(BaseModel):
+    """Schema for a bet's odds over time, one series per outcome."""
+
+    bet_id: int
+    outcome_ids: list[int]
+    timestamps: list[datetime]
+    odds: list[list[float]]
+
+    @field_serializer("timestamps")
+    def serialize_timestamps(self, timestamps: list[datetime]) -> list[str]:
+        """Serialize timestamps as ISO format with Z suffix to indicate UTC."""
+        return [dt.isoformat() + "Z" for dt in timestamps]
+
+
+class ResolutionPreview(BaseModel):
+    """Schema for what resolving a bet would pay, as parallel arrays.
+
+    ``payouts`` has a row per outcome, parallel to ``outcome_ids``, of the
+    coins each bettor would be paid if it won, parallel to ``user_ids``.
+    """
+
+    bet_id: int
+    total_pool: int
+    outcome_ids: list[int]
+    outcome_names: list[str]
+    user_ids: list[int]
+    usernames: list[str]
+    staked: list[int]  # Coins each bettor wagered on the bet
+    payouts: list[list[int]]
+
+
 class BetResolve(BaseModel):
     """Schema for resolving a bet."""
 
@@ -0,0 +1,70 @@
+"""Bet template schemas for bets asked again on a schedule."""
+
+from datetime import UTC, datetime, timedelta
+
+from pydantic import BaseModel, Field, field_serializer, field_validator
+
+# Shortest time between occurrences of a template
+MIN_TEMPLATE_INTERVAL = timedelta(minutes=1)
+
+
+class BetTemplateCreate(BaseModel):
+    """Schema for creating a bet template.
+
+    ``title`` may contain ``{n}``, the occurrence's number from 1, and
+    ``{date}``, its close date. ``interval`` accepts seconds or an ISO 8601
+    duration such as ``P7D``.
+    """
+
+    title: str = Field(..., min_length=1, max_length=200)
+    description: str = Field(default="", max_length=2000)
+    outcomes: list[str] = Field(..., min_length=2)
+    first_close_time: datetime
+    interval: timedelta
+    occurrences: int | None = Field(default=None, ge=1)
+
+    @field_validator("outcomes")
+    @classmethod
+    def check_outcome_names(cls, v: list[str]) -> list[str]:
+        """Apply the limits of ``OutcomeCreate`` to every name."""
+        if not all(1 <= len(name) <= 100 for name in v):
+            raise ValueError("Outcome names must be 1 to 100 characters long")
+        return v
+
+    @field_validator("first_close_time")
+    @classmethod
+    def normalize_first_close_time(cls, v: datetime) -> datetime:
+        """Convert timezone-aware datetime to naive UTC for SQLite compatibility."""
+        if v.tzinfo is not None:
+            v = v.astimezone(UTC).replace(tzinfo=None)
+        return v
+
+    @field_validator("interval")
+    @classmethod
+    def check_interval(cls, v: timedelta) -> timedelta:
+        """Keep occurrences at least ``MIN_TEMPLATE_INTERVAL`` apart."""
+        if v < MIN_TEMPLATE_INTERVAL:
+            raise ValueError(f"Interval must be at least {MIN_TEMPLATE_INTERVAL}")
+        return v
+
+
+class BetTemplateResponse(BaseModel):
+    """Schema for a bet template and where its series stands."""
+
+    id: int
+    title: str
+    description: str
+    outcomes: list[str]
+    first_close_time: datetime
+    interval_seconds: int
+    occurrences: int | None
+    next_occurrence: int  # Number, from 0, of the next occurrence to create
+    next_close_time: datetime | None  # None once every occurrence was created
+    created_at: datetime
+
+    @field_serializer("first_close_time", "next_close_time", "created_at")
+    def serialize_datetime(self, dt: datetime | None) -> str | None:
+        """Serialize datetime as ISO format with Z suffix to indicate UTC."""
+        if dt is None:
+            return None
+        return dt.isoformat() + "Z"
@@ -0,0 +1,23 @@
+"""Event schemas for the change feed."""
+
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel
+
+
+class EventResponse(BaseModel):
+    """Schema for one event in the change feed."""
+
+    seq: int
+    type: str
+    bet_id: int
+    payload: dict[str, Any]
+    created_at: datetime
+
+
+class EventPage(BaseModel):
+    """Schema for a page of events; pass ``last_seq`` as ``after`` to continue."""
+
+    events: list[EventResponse]
+    last_seq: int
@@ -0,0 +1,43 @@
+"""Portfolio schemas for a user's positions on unresolved bets."""
+
+from datetime import datetime
+
+from pydantic import BaseModel
+
+from mirustech.betting.models import BetStatus
+
+
+class PortfolioOutcome(BaseModel):
+    """Schema for one outcome of a position."""
+
+    outcome_id: int
+    name: str
+    pool: int  # Coins wagered on the outcome by everyone
+    staked: int  # Coins the user wagered on it
+    projected_payout: int  # Paid to the user if it wins at the current pools
+
+
+class PortfolioPosition(BaseModel):
+    """Schema for the user's wagers on one bet."""
+
+    bet_id: int
+    title: str
+    status: BetStatus
+    close_time: datetime
+    total_pool: int
+    staked: int  # Coins at risk on the bet
+    expected_payout: float  # Payouts weighted by each outcome's share of the pool
+    best_case: int
+    worst_case: int
+    outcomes: list[PortfolioOutcome]
+
+
+class PortfolioResponse(BaseModel):
+    """Schema for a user's positions on unresolved bets and their totals."""
+
+    bets: int
+    staked: int  # Total exposure
+    expected_payout: float
+    best_case: int
+    worst_case: int
+    positions: list[PortfolioPosition]
@@ -2,16 +2,37 @@
 
 from datetime import datetime
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
-from mirustech.betting.config import settings
+from mirustech.betting.config import get_settings
 
 
 class WagerCreate(BaseModel):
     """Schema for placing a wager."""
 
     outcome_id: int
-    amount: int = Field(..., ge=settings.minimum_wager)
+    amount: int
+
+    @field_validator("amount")
+    @classmethod
+    def check_minimum_wager(cls, v: int) -> int:
+        """Enforce the configured minimum wager, read at validation time."""
+        minimum = get_settings().minimum_wager
+        if v < minimum:
+            raise ValueError(f"Input should be greater than or equal to {minimum}")
+        return v
+
+
+class WagerBatchItem(WagerCreate):
+    """Schema for one stake in a batch of wagers."""
+
+    bet_id: int
+
+
+class WagerBatchCreate(BaseModel):
+    """Schema for placing several wagers in one all-or-nothing request."""
+
+    wagers: list[WagerBatchItem] = Field(..., min_length=1, max_length=100)
 
 
 class WagerResponse(BaseModel):
@@ -0,0 +1,114 @@
+"""Full-text search index over bet titles and descriptions.
+
+``bets_fts`` is an FTS5 table using ``bets`` as external content, so it stores
+only the index. Triggers on ``bets`` keep it in sync with every insert, delete
+and title or description change. Bets moved to the archive are deleted from
+``bets`` and so leave the index; search finds bets of every other status.
+
+Usage:
+    python -m mirustech.betting.search rebuild
+"""
+
+import argparse
+import asyncio
+import html
+import re
+
+from sqlalchemy import Connection
+
+from mirustech.betting.database import dispose_engine, get_engine, init_db
+
+SEARCH_TABLE = "bets_fts"
+
+_SEARCH_DDL = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        title, description,
+        content='bets', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS bets_fts_insert AFTER INSERT ON bets BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS bets_fts_delete AFTER DELETE ON bets BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS bets_fts_update AFTER UPDATE OF title, description ON bets BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {SEARCH_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+)
+
+# Title matches rank ten times higher than description matches
+RANK = f"bm25({SEARCH_TABLE}, 10.0, 1.0)"
+
+# Snippet markers that cannot occur in user text; replaced after HTML escaping
+_MARK_START, _MARK_END = "\x02", "\x03"
+SNIPPET = f"snippet({SEARCH_TABLE}, -1, '{_MARK_START}', '{_MARK_END}', '…', 16)"
+
+_TOKEN = re.compile(r"\w+")
+
+
+def create_search_index(conn: Connection) -> None:
+    """Create the search table and its triggers, and index existing bets."""
+    for statement in _SEARCH_DDL:
+        conn.exec_driver_sql(statement)
+    rebuild_search_index(conn)
+
+
+def rebuild_search_index(conn: Connection) -> None:
+    """Re-index every bet from the ``bets`` table."""
+    conn.exec_driver_sql(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+
+
+def to_match_query(text: str) -> str | None:
+    """Turn free text into an FTS5 query matching all words as prefixes.
+
+    Words are quoted, so FTS5 operators and syntax in the input are searched for
+    literally instead of raising errors. Returns None when there is no word.
+    """
+    tokens = _TOKEN.findall(text)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def highlight(snippet: str) -> str:
+    """HTML-escape a snippet and wrap matched terms in ``<mark>`` tags."""
+    return html.escape(snippet).replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>")
+
+
+async def _rebuild() -> None:
+    try:
+        await init_db()
+        async with get_engine().begin() as conn:
+            await conn.run_sync(rebuild_search_index)
+    finally:
+        await dispose_engine()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m mirustech.betting.search",
+        description="Maintain the bet search index.",
+    )
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args(argv)
+
+    asyncio.run(_rebuild())
+    print("Search index rebuilt")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,7 @@ from datetime import UTC, datetime, timedelta
 
 from sqlalchemy import select
 
-from mirustech.betting.config import settings
+from mirustech.betting.config import get_settings
 from mirustech.betting.database import async_session, init_db
 from mirustech.betting.models import Bet, Outcome, User
 from mirustech.betting.services.auth import get_password_hash
@@ -35,7 +35,7 @@ async def seed_database() -> None:
             user = User(
                 username=user_data["username"],
                 password_hash=get_password_hash(user_data["password"]),
-                balance=settings.initial_balance,
+                balance=get_settings().initial_balance,
             )
             db.add(user)
             users.append(user)
@@ -0,0 +1,60 @@
+"""Fast JSON serialization for API responses.
+
+Responses are built from trusted internal data as plain dicts in the shape of
+the response schemas, skipping Pydantic validation entirely, and rendered
+straight to bytes with orjson. Naive datetimes are stored as UTC throughout
+the app, so orjson formats them once, natively, with a ``Z`` suffix instead of
+running a Python serializer per field.
+"""
+
+from typing import Any
+
+import orjson
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+
+# A response payload shaped like one of the response schemas
+JSONDict = dict[str, Any]
+
+
+def _default(obj: Any) -> Any:
+    """Serialize types orjson does not handle natively."""
+    if isinstance(obj, BaseModel):
+        return obj.__dict__
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def parse_fields(fields: str | None, schema: type[BaseModel]) -> frozenset[str] | None:
+    """Parse a comma-separated ``fields`` parameter naming fields of ``schema``.
+
+    Returns None, meaning all fields, when the parameter is absent.
+    """
+    if fields is None:
+        return None
+    names = frozenset(name.strip() for name in fields.split(",") if name.strip())
+    unknown = names - schema.model_fields.keys()
+    if not names or unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}" if unknown else "No fields",
+        )
+    return names
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize response content to JSON bytes."""
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson from trusted, pre-built content.
+
+    Returning this from a route bypasses FastAPI's response model validation;
+    the ``response_model`` on the route is still used for the OpenAPI schema.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -3,17 +3,31 @@
 from mirustech.betting.services.auth import (
     authenticate_user,
     create_access_token,
+    get_admin_user,
     get_current_user,
+    get_optional_user,
     get_password_hash,
+    get_platform_admin,
 )
+from mirustech.betting.services.bet_templates import BetTemplateService
 from mirustech.betting.services.betting import BettingService
+from mirustech.betting.services.leaderboard import LeaderboardService
+from mirustech.betting.services.odds_history import OddsHistoryService
 from mirustech.betting.services.payout import PayoutService
+from mirustech.betting.services.portfolio import PortfolioService
 
 __all__ = [
     "authenticate_user",
     "create_access_token",
+    "get_admin_user",
     "get_current_user",
+    "get_optional_user",
     "get_password_hash",
+    "get_platform_admin",
+    "BetTemplateService",
     "BettingService",
+    "LeaderboardService",
+    "OddsHistoryService",
     "PayoutService",
+    "PortfolioService",
 ]
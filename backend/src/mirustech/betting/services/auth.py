@@ -1,5 +1,6 @@
 """Authentication service with JWT token management."""
 
+import asyncio
 from datetime import UTC, datetime, timedelta
 from typing import Annotated
 
@@ -10,11 +11,13 @@ from jose import JWTError, jwt
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from mirustech.betting.config import settings
-from mirustech.betting.database import get_db
+from mirustech.betting.config import get_settings
+from mirustech.betting.database import current_tenant, get_db
 from mirustech.betting.models.user import User
+from mirustech.betting.tracing import traced
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -29,6 +32,7 @@ def get_password_hash(password: str) -> str:
 
 def create_access_token(data: dict) -> str:
     """Create a JWT access token."""
+    settings = get_settings()
     to_encode = data.copy()
     expire = datetime.now(UTC) + timedelta(minutes=settings.jwt_expire_minutes)
     to_encode.update({"exp": expire})
@@ -39,11 +43,13 @@ async def authenticate_user(db: AsyncSession, username: str, password: str) -> U
     """Authenticate a user by username and password."""
     result = await db.execute(select(User).where(User.username == username))
     user = result.scalar_one_or_none()
-    if not user or not verify_password(password, user.password_hash):
+    # bcrypt is deliberately slow, so keep it off the event loop
+    if not user or not await asyncio.to_thread(verify_password, password, user.password_hash):
         return None
     return user
 
 
+@traced("dependency get_current_user")
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
     db: Annotated[AsyncSession, Depends(get_db)],
@@ -54,6 +60,7 @@ async def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    settings = get_settings()
     try:
         payload = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
         user_id: int | None = payload.get("sub")
@@ -67,3 +74,48 @@ async def get_current_user(
     if user is None:
         raise credentials_exception
     return user
+
+
+@traced("dependency get_optional_user")
+async def get_optional_user(
+    token: Annotated[str | None, Depends(optional_oauth2_scheme)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> User | None:
+    """Get the current user if a token was sent; invalid tokens are still rejected."""
+    if token is None:
+        return None
+    return await get_current_user(token, db)
+
+
+@traced("dependency get_admin_user")
+async def get_admin_user(
+    current_user: Annotated[User, Depends(get_current_user)],
+) -> User:
+    """Get the current user, requiring them to be a configured admin.
+
+    Office users are listed as ``<office>/<username>``.
+    """
+    tenant = current_tenant.get()
+    name = current_user.username if tenant is None else f"{tenant}/{current_user.username}"
+    if name not in get_settings().admin_usernames:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+    return current_user
+
+
+@traced("dependency get_platform_admin")
+async def get_platform_admin(
+    admin: Annotated[User, Depends(get_admin_user)],
+) -> User:
+    """Get the current admin, requiring them to administer the main database.
+
+    Only these admins may manage offices and query across them.
+    """
+    if current_tenant.get() is not None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Platform admin access required",
+        )
+    return admin
@@ -0,0 +1,290 @@
+"""In-process book of open bets serving pool totals without scanning wagers.
+
+Open bets are a small, hot working set. The book keeps one compact entry per
+OPEN bet, rebuilt from aggregate queries at startup and updated write-through
+after each committed wager, close or resolve. Every entry carries the bet's
+``version``; readers compare it against the version on the bet row they loaded
+and fall back to an aggregate query when they differ, so entries that another
+worker process made stale are never served.
+"""
+
+from array import array
+from collections.abc import Iterable, Sequence
+from datetime import datetime
+
+from sqlalchemy import ColumnElement, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from mirustech.betting.database import (
+    ARCHIVE_EXECUTION_OPTIONS,
+    archive_enabled,
+    current_tenant,
+    register_tenant_state,
+    run_after_commit,
+)
+from mirustech.betting.models import Bet, BetStatus, Outcome, Wager
+
+
+class BookEntry:
+    """Pool totals of one bet, stored as parallel arrays indexed by outcome."""
+
+    __slots__ = (
+        "bet_id",
+        "outcome_ids",
+        "pools",
+        "weighted",
+        "close_time",
+        "created_at",
+        "version",
+    )
+
+    def __init__(
+        self,
+        bet_id: int,
+        outcome_ids: array,
+        pools: array,
+        weighted: array,
+        close_time: datetime,
+        created_at: datetime,
+        version: int,
+    ):
+        self.bet_id = bet_id
+        self.outcome_ids = outcome_ids
+        self.pools = pools
+        self.weighted = weighted
+        self.close_time = close_time
+        self.created_at = created_at
+        self.version = version
+
+    @classmethod
+    def empty(cls, bet: Bet, outcome_ids: Iterable[int]) -> "BookEntry":
+        """Create an entry for a bet without wagers."""
+        ids = array("q", sorted(outcome_ids))
+        return cls(
+            bet.id,
+            ids,
+            array("q", [0]) * len(ids),
+            array("q", [0]) * len(ids),
+            bet.close_time,
+            bet.created_at,
+            bet.version,
+        )
+
+    @property
+    def total_pool(self) -> int:
+        """Total amount wagered on all outcomes."""
+        return sum(self.pools)
+
+    def totals(self, outcome_id: int) -> tuple[int, int]:
+        """Get the pool and weighted stake totals of an outcome."""
+        try:
+            i = self.outcome_ids.index(outcome_id)
+        except ValueError:
+            return 0, 0
+        return self.pools[i], self.weighted[i]
+
+    def with_wager(self, outcome_id: int, amount: int, weighted: int, version: int) -> "BookEntry":
+        """Return a copy of this entry including a new wager."""
+        pools = array("q", self.pools)
+        weighted_totals = array("q", self.weighted)
+        i = self.outcome_ids.index(outcome_id)
+        pools[i] += amount
+        weighted_totals[i] += weighted
+        return BookEntry(
+            self.bet_id,
+            self.outcome_ids,
+            pools,
+            weighted_totals,
+            self.close_time,
+            self.created_at,
+            version,
+        )
+
+    def matches(self, other: "BookEntry") -> bool:
+        """Check whether two entries hold the same totals."""
+        return (
+            self.outcome_ids == other.outcome_ids
+            and self.pools == other.pools
+            and self.weighted == other.weighted
+        )
+
+
+async def bump_version(
+    db: AsyncSession, bet: Bet, *criteria: ColumnElement[bool], **values: ColumnElement[int]
+) -> int | None:
+    """Increment a bet's version in SQL and return the new value.
+
+    ``values`` are further columns to update in the same statement. Returns
+    None, leaving the bet unchanged, if it does not match ``criteria``.
+    """
+    keys = ["version", *values]
+    row = (
+        await db.execute(
+            update(Bet)
+            .where(Bet.id == bet.id, *criteria)
+            .values(version=Bet.version + 1, **values)
+            .returning(*(getattr(Bet, key) for key in keys))
+            .execution_options(synchronize_session=False)
+        )
+    ).one_or_none()
+    if row is None:
+        return None
+    for key, value in zip(keys, row, strict=True):
+        set_committed_value(bet, key, value)
+    return row[0]
+
+
+async def load_entries(
+    db: AsyncSession, *criteria: ColumnElement[bool], archived: bool = False
+) -> dict[int, BookEntry]:
+    """Build entries from one grouped aggregate query over outcomes and wagers.
+
+    With ``archived`` the query reads the archive database instead.
+    """
+    query = (
+        select(
+            Bet.id,
+            Bet.close_time,
+            Bet.created_at,
+            Bet.version,
+            Outcome.id,
+            func.coalesce(func.sum(Wager.amount), 0),
+            func.coalesce(func.sum(Wager.weighted_stake), 0),
+        )
+        .join(Outcome, Outcome.bet_id == Bet.id)
+        .outerjoin(Wager, Wager.outcome_id == Outcome.id)
+        .where(*criteria)
+        .group_by(Outcome.id)
+        .order_by(Bet.id, Outcome.id)
+    )
+    if archived:
+        query = query.execution_options(**ARCHIVE_EXECUTION_OPTIONS)
+    result = await db.execute(query)
+
+    entries: dict[int, BookEntry] = {}
+    for bet_id, close_time, created_at, version, outcome_id, pool, weighted in result:
+        entry = entries.get(bet_id)
+        if entry is None:
+            entry = BookEntry(
+                bet_id, array("q"), array("q"), array("q"), close_time, created_at, version
+            )
+            entries[bet_id] = entry
+        entry.outcome_ids.append(outcome_id)
+        entry.pools.append(int(pool))
+        entry.weighted.append(int(weighted))
+    return entries
+
+
+class BetBook:
+    """Versioned in-memory entries for all OPEN bets."""
+
+    def __init__(self) -> None:
+        self._entries: dict[int, BookEntry] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, bet_id: int) -> BookEntry | None:
+        """Get the entry of an open bet, if it is in the book."""
+        return self._entries.get(bet_id)
+
+    def put(self, entry: BookEntry) -> None:
+        """Store an entry unless a newer version is already present."""
+        existing = self._entries.get(entry.bet_id)
+        if existing is None or entry.version >= existing.version:
+            self._entries[entry.bet_id] = entry
+
+    def put_all(self, entries: Iterable[BookEntry]) -> None:
+        """Store several entries."""
+        for entry in entries:
+            self.put(entry)
+
+    def discard(self, bet_id: int) -> None:
+        """Remove a bet that is no longer open."""
+        self._entries.pop(bet_id, None)
+
+    def discard_all(self, bet_ids: Iterable[int]) -> None:
+        """Remove several bets that are no longer open."""
+        for bet_id in bet_ids:
+            self.discard(bet_id)
+
+    async def rebuild(self, db: AsyncSession) -> int:
+        """Replace the book with fresh aggregates of all open bets."""
+        self._entries = await load_entries(db, Bet.status == BetStatus.OPEN)
+        return len(self._entries)
+
+    async def entries_for(self, db: AsyncSession, bets: Sequence[Bet]) -> dict[int, BookEntry]:
+        """Get entries for the given bets, loading missing or stale ones.
+
+        Open bets are served from the book when their version matches the loaded
+        bet row; all others are aggregated in a single query. Refreshed open bets
+        are put back into the book once the session commits, so totals read inside
+        a transaction that later rolls back never reach the book.
+        """
+        entries: dict[int, BookEntry] = {}
+        missing: list[int] = []
+        for bet in bets:
+            entry = self._entries.get(bet.id)
+            if entry is not None and entry.version == bet.version:
+                entries[bet.id] = entry
+            else:
+                missing.append(bet.id)
+
+        if missing:
+            loaded = await load_entries(db, Bet.id.in_(missing))
+            refreshed = [
+                loaded[bet.id] for bet in bets if bet.id in loaded and bet.status == BetStatus.OPEN
+            ]
+            if refreshed:
+                run_after_commit(db, lambda: self.put_all(refreshed))
+            entries.update(loaded)
+
+            archived = [bet_id for bet_id in missing if bet_id not in loaded]
+            if archived and archive_enabled():
+                entries.update(await load_entries(db, Bet.id.in_(archived), archived=True))
+        return entries
+
+    async def check_consistency(self, db: AsyncSession) -> dict[str, object]:
+        """Compare the book against the database and repair any differences.
+
+        Entries whose version differs from the database are stale (another
+        process wrote to the bet) and are refreshed. Entries with the same
+        version but different totals indicate a bug and are reported.
+        """
+        fresh = await load_entries(db, Bet.status == BetStatus.OPEN)
+        stale: list[int] = []
+        mismatched: list[int] = []
+
+        for bet_id, entry in fresh.items():
+            cached = self._entries.get(bet_id)
+            if cached is None or cached.version != entry.version:
+                stale.append(bet_id)
+            elif not cached.matches(entry):
+                mismatched.append(bet_id)
+        removed = [bet_id for bet_id in self._entries if bet_id not in fresh]
+
+        for entry in fresh.values():
+            self.put(entry)
+        for bet_id in removed:
+            self.discard(bet_id)
+        return {
+            "entries": len(fresh),
+            "stale": sorted(stale),
+            "mismatched": sorted(mismatched),
+            "removed": sorted(removed),
+        }
+
+
+_bet_books: dict[str | None, BetBook] = {}
+# An office's book is dropped with its engine and refilled from its database on next use
+register_tenant_state(_bet_books)
+
+
+def get_bet_book() -> BetBook:
+    """Get the bet book of the current tenant's database."""
+    tenant = current_tenant.get()
+    book = _bet_books.get(tenant)
+    if book is None:
+        book = _bet_books[tenant] = BetBook()
+    return book
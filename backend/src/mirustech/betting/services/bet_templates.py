@@ -0,0 +1,209 @@
+"""Bet template service creating the occurrences of recurring bets."""
+
+from collections import defaultdict
+from datetime import UTC, datetime, timedelta
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from mirustech.betting.database import async_session
+from mirustech.betting.models import Bet, BetTemplate, User
+from mirustech.betting.schemas import BetCreate, BetTemplateCreate
+from mirustech.betting.schemas.bet import MAX_BULK_BETS
+from mirustech.betting.serialization import JSONDict
+from mirustech.betting.services.betting import BettingService
+from mirustech.betting.tracing import trace_methods
+
+
+def occurrence_close_time(template: BetTemplate, n: int) -> datetime:
+    """Close time of occurrence ``n``, counted from 0."""
+    return template.first_close_time + n * timedelta(seconds=template.interval_seconds)
+
+
+def _first_open_occurrence(template: BetTemplate, now: datetime) -> int:
+    """Number of the next occurrence to create, skipping those that already closed.
+
+    Occurrences missed while nothing created them, e.g. during downtime, are
+    skipped rather than created closed.
+    """
+    elapsed = (now - template.first_close_time).total_seconds()
+    closed = int(elapsed // template.interval_seconds) + 1 if elapsed >= 0 else 0
+    return max(template.next_occurrence, closed)
+
+
+def _due_occurrence(template: BetTemplate, now: datetime) -> int | None:
+    """Number of the occurrence to create now, once the one before it has closed."""
+    n = _first_open_occurrence(template, now)
+    if template.occurrences is not None and n >= template.occurrences:
+        return None
+    interval = timedelta(seconds=template.interval_seconds)
+    if occurrence_close_time(template, n) - interval > now:
+        return None
+    return n
+
+
+def _occurrence(template: BetTemplate, n: int) -> BetCreate:
+    """Build the bet of occurrence ``n``, filling in the title's placeholders."""
+    close_time = occurrence_close_time(template, n)
+    # Replaced literally: ``str.format`` would let titles reach into the arguments
+    title = template.title.replace("{n}", str(n + 1)).replace(
+        "{date}", close_time.date().isoformat()
+    )
+    return BetCreate.model_validate(
+        {
+            "title": title[:200],
+            "description": template.description,
+            "outcomes": [{"name": name} for name in template.outcomes],
+            "close_time": close_time,
+        }
+    )
+
+
+@trace_methods
+class BetTemplateService:
+    """Service for bet templates and the bets they create."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create_template(self, user: User, data: BetTemplateCreate) -> BetTemplate:
+        """Create a template, and its first occurrence if its betting window has begun.
+
+        Later occurrences are created as they come due.
+        """
+        template = BetTemplate(
+            creator_id=user.id,
+            title=data.title,
+            description=data.description,
+            outcomes=data.outcomes,
+            first_close_time=data.first_close_time,
+            interval_seconds=int(data.interval.total_seconds()),
+            occurrences=data.occurrences,
+            next_occurrence=0,
+        )
+        self.db.add(template)
+        await self.db.flush()
+        n = _due_occurrence(template, datetime.now(UTC).replace(tzinfo=None))
+        if n is not None and await self._claim(template, n + 1):
+            await BettingService(self.db).create_bets(user, [_occurrence(template, n)])
+        return template
+
+    async def list_templates(self, user: User) -> list[BetTemplate]:
+        """List the user's templates, oldest first."""
+        result = await self.db.scalars(
+            select(BetTemplate).where(BetTemplate.creator_id == user.id).order_by(BetTemplate.id)
+        )
+        return list(result)
+
+    async def get_own_template(self, template_id: int, user: User) -> BetTemplate:
+        """Get a template the user created."""
+        template = await self.db.get(BetTemplate, template_id)
+        if template is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Template not found")
+        if template.creator_id != user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only the template creator can manage this template",
+            )
+        return template
+
+    async def delete_template(self, template: BetTemplate) -> None:
+        """Delete a template, ending its series; bets already created stay."""
+        await self.db.execute(delete(BetTemplate).where(BetTemplate.id == template.id))
+
+    async def _claim(self, template: BetTemplate, end: int) -> bool:
+        """Advance the series to ``end``, unless another transaction moved it first."""
+        claimed = await self.db.scalar(
+            update(BetTemplate)
+            .where(
+                BetTemplate.id == template.id,
+                BetTemplate.next_occurrence == template.next_occurrence,
+            )
+            .values(next_occurrence=end)
+            .returning(BetTemplate.id)
+            .execution_options(synchronize_session=False)
+        )
+        if claimed is None:
+            return False
+        set_committed_value(template, "next_occurrence", end)
+        return True
+
+    async def create_occurrences(
+        self, template: BetTemplate, creator: User, count: int
+    ) -> list[Bet]:
+        """Create the next ``count`` occurrences now, ahead of their schedule."""
+        start = _first_open_occurrence(template, datetime.now(UTC).replace(tzinfo=None))
+        end = start + min(count, MAX_BULK_BETS)
+        if template.occurrences is not None:
+            end = min(end, template.occurrences)
+        if start >= end:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Every occurrence of this template was already created",
+            )
+        if not await self._claim(template, end):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Occurrences of this template are being created concurrently",
+            )
+        items = [_occurrence(template, n) for n in range(start, end)]
+        return await BettingService(self.db).create_bets(creator, items)
+
+    async def create_due_occurrences(self) -> int:
+        """Create every template's occurrence whose previous one has closed.
+
+        The bets of each creator are created in one batch; returns how many.
+        """
+        now = datetime.now(UTC).replace(tzinfo=None)
+        templates = await self.db.scalars(
+            select(BetTemplate).where(
+                or_(
+                    BetTemplate.occurrences.is_(None),
+                    BetTemplate.next_occurrence < BetTemplate.occurrences,
+                )
+            )
+        )
+        due: defaultdict[int, list[BetCreate]] = defaultdict(list)
+        for template in templates.all():
+            n = _due_occurrence(template, now)
+            # Another worker may have created it since
+            if n is not None and await self._claim(template, n + 1):
+                due[template.creator_id].append(_occurrence(template, n))
+        if not due:
+            return 0
+
+        creators = await self.db.scalars(select(User).where(User.id.in_(due)))
+        service = BettingService(self.db)
+        for creator in creators:
+            await service.create_bets(creator, due[creator.id])
+        return sum(len(items) for items in due.values())
+
+    def to_response(self, template: BetTemplate) -> JSONDict:
+        """Convert a template to ``BetTemplateResponse`` format."""
+        exhausted = (
+            template.occurrences is not None and template.next_occurrence >= template.occurrences
+        )
+        return {
+            "id": template.id,
+            "title": template.title,
+            "description": template.description,
+            "outcomes": template.outcomes,
+            "first_close_time": template.first_close_time,
+            "interval_seconds": template.interval_seconds,
+            "occurrences": template.occurrences,
+            "next_occurrence": template.next_occurrence,
+            "next_close_time": (
+                None if exhausted else occurrence_close_time(template, template.next_occurrence)
+            ),
+            "created_at": template.created_at,
+        }
+
+
+async def create_due_bets() -> int:
+    """Create the due occurrences of the current database's templates."""
+    async with async_session() as db:
+        created = await BetTemplateService(db).create_due_occurrences()
+        await db.commit()
+    return created
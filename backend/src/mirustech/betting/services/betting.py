@@ -1,17 +1,138 @@
 """Betting service with pari-mutuel odds calculation."""
 
+from collections.abc import Callable
 from datetime import UTC, datetime
+from functools import partial
+from typing import Any, Literal
 
 from fastapi import HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import ColumnElement, column, insert, literal_column, select, table, update
+from sqlalchemy import text as sql_text
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import InstrumentedAttribute, load_only, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.interfaces import ORMOption
 
-from mirustech.betting.config import settings
+from mirustech.betting.cache import LISTING_TAG, TOTALS_TAG, bet_tag, invalidate_after_commit
+from mirustech.betting.config import get_settings
+from mirustech.betting.database import (
+    ARCHIVE_EXECUTION_OPTIONS,
+    archive_enabled,
+    run_after_commit,
+)
 from mirustech.betting.models import Bet, BetStatus, Outcome, User, Wager
-from mirustech.betting.schemas import BetCreate, BetDetailResponse, BetListResponse, OutcomeWithOdds
+from mirustech.betting.models.wager import WEIGHT_SCALE, to_weighted_stake
+from mirustech.betting.schemas import BetCreate
+from mirustech.betting.search import RANK, SEARCH_TABLE, SNIPPET, highlight, to_match_query
+from mirustech.betting.serialization import JSONDict
+from mirustech.betting.services.bet_book import (
+    BookEntry,
+    bump_version,
+    get_bet_book,
+    load_entries,
+)
+from mirustech.betting.services.events import record_event
+from mirustech.betting.services.leaderboard import LeaderboardService
+from mirustech.betting.services.odds_history import OddsHistoryService
+from mirustech.betting.tracing import trace_methods
 
 
+def _odds(total_pool: int, weighted_stake: int) -> float:
+    """Coins paid per weighted coin wagered on an outcome, or 0 without stakes."""
+    if weighted_stake > 0 and total_pool > 0:
+        return total_pool / (weighted_stake / WEIGHT_SCALE)
+    return 0
+
+
+# Bet columns each field of a bet response reads, so responses limited to some
+# fields load only those; the id is always loaded
+_BET_FIELD_COLUMNS: dict[str, tuple[InstrumentedAttribute, ...]] = {
+    "title": (Bet.title,),
+    "description": (Bet.description,),
+    "close_time": (Bet.close_time,),
+    "status": (Bet.status,),
+    "created_at": (Bet.created_at,),
+    "creator_id": (Bet.creator_id,),
+    "creator_username": (Bet.creator_id,),
+    "winning_outcome_id": (Bet.winning_outcome_id,),
+    # Totals come from the bet book, which compares versions of open bets
+    "total_pool": (Bet.version, Bet.status),
+    "outcomes": (Bet.version, Bet.status, Bet.close_time, Bet.created_at),
+    "is_early_betting": (Bet.close_time, Bet.created_at, Bet.status),
+}
+
+# Fields of bet responses computed from pool totals
+_TOTALS_FIELDS = frozenset({"total_pool", "outcomes"})
+
+# Wager columns each field of a wager response reads
+_WAGER_FIELD_COLUMNS: dict[str, tuple[InstrumentedAttribute, ...]] = {
+    "outcome_id": (Wager.outcome_id,),
+    "amount": (Wager.amount,),
+    "weight": (Wager.weight,),
+    "payout": (Wager.payout,),
+    "created_at": (Wager.created_at,),
+}
+
+
+def bet_load_options(
+    fields: frozenset[str] | None = None, with_creator: bool = True
+) -> list[ORMOption]:
+    """Loader options for bets reading only what ``fields`` need, or everything for None."""
+    if fields is None:
+        return [selectinload(Bet.outcomes), *([selectinload(Bet.creator)] * with_creator)]
+    columns = dict.fromkeys(c for field in fields for c in _BET_FIELD_COLUMNS.get(field, ()))
+    options: list[ORMOption] = [load_only(Bet.id, *columns)]
+    if fields & {"outcomes", "outcome_count"}:
+        options.append(selectinload(Bet.outcomes))
+    if with_creator and "creator_username" in fields:
+        options.append(selectinload(Bet.creator).load_only(User.username))
+    return options
+
+
+def needs_totals(fields: frozenset[str] | None) -> bool:
+    """Check whether a bet response with ``fields`` needs book entries."""
+    return fields is None or not fields.isdisjoint(_TOTALS_FIELDS)
+
+
+def _pick(getters: dict[str, Callable[[], Any]], fields: frozenset[str] | None) -> JSONDict:
+    """Build a response from the getters of the requested fields, or of all for None.
+
+    Getters of other fields never run, so they may read columns that were not loaded.
+    """
+    if fields is None:
+        return {name: get() for name, get in getters.items()}
+    return {name: get() for name, get in getters.items() if name in fields}
+
+
+def _is_early_betting(bet: Bet) -> bool:
+    """Check whether the bet is open and in the first half of its betting window."""
+    now = datetime.now(UTC).replace(tzinfo=None)
+    total_window = (bet.close_time - bet.created_at).total_seconds()
+    elapsed = (now - bet.created_at).total_seconds()
+    return elapsed < total_window / 2 and bet.is_open
+
+
+def early_betting_seconds_left(bet: Bet) -> float | None:
+    """Get the seconds until ``is_early_betting`` turns false, or None if it already is."""
+    if not _is_early_betting(bet):
+        return None
+    now = datetime.now(UTC).replace(tzinfo=None)
+    midpoint = bet.created_at + (bet.close_time - bet.created_at) / 2
+    return (midpoint - now).total_seconds()
+
+
+BetSort = Literal["closing_soon", "pool_desc", "wagers_desc", "newest"]
+
+# Orderings matching the ``ix_bets_status_*`` indexes, with the id breaking ties
+BET_SORTS: dict[str, tuple[ColumnElement, ...]] = {
+    "closing_soon": (Bet.close_time, Bet.id),
+    "pool_desc": (Bet.pool.desc(), Bet.id.desc()),
+    "wagers_desc": (Bet.wager_count.desc(), Bet.id.desc()),
+    "newest": (Bet.created_at.desc(), Bet.id.desc()),
+}
+
+
+@trace_methods
 class BettingService:
     """Service for managing bets and wagers."""
 
@@ -20,98 +141,348 @@ class BettingService:
 
     async def create_bet(self, user: User, data: BetCreate) -> Bet:
         """Create a new bet with outcomes."""
-        if data.close_time <= datetime.now(UTC).replace(tzinfo=None):
+        [bet] = await self.create_bets(user, [data])
+        return bet
+
+    async def create_bets(self, user: User, items: list[BetCreate]) -> list[Bet]:
+        """Create several bets with their outcomes all-or-nothing.
+
+        Every bet is validated before anything is written. Bets and then
+        outcomes are each inserted by one batched statement returning the new
+        rows as loaded objects, with outcomes and creator set, so responses
+        are built from them without reading the bets back.
+        """
+        now = datetime.now(UTC).replace(tzinfo=None)
+        if any(data.close_time <= now for data in items):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Close time must be in the future",
             )
 
-        bet = Bet(
-            creator_id=user.id,
-            title=data.title,
-            description=data.description,
-            close_time=data.close_time,
+        bets = list(
+            await self.db.scalars(
+                insert(Bet).returning(Bet, sort_by_parameter_order=True),
+                [
+                    {
+                        "creator_id": user.id,
+                        "title": data.title,
+                        "description": data.description,
+                        "close_time": data.close_time,
+                        "created_at": now,
+                    }
+                    for data in items
+                ],
+            )
+        )
+        outcomes = list(
+            await self.db.scalars(
+                insert(Outcome).returning(Outcome, sort_by_parameter_order=True),
+                [
+                    {"bet_id": bet.id, "name": o.name}
+                    for bet, data in zip(bets, items, strict=True)
+                    for o in data.outcomes
+                ],
+            )
         )
-        self.db.add(bet)
-        await self.db.flush()
 
-        for outcome_data in data.outcomes:
-            outcome = Outcome(bet_id=bet.id, name=outcome_data.name)
-            self.db.add(outcome)
+        entries = []
+        start = 0
+        for bet, data in zip(bets, items, strict=True):
+            bet_outcomes = outcomes[start : start + len(data.outcomes)]
+            start += len(data.outcomes)
+            set_committed_value(bet, "outcomes", bet_outcomes)
+            set_committed_value(bet, "creator", user)
+            entries.append(BookEntry.empty(bet, (o.id for o in bet_outcomes)))
+            record_event(
+                self.db,
+                "bet.created",
+                bet.id,
+                title=bet.title,
+                close_time=bet.close_time.isoformat() + "Z",
+                outcome_ids=[o.id for o in bet_outcomes],
+            )
 
-        await self.db.flush()
+        book = get_bet_book()
+        run_after_commit(self.db, lambda: book.put_all(entries))
+        invalidate_after_commit(self.db, [LISTING_TAG])
+        return bets
+
+    async def get_bet(self, bet_id: int, fields: frozenset[str] | None = None) -> Bet | None:
+        """Get a bet by ID with outcomes and creator loaded.
+
+        With ``fields`` only what those response fields need is loaded.
+        """
+        result = await self.db.execute(
+            select(Bet).options(*bet_load_options(fields)).where(Bet.id == bet_id)
+        )
+        bet = result.scalar_one_or_none()
+        if bet is None and archive_enabled():
+            bet = await self._get_archived_bet(bet_id, fields)
         return bet
 
-    async def get_bet(self, bet_id: int) -> Bet | None:
-        """Get a bet by ID with outcomes and wagers loaded."""
+    async def _get_archived_bet(
+        self, bet_id: int, fields: frozenset[str] | None = None
+    ) -> Bet | None:
+        """Get a bet moved to the archive database, with its creator from the main one."""
+        # The creator lives in the main database, so it is loaded separately
         result = await self.db.execute(
             select(Bet)
-            .options(
-                selectinload(Bet.outcomes).selectinload(Outcome.wagers),
-                selectinload(Bet.creator),
-            )
+            .options(*bet_load_options(fields, with_creator=False))
             .where(Bet.id == bet_id)
+            .execution_options(**ARCHIVE_EXECUTION_OPTIONS)
         )
-        return result.scalar_one_or_none()
+        bet = result.scalar_one_or_none()
+        if bet is not None and (fields is None or "creator_username" in fields):
+            set_committed_value(bet, "creator", await self.db.get(User, bet.creator_id))
+        return bet
 
-    async def list_bets(self, status_filter: BetStatus | None = None) -> list[Bet]:
-        """List all bets, optionally filtered by status."""
-        query = select(Bet).options(
-            selectinload(Bet.outcomes).selectinload(Outcome.wagers),
-            selectinload(Bet.creator),
-        )
+    async def list_bets(
+        self,
+        status_filter: BetStatus | None = None,
+        sort: BetSort = "newest",
+        creator: str | None = None,
+        closes_before: datetime | None = None,
+        wagered_by: User | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+        fields: frozenset[str] | None = None,
+    ) -> list[Bet]:
+        """List bets matching the filters, sorted and paged in SQL.
+
+        With a status filter each sort reads one index range of ``bets``. With
+        ``fields`` only what those response fields need is loaded.
+        """
+        query = select(Bet).options(*bet_load_options(fields))
         if status_filter:
             query = query.where(Bet.status == status_filter)
-        query = query.order_by(Bet.created_at.desc())
+        if creator is not None:
+            creator_id = select(User.id).where(User.username == creator).scalar_subquery()
+            query = query.where(Bet.creator_id == creator_id)
+        if closes_before is not None:
+            query = query.where(Bet.close_time < closes_before)
+        if wagered_by is not None:
+            wagered = (
+                select(Outcome.bet_id)
+                .join(Wager, Wager.outcome_id == Outcome.id)
+                .where(Wager.user_id == wagered_by.id)
+            )
+            query = query.where(Bet.id.in_(wagered))
+        query = query.order_by(*BET_SORTS[sort]).limit(limit).offset(offset)
         result = await self.db.execute(query)
         return list(result.scalars().all())
 
-    async def place_wager(self, user: User, bet_id: int, outcome_id: int, amount: int) -> Wager:
-        """Place a wager on an outcome."""
-        bet = await self.get_bet(bet_id)
-        if not bet:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bet not found")
+    async def search_bets(
+        self,
+        text_query: str,
+        status_filter: BetStatus | None = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> list[tuple[Bet, str]]:
+        """Search bet titles and descriptions, best matches first.
 
-        if not bet.is_open:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Bet is no longer accepting wagers",
+        Returns each bet with an HTML snippet of its best matching text.
+        """
+        match = to_match_query(text_query)
+        if match is None:
+            return []
+        fts = table(SEARCH_TABLE, column("rowid"))
+        query = (
+            select(Bet, literal_column(SNIPPET))
+            .join(fts, fts.c.rowid == Bet.id)
+            .where(sql_text(f"{SEARCH_TABLE} MATCH :match").bindparams(match=match))
+            .options(
+                selectinload(Bet.outcomes),
+                selectinload(Bet.creator),
             )
+        )
+        if status_filter:
+            query = query.where(Bet.status == status_filter)
+        query = query.order_by(literal_column(RANK), Bet.id.desc()).limit(limit).offset(offset)
+        result = await self.db.execute(query)
+        return [(bet, highlight(snippet)) for bet, snippet in result]
 
-        # Find the outcome
-        outcome = next((o for o in bet.outcomes if o.id == outcome_id), None)
-        if not outcome:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Outcome not found")
+    async def list_user_wagers(
+        self, user_id: int, fields: frozenset[str] | None = None
+    ) -> list[Wager]:
+        """Get a user's wagers, newest first, including archived ones.
 
-        # Check minimum wager
-        if amount < settings.minimum_wager:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Minimum wager is {settings.minimum_wager} OfficeCoins",
+        Each wager's outcome and bet are loaded with only the columns responses
+        use. With ``fields`` only the wager columns those fields need are loaded.
+        """
+        options: list[ORMOption] = [
+            selectinload(Wager.outcome)
+            .load_only(Outcome.bet_id, Outcome.name)
+            .selectinload(Outcome.bet)
+            .load_only(Bet.title)
+        ]
+        if fields is not None:
+            columns = dict.fromkeys(
+                c for field in fields for c in _WAGER_FIELD_COLUMNS.get(field, ())
             )
+            # The outcome id is needed to load the outcome
+            options.append(load_only(Wager.id, Wager.outcome_id, *columns))
+        query = (
+            select(Wager)
+            .options(*options)
+            .where(Wager.user_id == user_id)
+            .order_by(Wager.created_at.desc())
+        )
+        wagers = list((await self.db.execute(query)).scalars().all())
+        if archive_enabled():
+            archived = await self.db.execute(query.execution_options(**ARCHIVE_EXECUTION_OPTIONS))
+            # Archived bets were resolved long ago, so their wagers are the oldest.
+            # Wagers an interrupted batch left in both files are listed once.
+            listed = {wager.id for wager in wagers}
+            wagers.extend(wager for wager in archived.scalars() if wager.id not in listed)
+        return wagers
+
+    async def get_book_entries(self, bets: list[Bet]) -> dict[int, BookEntry]:
+        """Get pool totals for bets, from the bet book where possible."""
+        return await get_bet_book().entries_for(self.db, bets)
+
+    async def place_wager(
+        self, user: User, bet_id: int, outcome_id: int, amount: int
+    ) -> tuple[Wager, Outcome, Bet]:
+        """Place a wager on an outcome, returning it with its outcome and bet."""
+        placed = await self.place_wagers(user, [(bet_id, outcome_id, amount)])
+        return placed[0]
+
+    async def place_wagers(
+        self, user: User, stakes: list[tuple[int, int, int]]
+    ) -> list[tuple[Wager, Outcome, Bet]]:
+        """Place several ``(bet_id, outcome_id, amount)`` wagers all-or-nothing.
+
+        All bets are loaded in one query and every stake is validated against a
+        single balance check before anything is written, so a failure leaves
+        the transaction untouched. Returns each wager with its outcome and bet.
+        """
+        result = await self.db.execute(
+            select(Bet)
+            .options(selectinload(Bet.outcomes))
+            .where(Bet.id.in_({bet_id for bet_id, _, _ in stakes}))
+        )
+        bets = {bet.id: bet for bet in result.scalars().all()}
+        settings = get_settings()
+
+        targets: list[tuple[Bet, Outcome, int]] = []
+        for bet_id, outcome_id, amount in stakes:
+            bet = bets.get(bet_id)
+            if not bet:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bet not found")
+
+            if not bet.is_open:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Bet is no longer accepting wagers",
+                )
+
+            # Find the outcome
+            outcome = next((o for o in bet.outcomes if o.id == outcome_id), None)
+            if not outcome:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND, detail="Outcome not found"
+                )
+
+            # Check minimum wager
+            if amount < settings.minimum_wager:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Minimum wager is {settings.minimum_wager} OfficeCoins",
+                )
+            targets.append((bet, outcome, amount))
 
         # Check balance
-        if user.balance < amount:
+        total = sum(amount for _, _, amount in targets)
+        if user.balance < total:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Insufficient balance",
             )
 
-        # Calculate weight (early bet bonus)
-        weight = self._calculate_weight(bet)
+        entries = await self.get_book_entries(list(bets.values()))
 
-        # Create wager and deduct balance
-        wager = Wager(
-            user_id=user.id,
-            outcome_id=outcome_id,
-            amount=amount,
-            weight=weight,
+        # Create wagers and deduct the balance once
+        weights = {bet_id: self._calculate_weight(bet) for bet_id, bet in bets.items()}
+        placed = [
+            (
+                Wager(
+                    user_id=user.id,
+                    outcome_id=outcome.id,
+                    amount=amount,
+                    weight=weights[bet.id],
+                    weighted_stake=to_weighted_stake(amount, weights[bet.id]),
+                ),
+                outcome,
+                bet,
+            )
+            for bet, outcome, amount in targets
+        ]
+
+        # Deduct in SQL, so concurrent requests of the same user cannot overspend
+        balance = await self.db.scalar(
+            update(User)
+            .where(User.id == user.id, User.balance >= total)
+            .values(balance=User.balance - total)
+            .returning(User.balance)
+            .execution_options(synchronize_session=False)
         )
-        user.balance -= amount
+        if balance is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Insufficient balance",
+            )
+        set_committed_value(user, "balance", balance)
 
-        self.db.add(wager)
+        self.db.add_all([wager for wager, _, _ in placed])
         await self.db.flush()
-        return wager
+        await LeaderboardService(self.db).record_stakes([wager for wager, _, _ in placed])
+
+        book = get_bet_book()
+        history = OddsHistoryService(self.db)
+        for bet in bets.values():
+            # Every write bumps the version, so a gap means another transaction
+            # changed the bet after its totals were read and they must be reloaded
+            entry = entries[bet.id]
+            amounts = [wager.amount for wager, _, wager_bet in placed if wager_bet is bet]
+            version = await bump_version(
+                self.db,
+                bet,
+                Bet.status == BetStatus.OPEN,
+                pool=Bet.pool + sum(amounts),
+                wager_count=Bet.wager_count + len(amounts),
+            )
+            if version is None:
+                # Closed or resolved since it was loaded
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Bet is no longer accepting wagers",
+                )
+            if version == entry.version + 1:
+                for wager, _, wager_bet in placed:
+                    if wager_bet is bet:
+                        entry = entry.with_wager(
+                            wager.outcome_id, wager.amount, wager.weighted_stake, version
+                        )
+            else:
+                entry = (await load_entries(self.db, Bet.id == bet.id))[bet.id]
+            run_after_commit(self.db, partial(book.put, entry))
+
+            # Snapshot the odds including these wagers
+            await history.record(bet, self.calculate_odds(bet, entry))
+        invalidate_after_commit(self.db, [TOTALS_TAG, *(bet_tag(bet_id) for bet_id in bets)])
+
+        for wager, _, bet in placed:
+            record_event(
+                self.db,
+                "wager.placed",
+                bet.id,
+                wager_id=wager.id,
+                outcome_id=wager.outcome_id,
+                amount=wager.amount,
+            )
+
+        await self.db.flush()
+        return placed
 
     def _calculate_weight(self, bet: Bet) -> float:
         """Calculate the weight multiplier for early bets."""
@@ -121,73 +492,128 @@ class BettingService:
 
         # Early bet bonus if within first 50% of window
         if elapsed < total_window / 2:
-            return settings.early_bet_bonus
+            return get_settings().early_bet_bonus
         return 1.0
 
-    def calculate_odds(self, bet: Bet) -> list[OutcomeWithOdds]:
-        """Calculate odds for all outcomes in a bet."""
-        total_pool = bet.total_pool
+    async def list_bet_versions(
+        self, bet_ids: list[int] | None = None, status_filter: BetStatus | None = None
+    ) -> list[Bet]:
+        """List bets by id and/or status with only their id, version and status loaded."""
+        query = select(Bet).options(load_only(Bet.id, Bet.version, Bet.status)).order_by(Bet.id)
+        if bet_ids is not None:
+            query = query.where(Bet.id.in_(bet_ids))
+        if status_filter:
+            query = query.where(Bet.status == status_filter)
+        result = await self.db.execute(query)
+        return list(result.scalars().all())
+
+    def to_odds_batch(self, bets: list[Bet], entries: dict[int, BookEntry]) -> JSONDict:
+        """Build a ``BetOddsBatch`` dict from bets and their book entries."""
+        batch: JSONDict = {
+            "ids": [],
+            "versions": [],
+            "statuses": [],
+            "outcome_ids": [],
+            "pools": [],
+            "odds": [],
+        }
+        for bet in bets:
+            entry = entries[bet.id]
+            total_pool = entry.total_pool
+            batch["ids"].append(bet.id)
+            batch["versions"].append(bet.version)
+            batch["statuses"].append(bet.status)
+            batch["outcome_ids"].append(entry.outcome_ids.tolist())
+            batch["pools"].append(entry.pools.tolist())
+            batch["odds"].append(
+                [round(_odds(total_pool, weighted), 2) for weighted in entry.weighted]
+            )
+        return batch
+
+    def calculate_odds(self, bet: Bet, entry: BookEntry) -> list[JSONDict]:
+        """Calculate odds for all outcomes in a bet, shaped like ``OutcomeWithOdds``."""
+        total_pool = entry.total_pool
         outcomes_with_odds = []
 
         for outcome in bet.outcomes:
-            weighted_total = outcome.weighted_total
-
-            if weighted_total > 0 and total_pool > 0:
-                # Odds = how much you'd get per 1 coin wagered (weighted)
-                odds = total_pool / weighted_total
-                payout_multiplier = odds
-            else:
-                odds = 0
-                payout_multiplier = 0
+            pool_total, weighted_stake = entry.totals(outcome.id)
+            weighted_total = weighted_stake / WEIGHT_SCALE
+            odds = _odds(total_pool, weighted_stake)
+            payout_multiplier = odds
 
             outcomes_with_odds.append(
-                OutcomeWithOdds(
-                    id=outcome.id,
-                    name=outcome.name,
-                    pool_total=outcome.pool_total,
-                    weighted_total=weighted_total,
-                    odds=round(odds, 2),
-                    payout_multiplier=round(payout_multiplier, 2),
-                )
+                {
+                    "id": outcome.id,
+                    "name": outcome.name,
+                    "pool_total": float(pool_total),
+                    "weighted_total": weighted_total,
+                    "odds": round(odds, 2),
+                    "payout_multiplier": round(payout_multiplier, 2),
+                }
             )
 
         return outcomes_with_odds
 
-    def to_list_response(self, bet: Bet) -> BetListResponse:
-        """Convert a bet to list response format."""
-        return BetListResponse(
-            id=bet.id,
-            title=bet.title,
-            description=bet.description,
-            close_time=bet.close_time,
-            status=bet.status,
-            created_at=bet.created_at,
-            creator_username=bet.creator.username,
-            total_pool=bet.total_pool,
-            outcome_count=len(bet.outcomes),
-        )
+    def to_list_response(
+        self, bet: Bet, entry: BookEntry | None, fields: frozenset[str] | None = None
+    ) -> JSONDict:
+        """Convert a bet to ``BetListResponse`` format, or only its ``fields``.
 
-    def to_detail_response(self, bet: Bet) -> BetDetailResponse:
-        """Convert a bet to detail response format."""
-        outcomes_with_odds = self.calculate_odds(bet)
+        ``entry`` is only read when ``needs_totals(fields)``.
+        """
+        getters: dict[str, Callable[[], Any]] = {
+            "id": lambda: bet.id,
+            "title": lambda: bet.title,
+            "description": lambda: bet.description,
+            "close_time": lambda: bet.close_time,
+            "status": lambda: bet.status,
+            "created_at": lambda: bet.created_at,
+            "creator_username": lambda: bet.creator.username,
+            "total_pool": lambda: float(entry.total_pool),
+            "outcome_count": lambda: len(bet.outcomes),
+        }
+        return _pick(getters, fields)
 
-        # Calculate if we're still in the early betting window
-        now = datetime.now(UTC).replace(tzinfo=None)
-        total_window = (bet.close_time - bet.created_at).total_seconds()
-        elapsed = (now - bet.created_at).total_seconds()
-        is_early_betting = elapsed < total_window / 2 and bet.is_open
-
-        return BetDetailResponse(
-            id=bet.id,
-            title=bet.title,
-            description=bet.description,
-            close_time=bet.close_time,
-            status=bet.status,
-            created_at=bet.created_at,
-            creator_id=bet.creator_id,
-            creator_username=bet.creator.username,
-            total_pool=bet.total_pool,
-            outcomes=outcomes_with_odds,
-            winning_outcome_id=bet.winning_outcome_id,
-            is_early_betting=is_early_betting,
-        )
+    def to_detail_response(
+        self, bet: Bet, entry: BookEntry | None, fields: frozenset[str] | None = None
+    ) -> JSONDict:
+        """Convert a bet to ``BetDetailResponse`` format, or only its ``fields``.
+
+        ``entry`` is only read when ``needs_totals(fields)``.
+        """
+        getters: dict[str, Callable[[], Any]] = {
+            "id": lambda: bet.id,
+            "title": lambda: bet.title,
+            "description": lambda: bet.description,
+            "close_time": lambda: bet.close_time,
+            "status": lambda: bet.status,
+            "created_at": lambda: bet.created_at,
+            "creator_id": lambda: bet.creator_id,
+            "creator_username": lambda: bet.creator.username,
+            "total_pool": lambda: float(entry.total_pool),
+            "outcomes": lambda: self.calculate_odds(bet, entry),
+            "winning_outcome_id": lambda: bet.winning_outcome_id,
+            "is_early_betting": lambda: _is_early_betting(bet),
+        }
+        return _pick(getters, fields)
+
+    def to_created_response(self, bet: Bet) -> JSONDict:
+        """Convert a bet from ``create_bets``, which has no wagers yet, to ``BetDetailResponse``."""
+        return self.to_detail_response(bet, BookEntry.empty(bet, (o.id for o in bet.outcomes)))
+
+    def to_wager_response(
+        self, wager: Wager, outcome: Outcome, bet: Bet, fields: frozenset[str] | None = None
+    ) -> JSONDict:
+        """Convert a wager to ``WagerResponse`` format, or only its ``fields``."""
+        getters: dict[str, Callable[[], Any]] = {
+            "id": lambda: wager.id,
+            "outcome_id": lambda: wager.outcome_id,
+            "outcome_name": lambda: outcome.name,
+            "bet_id": lambda: bet.id,
+            "bet_title": lambda: bet.title,
+            "amount": lambda: wager.amount,
+            "weight": lambda: wager.weight,
+            "payout": lambda: wager.payout,
+            "created_at": lambda: wager.created_at,
+        }
+        return _pick(getters, fields)
@@ -0,0 +1,115 @@
+"""Outbox of bet and wager events with long-polling reads.
+
+Writers append events to the ``events`` table in their own transaction, so an
+event exists exactly when the change it describes was committed. Readers fetch
+events after a sequence number and, when there are none yet, wait until a
+transaction that appended events commits in this process. Commits from other
+processes are picked up when the wait times out.
+"""
+
+import asyncio
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from mirustech.betting.config import get_settings
+from mirustech.betting.database import (
+    async_session,
+    current_tenant,
+    register_tenant_state,
+    run_after_commit,
+)
+from mirustech.betting.models import Event
+from mirustech.betting.serialization import JSONDict
+
+
+class EventNotifier:
+    """Wakes readers waiting for events once a transaction appending them commits."""
+
+    def __init__(self) -> None:
+        self._committed = asyncio.Event()
+
+    def notify(self) -> None:
+        """Wake all current waiters; later waiters wait for the next commit."""
+        self._committed.set()
+        self._committed = asyncio.Event()
+
+    def waiter(self) -> asyncio.Event:
+        """Get the event set by the next commit.
+
+        Take it before reading, so a commit between the read and the wait is
+        not missed.
+        """
+        return self._committed
+
+
+_notifiers: dict[str | None, EventNotifier] = {}
+# Offices are only evicted while idle, so no reader waits on a dropped notifier
+register_tenant_state(_notifiers)
+
+
+def _get_notifier() -> EventNotifier:
+    """Get the notifier of the current tenant's events."""
+    tenant = current_tenant.get()
+    notifier = _notifiers.get(tenant)
+    if notifier is None:
+        notifier = _notifiers[tenant] = EventNotifier()
+    return notifier
+
+
+def record_event(db: AsyncSession, event_type: str, bet_id: int, **payload: Any) -> None:
+    """Append an event to the session's transaction."""
+    db.add(Event(type=event_type, bet_id=bet_id, payload=payload))
+    run_after_commit(db, _get_notifier().notify)
+
+
+def to_event_response(event: Event) -> JSONDict:
+    """Build an ``EventResponse`` dict."""
+    return {
+        "seq": event.seq,
+        "type": event.type,
+        "bet_id": event.bet_id,
+        "payload": event.payload,
+        "created_at": event.created_at,
+    }
+
+
+async def read_events(after: int, limit: int, wait: float) -> list[JSONDict]:
+    """Read events after sequence number ``after``, waiting up to ``wait`` seconds for some.
+
+    Each read uses a short-lived session, so waiting readers hold no connection.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    query = select(Event).where(Event.seq > after).order_by(Event.seq).limit(limit)
+    notifier = _get_notifier()
+    while True:
+        waiter = notifier.waiter()
+        async with async_session() as db:
+            events = (await db.execute(query)).scalars().all()
+        remaining = deadline - loop.time()
+        if events or remaining <= 0:
+            return [to_event_response(event) for event in events]
+        try:
+            await asyncio.wait_for(waiter.wait(), remaining)
+        except TimeoutError:
+            # Still read once more, for commits made by other processes
+            deadline = loop.time()
+
+
+async def prune_events(db: AsyncSession, older_than: timedelta) -> int:
+    """Delete events older than ``older_than`` and return how many were deleted."""
+    cutoff = datetime.now(UTC).replace(tzinfo=None) - older_than
+    result = await db.execute(delete(Event).where(Event.created_at < cutoff))
+    return result.rowcount
+
+
+async def prune_expired_events() -> int:
+    """Delete the current database's events past ``event_retention_hours``."""
+    retention = timedelta(hours=get_settings().event_retention_hours)
+    async with async_session() as db:
+        pruned = await prune_events(db, retention)
+        await db.commit()
+    return pruned
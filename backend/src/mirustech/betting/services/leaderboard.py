@@ -0,0 +1,126 @@
+"""Leaderboard service keeping daily per-user totals and ranking windows of them.
+
+Placing and resolving wagers add to one ``UserDailyStats`` row per user and
+day, so a rolling window is a sum over at most ``days`` rows per user, however
+many wagers they placed.
+"""
+
+from collections import defaultdict
+from datetime import UTC, date, datetime, timedelta
+from typing import Literal
+
+from sqlalchemy import Float, cast, func, select
+from sqlalchemy.dialects.sqlite import Insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from mirustech.betting.models import User, UserDailyStats, Wager
+from mirustech.betting.serialization import JSONDict
+from mirustech.betting.tracing import trace_methods
+
+LeaderboardWindow = Literal["7d", "30d"]
+LeaderboardMetric = Literal["profit", "roi"]
+
+# Days in each window, today included
+WINDOW_DAYS: dict[str, int] = {"7d": 7, "30d": 30}
+
+
+def _add_to_days(*columns: str) -> Insert:
+    """Build an upsert adding ``columns`` to existing rows of the same user and day."""
+    stats = UserDailyStats.__table__
+    statement = sqlite_insert(stats)
+    return statement.on_conflict_do_update(
+        index_elements=[stats.c.user_id, stats.c.day],
+        set_={column: stats.c[column] + statement.excluded[column] for column in columns},
+    )
+
+
+@trace_methods
+class LeaderboardService:
+    """Service for daily per-user totals and the leaderboards built from them."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def record_stakes(self, wagers: list[Wager]) -> None:
+        """Add flushed wagers to their users' stakes for the day they were placed."""
+        staked: dict[tuple[int, date], int] = defaultdict(int)
+        for wager in wagers:
+            staked[wager.user_id, wager.created_at.date()] += wager.amount
+        await self.db.execute(
+            _add_to_days("staked"),
+            [
+                {"user_id": user_id, "day": day, "staked": amount}
+                for (user_id, day), amount in staked.items()
+            ],
+        )
+
+    async def record_settlements(self, day: date, wagers: list[Wager]) -> None:
+        """Add the stakes and payouts of wagers resolved on ``day`` to their users' totals."""
+        settled: dict[int, list[int]] = defaultdict(lambda: [0, 0])
+        for wager in wagers:
+            totals = settled[wager.user_id]
+            totals[0] += wager.amount
+            totals[1] += int(wager.payout or 0)
+        if not settled:
+            return
+        await self.db.execute(
+            _add_to_days("settled_stake", "payout"),
+            [
+                {"user_id": user_id, "day": day, "settled_stake": stake, "payout": payout}
+                for user_id, (stake, payout) in settled.items()
+            ],
+        )
+
+    async def rank(
+        self,
+        window: LeaderboardWindow,
+        metric: LeaderboardMetric,
+        limit: int,
+        min_stake: int = 0,
+    ) -> list[JSONDict]:
+        """Rank users by profit or return on settled stakes over the last ``window``.
+
+        Only users with wagers settled in the window are ranked; ``min_stake``
+        keeps a single lucky small wager from topping the ROI board.
+        """
+        since = datetime.now(UTC).date() - timedelta(days=WINDOW_DAYS[window] - 1)
+        settled_stake = func.sum(UserDailyStats.settled_stake)
+        profit = func.sum(UserDailyStats.payout) - settled_stake
+        totals = (
+            select(
+                UserDailyStats.user_id,
+                profit.label("profit"),
+                settled_stake.label("settled_stake"),
+                func.sum(UserDailyStats.staked).label("wagered"),
+            )
+            .where(UserDailyStats.day >= since)
+            .group_by(UserDailyStats.user_id)
+            .having(settled_stake > 0, settled_stake >= min_stake)
+            .subquery()
+        )
+        roi = cast(totals.c.profit, Float) / totals.c.settled_stake
+        order = totals.c.profit if metric == "profit" else roi
+        result = await self.db.execute(
+            select(
+                User.username,
+                totals.c.profit,
+                totals.c.settled_stake,
+                totals.c.wagered,
+                roi.label("roi"),
+            )
+            .join(totals, totals.c.user_id == User.id)
+            .order_by(order.desc(), User.id)
+            .limit(limit)
+        )
+        return [
+            {
+                "rank": rank,
+                "username": row.username,
+                "profit": row.profit,
+                "roi": round(row.roi, 4),
+                "settled_stake": row.settled_stake,
+                "wagered": row.wagered,
+            }
+            for rank, row in enumerate(result, start=1)
+        ]
@@ -0,0 +1,139 @@
+"""Odds history service for recording and reading per-bet odds time series."""
+
+from array import array
+from datetime import UTC, datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from mirustech.betting.config import get_settings
+from mirustech.betting.models import Bet, OddsHistory
+from mirustech.betting.serialization import JSONDict
+
+
+def _to_timestamp(dt: datetime) -> float:
+    """Convert a naive UTC datetime to epoch seconds."""
+    return dt.replace(tzinfo=UTC).timestamp()
+
+
+def _from_timestamp(ts: float) -> datetime:
+    """Convert epoch seconds to a naive UTC datetime."""
+    return datetime.fromtimestamp(ts, UTC).replace(tzinfo=None)
+
+
+class OddsSeries:
+    """Fixed-capacity, array-backed buffer of odds snapshots for one bet.
+
+    Each snapshot occupies ``stride`` consecutive doubles: the timestamp followed
+    by the odds of every outcome. When the buffer is full it is downsampled in
+    place by keeping the later snapshot of each adjacent pair, so long-running
+    bets keep coverage of their whole lifetime at a coarser resolution.
+    """
+
+    __slots__ = ("outcome_ids", "capacity", "stride", "data")
+
+    def __init__(self, outcome_ids: array, capacity: int, data: array | None = None):
+        self.outcome_ids = outcome_ids
+        self.capacity = max(capacity, 2)
+        self.stride = len(outcome_ids) + 1
+        self.data = data if data is not None else array("d")
+
+    @classmethod
+    def from_row(cls, row: OddsHistory, capacity: int) -> "OddsSeries":
+        """Decode a series from its packed database row."""
+        outcome_ids = array("q")
+        outcome_ids.frombytes(row.outcome_ids)
+        data = array("d")
+        data.frombytes(row.samples)
+        return cls(outcome_ids, capacity, data)
+
+    def __len__(self) -> int:
+        return len(self.data) // self.stride
+
+    def append(self, ts: float, odds: list[float]) -> None:
+        """Append a snapshot, downsampling first if the buffer is full."""
+        if len(self) >= self.capacity:
+            self._downsample()
+        self.data.append(ts)
+        self.data.extend(odds)
+
+    def _downsample(self) -> None:
+        """Halve the number of snapshots, keeping the later one of each pair."""
+        stride = self.stride
+        kept = array("d")
+        count = len(self)
+        # With an odd count the oldest snapshot has no partner and is kept as is
+        start = 0 if count % 2 == 0 else 1
+        if start:
+            kept.extend(self.data[0:stride])
+        for i in range(start + 1, count, 2):
+            kept.extend(self.data[i * stride : (i + 1) * stride])
+        self.data = kept
+
+    def bucketed(self, resolution: int) -> tuple[list[float], list[list[float]]]:
+        """Return at most ``resolution`` snapshots, one per fixed time bucket.
+
+        Odds are a step function of wagers, so each bucket is represented by the
+        last snapshot that falls into it.
+        """
+        stride = self.stride
+        count = len(self)
+        data = self.data
+        n_outcomes = stride - 1
+
+        if count <= resolution:
+            indices = list(range(count))
+        else:
+            first = data[0]
+            span = data[(count - 1) * stride] - first
+            width = span / resolution if span > 0 else 1.0
+            last_in_bucket: dict[int, int] = {}
+            for i in range(count):
+                bucket = min(int((data[i * stride] - first) / width), resolution - 1)
+                last_in_bucket[bucket] = i
+            indices = sorted(last_in_bucket.values())
+
+        timestamps = [data[i * stride] for i in indices]
+        odds = [[data[i * stride + 1 + j] for i in indices] for j in range(n_outcomes)]
+        return timestamps, odds
+
+
+class OddsHistoryService:
+    """Service for appending and serving odds snapshots."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def record(self, bet: Bet, odds: list[JSONDict]) -> None:
+        """Append the current odds of a bet to its history."""
+        row = await self.db.get(OddsHistory, bet.id)
+        if row is None:
+            outcome_ids = array("q", (o["id"] for o in odds))
+            row = OddsHistory(bet_id=bet.id, outcome_ids=outcome_ids.tobytes())
+            self.db.add(row)
+            series = OddsSeries(outcome_ids, get_settings().odds_history_capacity)
+        else:
+            series = OddsSeries.from_row(row, get_settings().odds_history_capacity)
+
+        now = datetime.now(UTC).replace(tzinfo=None)
+        odds_by_id = {o["id"]: o["odds"] for o in odds}
+        series.append(_to_timestamp(now), [odds_by_id.get(oid, 0.0) for oid in series.outcome_ids])
+        row.samples = series.data.tobytes()
+
+    async def get_history(self, bet_id: int, resolution: int) -> JSONDict | None:
+        """Get a downsampled ``OddsHistoryResponse``, or None if the bet does not exist."""
+        row = await self.db.get(OddsHistory, bet_id)
+        if row is None:
+            exists = await self.db.scalar(select(Bet.id).where(Bet.id == bet_id))
+            if exists is None:
+                return None
+            return {"bet_id": bet_id, "outcome_ids": [], "timestamps": [], "odds": []}
+
+        series = OddsSeries.from_row(row, get_settings().odds_history_capacity)
+        timestamps, odds = series.bucketed(resolution)
+        return {
+            "bet_id": bet_id,
+            "outcome_ids": list(series.outcome_ids),
+            "timestamps": [_from_timestamp(ts) for ts in timestamps],
+            "odds": odds,
+        }
@@ -1,13 +1,54 @@
 """Payout service for resolving bets and distributing winnings."""
 
+from collections import defaultdict
+from datetime import UTC, datetime
+
 from fastapi import HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import bindparam, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
+from mirustech.betting.cache import (
+    LISTING_TAG,
+    bet_tag,
+    get_response_cache,
+    invalidate_after_commit,
+)
+from mirustech.betting.database import run_after_commit
 from mirustech.betting.models import Bet, BetStatus, Outcome, User, Wager
+from mirustech.betting.serialization import JSONDict
+from mirustech.betting.services.bet_book import get_bet_book
+from mirustech.betting.services.events import record_event
+from mirustech.betting.services.leaderboard import LeaderboardService
+from mirustech.betting.tracing import trace_methods
+
+
+def distribute_pool(pool: int, stakes: list[tuple[int, int]]) -> dict[int, int]:
+    """Split a pool in whole coins proportionally to ``(wager_id, weighted_stake)`` pairs.
+
+    Each wager gets ``pool * stake // total_stake`` coins, and the coins left
+    over by rounding down go one each to the wagers with the largest remainders,
+    earlier wagers first on ties. Payouts therefore always sum to exactly the
+    pool, unless there are no winning stakes, in which case nothing is paid.
+    """
+    total_stake = sum(stake for _, stake in stakes)
+    if total_stake <= 0:
+        return {}
+
+    payouts: dict[int, int] = {}
+    remainders: list[tuple[int, int]] = []
+    for wager_id, stake in stakes:
+        payouts[wager_id], remainder = divmod(pool * stake, total_stake)
+        remainders.append((-remainder, wager_id))
 
+    leftover = pool - sum(payouts.values())
+    for _, wager_id in sorted(remainders)[:leftover]:
+        payouts[wager_id] += 1
+    return payouts
 
+
+@trace_methods
 class PayoutService:
     """Service for resolving bets and calculating payouts."""
 
@@ -16,11 +57,11 @@ class PayoutService:
 
     async def resolve_bet(self, bet_id: int, winning_outcome_id: int, resolver: User) -> Bet:
         """Resolve a bet by selecting the winning outcome and distributing payouts."""
-        # Load bet with all relationships
+        # Load bet with outcomes and creator
         result = await self.db.execute(
             select(Bet)
             .options(
-                selectinload(Bet.outcomes).selectinload(Outcome.wagers).selectinload(Wager.user),
+                selectinload(Bet.outcomes),
                 selectinload(Bet.creator),
             )
             .where(Bet.id == bet_id)
@@ -52,49 +93,180 @@ class PayoutService:
                 detail="Invalid winning outcome",
             )
 
-        # Calculate and distribute payouts
-        total_pool = bet.total_pool
-        winning_weighted_total = winning_outcome.weighted_total
-
-        if winning_weighted_total > 0:
-            for wager in winning_outcome.wagers:
-                # payout = (user_weighted_wager / total_weighted_on_winner) * total_pool
-                user_weighted = wager.amount * wager.weight
-                payout = (user_weighted / winning_weighted_total) * total_pool
-                payout = int(payout)  # Round down to whole coins
-
-                wager.payout = payout
-                wager.user.balance += payout
+        # Update bet status before reading the wagers. The write takes the
+        # database write lock, so every wager committed before it is read below,
+        # and wagers placed later are refused as their version bump requires an
+        # OPEN bet.
+        resolved = {
+            "status": BetStatus.RESOLVED,
+            "winning_outcome_id": winning_outcome_id,
+            "resolved_at": datetime.now(UTC).replace(tzinfo=None),
+        }
+        version = await self.db.scalar(
+            update(Bet)
+            .where(Bet.id == bet_id, Bet.status != BetStatus.RESOLVED)
+            .values(**resolved, version=Bet.version + 1)
+            .returning(Bet.version)
+            .execution_options(synchronize_session=False)
+        )
+        if version is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Bet has already been resolved",
+            )
+        for key, value in {**resolved, "version": version}.items():
+            set_committed_value(bet, key, value)
 
-        # Mark losing wagers with 0 payout
-        for outcome in bet.outcomes:
-            if outcome.id != winning_outcome_id:
-                for wager in outcome.wagers:
-                    wager.payout = 0
+        # Calculate and distribute payouts; losing wagers get 0
+        result = await self.db.execute(
+            select(Wager)
+            .join(Outcome, Wager.outcome_id == Outcome.id)
+            .where(Outcome.bet_id == bet_id)
+        )
+        wagers = result.scalars().all()
+        total_pool = sum(wager.amount for wager in wagers)
+        payouts = distribute_pool(
+            total_pool,
+            [(w.id, w.weighted_stake) for w in wagers if w.outcome_id == winning_outcome_id],
+        )
+        winnings: dict[int, int] = defaultdict(int)
+        for wager in wagers:
+            wager.payout = payouts.get(wager.id, 0)
+            winnings[wager.user_id] += payouts.get(wager.id, 0)
 
-        # Update bet status
-        bet.status = BetStatus.RESOLVED
-        bet.winning_outcome_id = winning_outcome_id
+        # Credit balances in SQL, so concurrent changes to them are not overwritten
+        credits = [
+            {"winner_id": user_id, "amount": amount}
+            for user_id, amount in winnings.items()
+            if amount
+        ]
+        if credits:
+            users = User.__table__
+            await self.db.execute(
+                update(users)
+                .where(users.c.id == bindparam("winner_id"))
+                .values(balance=users.c.balance + bindparam("amount")),
+                credits,
+            )
+        await LeaderboardService(self.db).record_settlements(
+            resolved["resolved_at"].date(), list(wagers)
+        )
 
         await self.db.flush()
+        book = get_bet_book()
+        run_after_commit(self.db, lambda: book.discard(bet_id))
+        invalidate_after_commit(self.db, [LISTING_TAG, bet_tag(bet_id)])
+        record_event(
+            self.db,
+            "bet.resolved",
+            bet.id,
+            winning_outcome_id=winning_outcome_id,
+            total_pool=total_pool,
+        )
+        return bet
+
+    async def get_bet_to_preview(self, bet_id: int, requester: User) -> Bet:
+        """Get a bet with its outcomes for ``preview_resolution``, if the requester created it."""
+        bet = await self.db.get(Bet, bet_id, options=[selectinload(Bet.outcomes)])
+        if not bet:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bet not found")
+        if bet.creator_id != requester.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only the bet creator can preview this bet's resolution",
+            )
         return bet
 
+    async def preview_resolution(self, bet: Bet) -> JSONDict:
+        """Compute what resolving a bet would pay each bettor under every outcome.
+
+        Payouts use ``distribute_pool`` on the same stakes as ``resolve_bet``,
+        so each row matches settlement to the coin; it breaks ties by wager id,
+        so wagers need not be read in order. One query reads the wagers as
+        plain rows, each outcome's pool is split once over its own stakes and
+        the payouts are summed per bettor. Returns a
+        ``ResolutionPreview`` with bettors ordered by total stake, largest
+        first.
+        """
+        # Core rather than ORM columns, sparing the ORM's per-row processing
+        wagers, outcomes_table, users = Wager.__table__, Outcome.__table__, User.__table__
+        of_bet = wagers.join(outcomes_table, wagers.c.outcome_id == outcomes_table.c.id)
+        result = await self.db.execute(
+            select(
+                wagers.c.id,
+                wagers.c.outcome_id,
+                wagers.c.user_id,
+                wagers.c.amount,
+                wagers.c.weighted_stake,
+            )
+            .select_from(of_bet)
+            .where(outcomes_table.c.bet_id == bet.id)
+        )
+        stakes: dict[int, list[tuple[int, int]]] = {o.id: [] for o in bet.outcomes}
+        owners: dict[int, int] = {}
+        staked: dict[int, int] = defaultdict(int)
+        for wager_id, outcome_id, user_id, amount, weighted_stake in result:
+            stakes[outcome_id].append((wager_id, weighted_stake))
+            owners[wager_id] = user_id
+            staked[user_id] += amount
+        bettors = (
+            select(wagers.c.user_id).select_from(of_bet).where(outcomes_table.c.bet_id == bet.id)
+        )
+        names = await self.db.execute(
+            select(users.c.id, users.c.username).where(users.c.id.in_(bettors))
+        )
+        usernames = dict(names.all())
+        total_pool = sum(staked.values())
+
+        user_ids = sorted(staked, key=lambda user_id: (-staked[user_id], user_id))
+        column = {user_id: index for index, user_id in enumerate(user_ids)}
+        outcomes = sorted(bet.outcomes, key=lambda o: o.id)
+        payouts = []
+        for outcome in outcomes:
+            row = [0] * len(user_ids)
+            for wager_id, payout in distribute_pool(total_pool, stakes[outcome.id]).items():
+                row[column[owners[wager_id]]] += payout
+            payouts.append(row)
+
+        return {
+            "bet_id": bet.id,
+            "total_pool": total_pool,
+            "outcome_ids": [o.id for o in outcomes],
+            "outcome_names": [o.name for o in outcomes],
+            "user_ids": user_ids,
+            "usernames": [usernames[user_id] for user_id in user_ids],
+            "staked": [staked[user_id] for user_id in user_ids],
+            "payouts": payouts,
+        }
+
     async def close_expired_bets(self) -> int:
         """Close all bets that have passed their close time."""
-        from datetime import UTC, datetime
-
         result = await self.db.execute(
-            select(Bet).where(
+            select(Bet.id).where(
                 Bet.status == BetStatus.OPEN,
                 Bet.close_time <= datetime.now(UTC).replace(tzinfo=None),
             )
         )
-        bets = result.scalars().all()
-
-        count = 0
-        for bet in bets:
-            bet.status = BetStatus.CLOSED
-            count += 1
+        expired = list(result.scalars().all())
+        if not expired:
+            return 0
 
-        await self.db.flush()
-        return count
+        # Only bets this statement closed get an event, not ones a concurrent
+        # request closed first
+        result = await self.db.execute(
+            update(Bet)
+            .where(Bet.id.in_(expired), Bet.status == BetStatus.OPEN)
+            .values(status=BetStatus.CLOSED, version=Bet.version + 1)
+            .returning(Bet.id)
+        )
+        closed = list(result.scalars().all())
+        for bet_id in closed:
+            record_event(self.db, "bet.closed", bet_id)
+        book = get_bet_book()
+        run_after_commit(self.db, lambda: book.discard_all(closed))
+        # Reads close bets before they look at the cache, so invalidate at once
+        # too: the reading request must not be served these bets as open
+        tags = [LISTING_TAG, *(bet_tag(bet_id) for bet_id in closed)]
+        get_response_cache().invalidate(tags)
+        invalidate_after_commit(self.db, tags)
+        return len(closed)
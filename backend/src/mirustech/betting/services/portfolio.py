@@ -0,0 +1,106 @@
+"""Portfolio service valuing a user's unresolved wagers at the current pools."""
+
+from itertools import groupby
+from operator import itemgetter
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from mirustech.betting.models import Bet, BetStatus, Outcome, User, Wager
+from mirustech.betting.serialization import JSONDict
+from mirustech.betting.services.payout import distribute_pool
+from mirustech.betting.tracing import trace_methods
+
+
+@trace_methods
+class PortfolioService:
+    """Service for a user's open positions and what they would pay."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_portfolio(self, user: User) -> JSONDict:
+        """Value the user's wagers on every open or closed, unresolved bet.
+
+        One query returns each outcome of those bets with its wagers. A
+        position pays, if an outcome wins, what settlement would pay the
+        user's wagers on it: ``distribute_pool`` splits the whole pool over
+        that outcome's weighted stakes, leftover coins included, so payouts
+        match the resolution preview to the coin. The expected payout weighs
+        each outcome by its share of the pool, the odds the market implies;
+        the best and worst cases are the largest and smallest payouts over all
+        outcomes. Positions are ordered by close time.
+        """
+        my_bets = (
+            select(Outcome.bet_id)
+            .join(Wager, Wager.outcome_id == Outcome.id)
+            .where(Wager.user_id == user.id)
+        )
+        result = await self.db.execute(
+            select(
+                Bet.id,
+                Bet.title,
+                Bet.status,
+                Bet.close_time,
+                Outcome.id,
+                Outcome.name,
+                Wager.id,
+                Wager.user_id,
+                Wager.amount,
+                Wager.weighted_stake,
+            )
+            .join(Outcome, Outcome.bet_id == Bet.id)
+            .outerjoin(Wager, Wager.outcome_id == Outcome.id)
+            .where(Bet.id.in_(my_bets), Bet.status != BetStatus.RESOLVED)
+            .order_by(Bet.close_time, Bet.id, Outcome.id)
+        )
+
+        positions: list[JSONDict] = []
+        totals = {"staked": 0, "expected_payout": 0.0, "best_case": 0, "worst_case": 0}
+        for bet_id, group in groupby(result, key=itemgetter(0)):
+            rows = list(group)
+            _, title, bet_status, close_time, *_ = rows[0]
+            total_pool = sum(row[8] or 0 for row in rows)
+            outcomes = []
+            expected = 0.0
+            for outcome_id, outcome_group in groupby(rows, key=itemgetter(4)):
+                outcome_rows = list(outcome_group)
+                # Outcomes without wagers have one row of NULL wager columns
+                wagers = [row[6:] for row in outcome_rows if row[6] is not None]
+                mine = [wager for wager in wagers if wager[1] == user.id]
+                pool = sum(amount for _, _, amount, _ in wagers)
+                shares = distribute_pool(
+                    total_pool, [(wager_id, stake) for wager_id, _, _, stake in wagers]
+                )
+                payout = sum(shares.get(wager_id, 0) for wager_id, *_ in mine)
+                if total_pool:
+                    expected += payout * pool / total_pool
+                outcomes.append(
+                    {
+                        "outcome_id": outcome_id,
+                        "name": outcome_rows[0][5],
+                        "pool": pool,
+                        "staked": sum(amount for _, _, amount, _ in mine),
+                        "projected_payout": payout,
+                    }
+                )
+            payouts = [outcome["projected_payout"] for outcome in outcomes]
+            position = {
+                "bet_id": bet_id,
+                "title": title,
+                "status": bet_status,
+                "close_time": close_time,
+                "total_pool": total_pool,
+                "staked": sum(outcome["staked"] for outcome in outcomes),
+                "expected_payout": round(expected, 2),
+                "best_case": max(payouts),
+                "worst_case": min(payouts),
+                "outcomes": outcomes,
+            }
+            positions.append(position)
+            totals["staked"] += position["staked"]
+            totals["expected_payout"] += expected
+            totals["best_case"] += position["best_case"]
+            totals["worst_case"] += position["worst_case"]
+        totals["expected_payout"] = round(totals["expected_payout"], 2)
+        return {"bets": len(positions), **totals, "positions": positions}
@@ -0,0 +1,245 @@
+"""Per-office databases.
+
+Each office has its own SQLite file, ``<tenants_directory>/<office>.db``, with
+its own engine, so offices never wait for each other's write lock. Requests
+are routed by the ``office`` claim of their access token, or before login by
+the ``X-Office`` header; requests with neither use the main database.
+
+Office databases are brought up to date the first time this process opens
+them; ``migrate`` upgrades all of them at once.
+
+Usage:
+    python -m mirustech.betting.tenancy provision acme globex
+    python -m mirustech.betting.tenancy migrate
+    python -m mirustech.betting.tenancy list
+"""
+
+import argparse
+import asyncio
+import re
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any
+
+from jose import JWTError, jwt
+from sqlalchemy import func, select
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from mirustech.betting.config import get_settings
+from mirustech.betting.database import (
+    async_session,
+    current_tenant,
+    dispose_engine,
+    get_tenant_engines,
+    init_db,
+)
+from mirustech.betting.models import Bet, BetStatus, User, Wager
+from mirustech.betting.serialization import FastJSONResponse, JSONDict
+
+# Access token claim and request header naming the office
+TENANT_CLAIM = "office"
+TENANT_HEADER = "x-office"
+
+# Lowercase letters, digits and dashes; archive files ("<office>_archive.db") never match
+_TENANT_ID = re.compile(r"[a-z0-9][a-z0-9-]{0,62}")
+
+_schema_locks: dict[str, asyncio.Lock] = {}
+_migrated: set[str] = set()
+
+
+def tenancy_enabled() -> bool:
+    """Check whether offices have their own databases."""
+    return bool(get_settings().tenants_directory)
+
+
+def is_valid_tenant(tenant: str) -> bool:
+    """Check whether ``tenant`` is usable as an office id."""
+    return _TENANT_ID.fullmatch(tenant) is not None
+
+
+def tenant_exists(tenant: str) -> bool:
+    """Check whether an office has been provisioned."""
+    if not tenancy_enabled() or not is_valid_tenant(tenant):
+        return False
+    return (Path(get_settings().tenants_directory or "") / f"{tenant}.db").is_file()
+
+
+def list_tenants() -> list[str]:
+    """List the provisioned offices."""
+    if not tenancy_enabled():
+        return []
+    directory = Path(get_settings().tenants_directory or "")
+    return sorted(path.stem for path in directory.glob("*.db") if is_valid_tenant(path.stem))
+
+
+async def _open_tenant(tenant: str) -> None:
+    """Bring an office's schema up to date the first time this process uses it."""
+    if tenant in _migrated:
+        return
+    lock = _schema_locks.setdefault(tenant, asyncio.Lock())
+    async with lock:
+        if tenant in _migrated:
+            return
+        token = current_tenant.set(tenant)
+        try:
+            await init_db()
+        finally:
+            current_tenant.reset(token)
+        _migrated.add(tenant)
+
+
+@asynccontextmanager
+async def tenant_scope(tenant: str | None) -> AsyncIterator[None]:
+    """Use an office's database, or the main one for None, within the block.
+
+    The office's engine is kept open until the block exits.
+    """
+    if tenant is None:
+        token = current_tenant.set(None)
+        try:
+            yield
+        finally:
+            current_tenant.reset(token)
+        return
+
+    await _open_tenant(tenant)
+    engines = get_tenant_engines()
+    engines.acquire(tenant)
+    token = current_tenant.set(tenant)
+    try:
+        yield
+    finally:
+        current_tenant.reset(token)
+        engines.release(tenant)
+
+
+async def provision_tenant(tenant: str) -> bool:
+    """Create an office's database, returning False if it already existed."""
+    if not tenancy_enabled():
+        raise ValueError("Tenancy is not enabled; set BETTING_TENANTS_DIRECTORY")
+    if not is_valid_tenant(tenant):
+        raise ValueError(f"Invalid office id {tenant!r}")
+    existed = tenant_exists(tenant)
+    async with tenant_scope(tenant):
+        await init_db()
+    return not existed
+
+
+async def for_each_tenant(
+    func: Callable[[], Awaitable[Any]],
+    include_main: bool = True,
+) -> dict[str | None, Any]:
+    """Run ``func`` against every office's database concurrently.
+
+    Each call runs in its own task within ``tenant_scope``, so it sees only its
+    office's database; the main database is keyed None. At most
+    ``max_open_tenants`` calls run at once, so they do not evict each other.
+    """
+    tenants: list[str | None] = [None] if include_main else []
+    tenants.extend(list_tenants())
+    semaphore = asyncio.Semaphore(get_settings().max_open_tenants)
+
+    async def run(tenant: str | None) -> Any:
+        async with semaphore, tenant_scope(tenant):
+            return await func()
+
+    results = await asyncio.gather(*(run(tenant) for tenant in tenants))
+    return dict(zip(tenants, results, strict=True))
+
+
+async def migrate_tenants() -> int:
+    """Bring the main and every office database up to date, returning how many."""
+    return len(await for_each_tenant(init_db))
+
+
+async def summarize_tenant() -> JSONDict:
+    """Count the users, coins, open bets and wagers of the current database."""
+    async with async_session() as db:
+        users, coins = (
+            await db.execute(select(func.count(User.id), func.coalesce(func.sum(User.balance), 0)))
+        ).one()
+        open_bets = await db.scalar(select(func.count(Bet.id)).where(Bet.status == BetStatus.OPEN))
+        wagers = await db.scalar(select(func.count(Wager.id)))
+    return {"users": users, "coins": coins, "open_bets": open_bets, "wagers": wagers}
+
+
+def resolve_tenant(authorization: str | None, office: str | None) -> str | None:
+    """Get the office a request is for.
+
+    A valid access token decides, even without an office claim, so the header
+    cannot redirect an authenticated request to another office's database.
+    Invalid tokens are ignored here and rejected by authentication.
+    """
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        settings = get_settings()
+        try:
+            claims = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
+        except JWTError:
+            pass
+        else:
+            return claims.get(TENANT_CLAIM)
+    return office
+
+
+class TenantMiddleware:
+    """Route each request to its office's database."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not tenancy_enabled():
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        tenant = resolve_tenant(headers.get("authorization"), headers.get(TENANT_HEADER))
+        if tenant is not None and not tenant_exists(tenant):
+            response = FastJSONResponse({"detail": "Unknown office"}, status_code=404)
+            await response(scope, receive, send)
+            return
+        async with tenant_scope(tenant):
+            await self.app(scope, receive, send)
+
+
+async def _run(command: str, tenants: list[str]) -> None:
+    try:
+        if command == "provision":
+            for tenant in tenants:
+                created = await provision_tenant(tenant)
+                print(f"{tenant}: {'created' if created else 'already exists, migrated'}")
+        elif command == "migrate":
+            print(f"Migrated {await migrate_tenants()} databases")
+        else:
+            for tenant in list_tenants():
+                print(tenant)
+    finally:
+        await dispose_engine()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m mirustech.betting.tenancy",
+        description="Provision and migrate per-office databases.",
+    )
+    parser.add_argument("command", choices=["provision", "migrate", "list"])
+    parser.add_argument("offices", nargs="*", help="Office ids to provision")
+    args = parser.parse_args(argv)
+
+    if not tenancy_enabled():
+        parser.error("tenancy is not enabled; set BETTING_TENANTS_DIRECTORY")
+    if args.command == "provision":
+        if not args.offices:
+            parser.error("provision requires at least one office id")
+        invalid = [office for office in args.offices if not is_valid_tenant(office)]
+        if invalid:
+            parser.error(f"invalid office ids: {', '.join(invalid)}")
+
+    asyncio.run(_run(args.command, args.offices))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""Lightweight request tracing.
+
+Every HTTP request starts a trace, sampled up front with probability
+``trace_sample_rate``. Within a sampled trace, ``span`` records nested
+timings: the route (dependency resolution, handler and serialization), each
+dependency and handler, service methods, the commit and every SQL statement.
+Outside a sampled trace a span costs one context variable lookup.
+
+Every request gets a trace id, returned as ``X-Trace-Id`` and bound to
+structlog's context variables, so log lines can be matched to traces; with
+``log_requests`` every request is also logged as a ``request`` event. Finished
+sampled traces are kept in memory for ``/api/debug/traces`` and, when
+``trace_export_path`` is set, appended to it as one JSON line per span.
+"""
+
+import functools
+import heapq
+import inspect
+import random
+import secrets
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import Context, ContextVar
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import IO, Any
+
+import structlog
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from mirustech.betting.config import get_settings
+from mirustech.betting.serialization import JSONDict, dumps
+
+TRACE_HEADER = "X-Trace-Id"
+
+logger = structlog.get_logger()
+
+# Spans past this many in one trace are counted but not kept
+MAX_SPANS = 2000
+
+# Characters of SQL kept on statement spans
+_STATEMENT_LENGTH = 500
+
+
+@dataclass(slots=True)
+class Span:
+    """A named, timed operation within a trace."""
+
+    name: str
+    span_id: int
+    parent_id: int | None
+    start: float
+    end: float | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+
+class Trace:
+    """The spans recorded for one request."""
+
+    def __init__(self, trace_id: str, name: str, sampled: bool) -> None:
+        self.trace_id = trace_id
+        self.name = name
+        self.sampled = sampled
+        self.started_at = datetime.now(UTC).replace(tzinfo=None)
+        self.spans: list[Span] = []
+        self.dropped = 0
+        self._next_id = 1
+
+    def start_span(self, name: str, parent: Span | None, attributes: dict[str, Any]) -> Span:
+        parent_id = parent.span_id if parent else None
+        span = Span(name, self._next_id, parent_id, time.perf_counter(), attributes=attributes)
+        self._next_id += 1
+        if len(self.spans) < MAX_SPANS:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+        return span
+
+    @property
+    def duration_ms(self) -> float:
+        root = self.spans[0] if self.spans else None
+        if root is None or root.end is None:
+            return 0.0
+        return (root.end - root.start) * 1000
+
+    def span_dicts(self) -> list[JSONDict]:
+        """Render the spans with times in milliseconds from the start of the trace."""
+        origin = self.spans[0].start if self.spans else 0.0
+        return [
+            {
+                "span_id": span.span_id,
+                "parent_id": span.parent_id,
+                "name": span.name,
+                "start_ms": round((span.start - origin) * 1000, 3),
+                "duration_ms": (
+                    round((span.end - span.start) * 1000, 3) if span.end is not None else None
+                ),
+                **({"attributes": span.attributes} if span.attributes else {}),
+            }
+            for span in self.spans
+        ]
+
+    def to_dict(self) -> JSONDict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 3),
+            "dropped_spans": self.dropped,
+            "spans": self.span_dicts(),
+        }
+
+
+_current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def current_trace_id() -> str | None:
+    """Get the id of the trace of the current request, sampled or not."""
+    trace = _current_trace.get()
+    return trace.trace_id if trace is not None else None
+
+
+def trace_name_of(context: Context) -> str | None:
+    """Get the name of the trace running in ``context``, e.g. another task's."""
+    trace = context.get(_current_trace)
+    return trace.name if trace is not None else None
+
+
+def name_trace(name: str) -> None:
+    """Rename the current trace, e.g. to the route template once it is known."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.name = name
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | None]:
+    """Time the block as a child of the current span; a no-op unless sampled."""
+    trace = _current_trace.get()
+    if trace is None or not trace.sampled:
+        yield None
+        return
+    current = trace.start_span(name, _current_span.get(), attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as exc:
+        current.attributes["error"] = type(exc).__name__
+        raise
+    finally:
+        current.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+def traced(name: str | None = None) -> Callable[[Any], Any]:
+    """Decorate a coroutine function to run within a span, named after it by default.
+
+    The wrapper keeps the function's signature, so it can decorate FastAPI
+    dependencies and handlers.
+    """
+
+    def decorate(func: Any) -> Any:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(span_name):
+                return await func(*args, **kwargs)
+
+        wrapper.__traced__ = True  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorate
+
+
+def trace_methods(cls: Any) -> Any:
+    """Class decorator running each public coroutine method within a span.
+
+    Synchronous methods only shape data already in memory and are left alone,
+    so per-bet helpers do not flood traces.
+    """
+    for attribute, value in list(vars(cls).items()):
+        if not attribute.startswith("_") and inspect.iscoroutinefunction(value):
+            setattr(cls, attribute, traced(f"{cls.__name__}.{attribute}")(value))
+    return cls
+
+
+class TracedRoute(APIRoute):
+    """Route recording spans for itself and its handler.
+
+    The route span covers dependency resolution, the handler and serializing
+    the response.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        if inspect.iscoroutinefunction(endpoint) and not hasattr(endpoint, "__traced__"):
+            endpoint = traced(f"handler {endpoint.__name__}")(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Any]:
+        handler = super().get_route_handler()
+        path = self.path_format
+
+        async def traced_handler(request: Request) -> Response:
+            name_trace(f"{request.method} {path}")
+            with span("route", path=path):
+                return await handler(request)
+
+        return traced_handler
+
+
+class _RecentTraces:
+    """The most recent finished sampled traces, optionally exported as JSON lines."""
+
+    def __init__(self) -> None:
+        self._traces: deque[Trace] = deque(maxlen=get_settings().trace_buffer_size)
+        self._export_file: IO[bytes] | None = None
+
+    def add(self, trace: Trace) -> None:
+        self._traces.append(trace)
+        path = get_settings().trace_export_path
+        if path:
+            self._export(trace, path)
+
+    def slowest(self, limit: int, min_duration_ms: float = 0.0) -> list[Trace]:
+        candidates = (trace for trace in self._traces if trace.duration_ms >= min_duration_ms)
+        return heapq.nlargest(limit, candidates, key=lambda trace: trace.duration_ms)
+
+    def get(self, trace_id: str) -> Trace | None:
+        return next((trace for trace in self._traces if trace.trace_id == trace_id), None)
+
+    def _export(self, trace: Trace, path: str) -> None:
+        if self._export_file is None or self._export_file.name != path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._export_file = open(path, "ab")  # noqa: SIM115 - kept open between traces
+        lines = (
+            dumps({"trace_id": trace.trace_id, "trace": trace.name, **span}) + b"\n"
+            for span in trace.span_dicts()
+        )
+        self._export_file.write(b"".join(lines))
+        self._export_file.flush()
+
+
+_recent: _RecentTraces | None = None
+
+
+def get_recent_traces() -> _RecentTraces:
+    """Get the buffer of finished sampled traces."""
+    global _recent
+    if _recent is None:
+        _recent = _RecentTraces()
+    return _recent
+
+
+class TracingMiddleware:
+    """Start a trace for each request, sampling a share of them in full."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = secrets.token_hex(16)
+        sampled = random.random() < get_settings().trace_sample_rate
+        trace = Trace(trace_id, f"{scope['method']} {scope['path']}", sampled)
+        trace_token = _current_trace.set(trace)
+        log_tokens = structlog.contextvars.bind_contextvars(trace_id=trace_id)
+        status_code = 500
+
+        async def send_with_trace_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)[TRACE_HEADER] = trace_id
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            with span("request", method=scope["method"], path=scope["path"]) as root:
+                await self.app(scope, receive, send_with_trace_id)
+                if root is not None:
+                    root.attributes["status"] = status_code
+        finally:
+            if get_settings().log_requests:
+                # Named by route template once routing has run, e.g. "GET /api/bets/{bet_id}"
+                logger.info(
+                    "request",
+                    route=trace.name,
+                    path=scope["path"],
+                    status=status_code,
+                    duration_ms=round((time.perf_counter() - started) * 1000, 3),
+                )
+            structlog.contextvars.reset_contextvars(**log_tokens)
+            _current_trace.reset(trace_token)
+        if sampled:
+            get_recent_traces().add(trace)
+
+
+def _before_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+) -> None:
+    trace = _current_trace.get()
+    if trace is None or not trace.sampled:
+        return
+    attributes: dict[str, Any] = {"statement": statement[:_STATEMENT_LENGTH]}
+    if executemany:
+        attributes["executemany"] = True
+    context._trace_span = trace.start_span("sql", _current_span.get(), attributes)
+
+
+def _after_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+) -> None:
+    sql_span: Span | None = getattr(context, "_trace_span", None)
+    if sql_span is not None:
+        sql_span.end = time.perf_counter()
+        if cursor.rowcount >= 0:
+            sql_span.attributes["rows"] = cursor.rowcount
+
+
+def _handle_error(exception_context: Any) -> None:
+    sql_span: Span | None = getattr(exception_context.execution_context, "_trace_span", None)
+    if sql_span is not None and sql_span.end is None:
+        sql_span.end = time.perf_counter()
+        sql_span.attributes["error"] = type(exception_context.original_exception).__name__
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Record each SQL statement run on ``engine`` as a span of the current trace.
+
+    Statements run in SQLAlchemy's greenlet, which shares the context of the
+    awaiting task, so they nest under the span that issued them.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
@@ -0,0 +1,83 @@
+"""Fixtures running the app against a fresh SQLite database per test."""
+
+from collections.abc import AsyncIterator, Awaitable, Callable
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+import httpx
+import pytest
+
+from mirustech.betting.config import Settings, configure_settings
+from mirustech.betting.database import dispose_engine, init_db
+from mirustech.betting.main import create_app
+
+Headers = dict[str, str]
+
+
+@pytest.fixture
+def settings(tmp_path: Path) -> Settings:
+    """Settings with the database in the test's temporary directory.
+
+    Override this fixture in a test module to run the app with other settings.
+    """
+    return Settings(
+        database_url=f"sqlite+aiosqlite:///{tmp_path}/betting.db",
+        # Bet ids repeat across tests, so no response may outlive one
+        response_cache_ttl_seconds=0,
+        log_format="console",
+        log_level="WARNING",
+    )
+
+
+@pytest.fixture
+async def client(settings: Settings) -> AsyncIterator[httpx.AsyncClient]:
+    """A client of an app running with ``settings``."""
+    app = create_app(settings)
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            yield client
+
+
+@pytest.fixture
+async def database(settings: Settings) -> AsyncIterator[None]:
+    """Activate ``settings`` and bring their database up to date, without starting the app."""
+    configure_settings(settings)
+    await init_db()
+    yield
+    await dispose_engine()
+
+
+@pytest.fixture
+def register(client: httpx.AsyncClient) -> Callable[[str], Awaitable[Headers]]:
+    """Register a user, returning the headers authenticating as them."""
+
+    async def register(username: str) -> Headers:
+        credentials = {"username": username, "password": "password"}
+        response = await client.post("/api/auth/register", json=credentials)
+        assert response.status_code == 201, response.text
+        response = await client.post("/api/auth/login", data=credentials)
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    return register
+
+
+@pytest.fixture
+def create_bet(
+    client: httpx.AsyncClient,
+) -> Callable[..., Awaitable[dict[str, Any]]]:
+    """Create an open bet as the given user, returning its detail response."""
+
+    async def create_bet(headers: Headers, outcomes: int = 2, title: str = "Bet") -> dict[str, Any]:
+        close_time = datetime.now(UTC) + timedelta(hours=1)
+        body = {
+            "title": title,
+            "outcomes": [{"name": f"Outcome {i}"} for i in range(outcomes)],
+            "close_time": close_time.isoformat(),
+        }
+        response = await client.post("/api/bets", json=body, headers=headers)
+        assert response.status_code == 201, response.text
+        return response.json()
+
+    return create_bet
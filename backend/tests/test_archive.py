@@ -0,0 +1,121 @@
+"""Tests of moving old resolved bets to the archive database."""
+
+import sqlite3
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from mirustech.betting.archive import _copy_batch
+from mirustech.betting.config import Settings
+from mirustech.betting.database import get_engine
+
+
+@pytest.fixture
+def settings(settings: Settings) -> Settings:
+    settings.admin_usernames = ["admin"]
+    return settings
+
+
+def _counts(path: Path, bet_id: int) -> tuple[int, int, int]:
+    """Count a bet's rows in one database file: the bet, its outcomes and its wagers."""
+    with sqlite3.connect(path) as conn:
+        counts = (
+            conn.execute("SELECT count(*) FROM bets WHERE id = ?", (bet_id,)).fetchone()[0],
+            conn.execute("SELECT count(*) FROM outcomes WHERE bet_id = ?", (bet_id,)).fetchone()[0],
+            conn.execute(
+                "SELECT count(*) FROM wagers JOIN outcomes ON outcomes.id = wagers.outcome_id"
+                " WHERE outcomes.bet_id = ?",
+                (bet_id,),
+            ).fetchone()[0],
+        )
+    conn.close()
+    return counts
+
+
+async def _resolved_bet(client, register, create_bet, tmp_path: Path, days_ago: int):
+    """Resolve a bet with two wagers, backdated by ``days_ago``, behind a newer open bet."""
+    admin = await register("admin")
+    bettor = await register("bettor")
+    bet = await create_bet(admin)
+    outcome_ids = [outcome["id"] for outcome in bet["outcomes"]]
+    for outcome_id in outcome_ids:
+        wager = {"outcome_id": outcome_id, "amount": 50}
+        await client.post(f"/api/bets/{bet['id']}/wager", json=wager, headers=bettor)
+    response = await client.post(
+        f"/api/bets/{bet['id']}/resolve",
+        json={"winning_outcome_id": outcome_ids[0]},
+        headers=admin,
+    )
+    assert response.status_code == 200, response.text
+
+    # Bets holding the newest ids stay in the main database
+    newer = await create_bet(admin, title="Newer")
+    wager = {"outcome_id": newer["outcomes"][0]["id"], "amount": 50}
+    await client.post(f"/api/bets/{newer['id']}/wager", json=wager, headers=bettor)
+
+    resolved_at = datetime.now(UTC).replace(tzinfo=None) - timedelta(days=days_ago)
+    with sqlite3.connect(tmp_path / "betting.db") as conn:
+        conn.execute("UPDATE bets SET resolved_at = ? WHERE id = ?", (resolved_at, bet["id"]))
+    conn.close()
+    return admin, bettor, bet
+
+
+async def _reads(client, bettor, bet_id: int) -> tuple[dict, list[dict]]:
+    response = await client.get(f"/api/bets/{bet_id}")
+    assert response.status_code == 200, response.text
+    history = (await client.get("/api/bets/users/me/wagers", headers=bettor)).json()
+    return response.json(), [wager for wager in history if wager["bet_id"] == bet_id]
+
+
+async def test_old_resolved_bets_move_to_the_archive(
+    client, register, create_bet, settings: Settings, tmp_path: Path
+) -> None:
+    days = settings.archive_after_days + 1
+    admin, bettor, bet = await _resolved_bet(client, register, create_bet, tmp_path, days)
+    before = await _reads(client, bettor, bet["id"])
+
+    response = await client.post("/api/admin/archive", headers=admin)
+    assert response.json() == {"archived": 1, "compacted": False}
+
+    assert _counts(tmp_path / "betting.db", bet["id"]) == (0, 0, 0)
+    assert _counts(tmp_path / "betting_archive.db", bet["id"]) == (1, 2, 2)
+    # Reads fall back to the archive
+    assert await _reads(client, bettor, bet["id"]) == before
+
+    response = await client.post("/api/admin/archive", headers=admin)
+    assert response.json() == {"archived": 0, "compacted": False}
+    assert _counts(tmp_path / "betting_archive.db", bet["id"]) == (1, 2, 2)
+
+
+async def test_recent_resolved_bets_stay(
+    client, register, create_bet, settings: Settings, tmp_path: Path
+) -> None:
+    days = settings.archive_after_days - 1
+    admin, _, bet = await _resolved_bet(client, register, create_bet, tmp_path, days)
+
+    response = await client.post("/api/admin/archive", headers=admin)
+    assert response.json()["archived"] == 0
+    assert _counts(tmp_path / "betting.db", bet["id"]) == (1, 2, 2)
+
+
+async def test_bets_left_in_both_files_are_read_once_and_removed(
+    client, register, create_bet, settings: Settings, tmp_path: Path
+) -> None:
+    days = settings.archive_after_days + 1
+    admin, bettor, bet = await _resolved_bet(client, register, create_bet, tmp_path, days)
+    before = await _reads(client, bettor, bet["id"])
+
+    # A batch interrupted between its copy and its delete
+    cutoff = datetime.now(UTC).replace(tzinfo=None) - timedelta(days=settings.archive_after_days)
+    async with get_engine().begin() as conn:
+        assert await conn.run_sync(_copy_batch, cutoff, 10) == [bet["id"]]
+    assert _counts(tmp_path / "betting.db", bet["id"]) == (1, 2, 2)
+    assert _counts(tmp_path / "betting_archive.db", bet["id"]) == (1, 2, 2)
+    assert await _reads(client, bettor, bet["id"]) == before
+
+    response = await client.post("/api/admin/archive", headers=admin)
+    assert response.json()["archived"] == 1
+    assert _counts(tmp_path / "betting.db", bet["id"]) == (0, 0, 0)
+    assert _counts(tmp_path / "betting_archive.db", bet["id"]) == (1, 2, 2)
+    assert await _reads(client, bettor, bet["id"]) == before
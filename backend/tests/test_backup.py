@@ -0,0 +1,149 @@
+"""Tests of online snapshots, verification and restores."""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from mirustech.betting.backup import (
+    Snapshot,
+    SnapshotInProgressError,
+    _locks,
+    list_snapshots,
+    load_snapshot,
+    prune_snapshots,
+    restore_snapshot,
+    take_snapshot,
+    verify_snapshot,
+)
+from mirustech.betting.config import Settings
+
+
+@pytest.fixture
+def source(settings: Settings, database: None, tmp_path: Path) -> Path:
+    """The migrated app database, holding ten users."""
+    path = tmp_path / "betting.db"
+    _add_users(path, range(10))
+    return path
+
+
+def _add_users(path: Path, numbers: range) -> None:
+    with sqlite3.connect(path) as conn:
+        conn.executemany(
+            "INSERT INTO users (username, password_hash, balance, created_at)"
+            " VALUES (?, '', 1000, '2026-01-01 00:00:00')",
+            [(f"user{i}",) for i in numbers],
+        )
+    conn.close()
+
+
+def _usernames(path: Path) -> list[str]:
+    with sqlite3.connect(path) as conn:
+        names = [name for (name,) in conn.execute("SELECT username FROM users ORDER BY id")]
+    conn.close()
+    return names
+
+
+def _rewrite_manifest(snapshot: Snapshot, **changes: object) -> Snapshot:
+    manifest = {**snapshot.manifest, **changes}
+    snapshot.path.with_name(f"{snapshot.name}.json").write_text(json.dumps(manifest))
+    return load_snapshot(snapshot.path)
+
+
+@pytest.mark.parametrize("compress", [True, False])
+async def test_snapshots_round_trip_through_restore(
+    source: Path, tmp_path: Path, compress: bool
+) -> None:
+    snapshot = take_snapshot(source, tmp_path / "backups", "main", compress)
+    assert snapshot.path.suffixes == ([".db", ".gz"] if compress else [".db"])
+    assert snapshot.manifest["tables"]["users"] == 10
+    assert verify_snapshot(snapshot) == []
+
+    _add_users(source, range(10, 15))
+    restore_snapshot(load_snapshot(snapshot.path), source)
+    assert _usernames(source) == [f"user{i}" for i in range(10)]
+    assert not list(tmp_path.glob("*.restore")) and not list(tmp_path.glob("**/*.partial"))
+
+
+async def test_corrupted_snapshots_are_not_restored(source: Path, tmp_path: Path) -> None:
+    snapshot = take_snapshot(source, tmp_path / "backups", "main", compress=False)
+    _add_users(source, range(10, 15))
+    original = source.read_bytes()
+
+    data = bytearray(snapshot.path.read_bytes())
+    data[len(data) // 2] ^= 0xFF
+    snapshot.path.write_bytes(bytes(data))
+    assert verify_snapshot(snapshot) == ["checksum does not match the manifest"]
+    with pytest.raises(RuntimeError, match="failed verification"):
+        restore_snapshot(snapshot, source)
+    assert source.read_bytes() == original
+    assert not list(tmp_path.glob("*.restore"))
+
+
+async def test_snapshots_with_other_row_counts_are_not_restored(
+    source: Path, tmp_path: Path
+) -> None:
+    snapshot = take_snapshot(source, tmp_path / "backups", "main", compress=False)
+    _add_users(source, range(10, 15))
+
+    # Rows added to the snapshot after the manifest was written, checksum updated
+    _add_users(snapshot.path, range(100, 102))
+    sha256 = hashlib.sha256(snapshot.path.read_bytes()).hexdigest()
+    with_rows = _rewrite_manifest(snapshot, sha256=sha256)
+    assert verify_snapshot(with_rows) == ["rows in users: expected 10, found 12"]
+    with pytest.raises(RuntimeError, match="rows in users"):
+        restore_snapshot(with_rows, source)
+    assert len(_usernames(source)) == 15
+    assert not list(tmp_path.glob("*.restore"))
+
+
+async def test_pruning_keeps_the_newest_snapshots(source: Path, tmp_path: Path) -> None:
+    directory = tmp_path / "backups"
+    taken = [take_snapshot(source, directory, "main", compress=True) for _ in range(4)]
+    other = take_snapshot(source, directory, "acme", compress=True)
+
+    assert prune_snapshots(directory, "main", keep=2) == 2
+    assert [s.name for s in list_snapshots(directory, "main")] == [
+        taken[3].name,
+        taken[2].name,
+    ]
+    assert not taken[0].path.exists() and not taken[1].path.exists()
+    assert [s.name for s in list_snapshots(directory, "acme")] == [other.name]
+    assert prune_snapshots(directory, "main", keep=2) == 0
+
+
+async def test_concurrent_snapshots_of_one_database_are_refused(
+    source: Path, tmp_path: Path, settings: Settings
+) -> None:
+    # One page per step with 40ms pauses makes the copy take over a second
+    _add_users(source, range(10, 500))
+    settings.backup_step_pages = 1
+    settings.backup_step_pause_ms = 40
+    directory = tmp_path / "backups"
+    results: list[Snapshot] = []
+    first = threading.Thread(
+        target=lambda: results.append(take_snapshot(source, directory, "main", compress=False))
+    )
+    first.start()
+    try:
+        while not ((lock := _locks.get(str(source.resolve()))) and lock.locked()):
+            time.sleep(0.001)
+        time.sleep(0.4)
+        with pytest.raises(SnapshotInProgressError):
+            take_snapshot(source, directory, "main", compress=False)
+        # A write during the copy restarts it
+        _add_users(source, range(500, 510))
+    finally:
+        first.join()
+
+    snapshot = results[0]
+    assert snapshot.manifest["restarts"] == 1
+    assert snapshot.manifest["tables"]["users"] == 510
+    assert verify_snapshot(snapshot) == []
+    # The lock is released, so the next snapshot goes ahead
+    settings.backup_step_pause_ms = 0
+    assert verify_snapshot(take_snapshot(source, directory, "main", compress=False)) == []
@@ -0,0 +1,71 @@
+"""Tests of creating bets in bulk and from templates."""
+
+from datetime import UTC, datetime, timedelta
+
+
+def _close_time(hours: float) -> str:
+    return (datetime.now(UTC) + timedelta(hours=hours)).isoformat()
+
+
+async def test_bulk_creation_keeps_the_order_of_bets_and_outcomes(client, register) -> None:
+    creator = await register("creator")
+    bets = [
+        {
+            "title": f"Match {i}",
+            "outcomes": [{"name": f"Match {i} outcome {j}"} for j in range(2 + i % 3)],
+            "close_time": _close_time(1 + i),
+        }
+        for i in range(25)
+    ]
+    response = await client.post("/api/bets/bulk", json={"bets": bets}, headers=creator)
+    assert response.status_code == 201, response.text
+    created = response.json()
+
+    assert [bet["title"] for bet in created] == [bet["title"] for bet in bets]
+    for bet, requested in zip(created, bets, strict=True):
+        assert [o["name"] for o in bet["outcomes"]] == [o["name"] for o in requested["outcomes"]]
+        assert bet["creator_username"] == "creator"
+        assert (await client.get(f"/api/bets/{bet['id']}")).json() == bet
+    listed = (await client.get("/api/bets?limit=100")).json()
+    assert {bet["id"] for bet in listed} == {bet["id"] for bet in created}
+
+
+async def test_bulk_creation_creates_nothing_when_one_bet_is_invalid(client, register) -> None:
+    creator = await register("creator")
+    valid = {"title": "Valid", "outcomes": [{"name": "A"}, {"name": "B"}]}
+    bets = [
+        {**valid, "close_time": _close_time(1)},
+        {**valid, "close_time": _close_time(-1)},
+    ]
+    response = await client.post("/api/bets/bulk", json={"bets": bets}, headers=creator)
+    assert response.status_code == 400, response.text
+    assert (await client.get("/api/bets")).json() == []
+
+
+async def test_template_creates_its_occurrences(client, register) -> None:
+    creator = await register("creator")
+    first_close = datetime.now(UTC) + timedelta(hours=1)
+    template = {
+        "title": "Standup #{n} on {date}",
+        "outcomes": ["On time", "Late"],
+        "first_close_time": first_close.isoformat(),
+        "interval": "P1D",
+        "occurrences": 3,
+    }
+    response = await client.post("/api/bet-templates", json=template, headers=creator)
+    assert response.status_code == 201, response.text
+    template_id = response.json()["id"]
+    # The first occurrence's betting window has begun, so it exists already
+    assert response.json()["next_occurrence"] == 1
+
+    response = await client.post(f"/api/bet-templates/{template_id}/bets?count=5", headers=creator)
+    assert response.status_code == 201, response.text
+    assert [bet["title"] for bet in response.json()] == [
+        f"Standup #{n} on {(first_close + timedelta(days=n - 1)).date().isoformat()}"
+        for n in (2, 3)
+    ]
+
+    response = await client.post(f"/api/bet-templates/{template_id}/bets", headers=creator)
+    assert response.status_code == 400
+    listed = (await client.get("/api/bets")).json()
+    assert sorted(bet["title"][:10] for bet in listed) == ["Standup #1", "Standup #2", "Standup #3"]
@@ -0,0 +1,129 @@
+"""Tests of the response cache: invalidation, coalescing and office scoping."""
+
+import asyncio
+
+import pytest
+
+from mirustech.betting import cache
+from mirustech.betting.cache import MemoryCacheBackend, ResponseCache, bet_tag
+from mirustech.betting.config import Settings
+from mirustech.betting.database import current_tenant
+
+TTL = 60.0
+
+
+@pytest.fixture
+def settings(settings: Settings, monkeypatch: pytest.MonkeyPatch) -> Settings:
+    settings.response_cache_ttl_seconds = TTL
+    # The process-wide cache is built from the settings on first use
+    monkeypatch.setattr(cache, "_cache", None)
+    return settings
+
+
+@pytest.fixture
+def response_cache() -> ResponseCache:
+    return ResponseCache(MemoryCacheBackend(1024 * 1024), TTL)
+
+
+def _compute(body: bytes, tags: list[str], calls: list[bytes], release=None):
+    async def compute() -> cache.Computed:
+        calls.append(body)
+        if release is not None:
+            await release.wait()
+        return body, tags, None
+
+    return compute
+
+
+async def test_wagers_invalidate_cached_details(client, register, create_bet) -> None:
+    creator = await register("creator")
+    bet = await create_bet(creator)
+    url = f"/api/bets/{bet['id']}"
+
+    first = await client.get(url)
+    assert first.headers["x-cache"] == "MISS"
+    second = await client.get(url)
+    assert second.headers["x-cache"] == "HIT"
+    assert second.content == first.content
+
+    wager = {"outcome_id": bet["outcomes"][1]["id"], "amount": 70}
+    await client.post(f"{url}/wager", json=wager, headers=creator)
+    response = await client.get(url)
+    assert response.headers["x-cache"] == "MISS"
+    assert response.json()["total_pool"] == 70
+    assert [outcome["pool_total"] for outcome in response.json()["outcomes"]] == [0, 70]
+    assert (await client.get(url)).headers["x-cache"] == "HIT"
+
+    # Creating a bet invalidates listings
+    assert len((await client.get("/api/bets")).json()) == 1
+    await create_bet(creator, title="Another")
+    assert len((await client.get("/api/bets")).json()) == 2
+
+
+async def test_concurrent_misses_compute_once(response_cache: ResponseCache) -> None:
+    calls: list[bytes] = []
+    release = asyncio.Event()
+    compute = _compute(b"body", [bet_tag(1)], calls, release)
+
+    requests = [asyncio.create_task(response_cache.get_or_compute("k", compute)) for _ in range(10)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*requests)
+
+    assert calls == [b"body"]
+    assert sorted(hit for _, hit in results) == [False] + [True] * 9
+    assert {body for body, _ in results} == {b"body"}
+    assert await response_cache.get_or_compute("k", compute) == (b"body", True)
+    assert calls == [b"body"]
+
+
+async def test_computations_racing_an_invalidation_are_not_served(
+    response_cache: ResponseCache,
+) -> None:
+    calls: list[bytes] = []
+    release = asyncio.Event()
+    racing = asyncio.create_task(
+        response_cache.get_or_compute("k", _compute(b"old", [bet_tag(1)], calls, release))
+    )
+    await asyncio.sleep(0)
+
+    # A write commits while the computation runs
+    response_cache.invalidate([bet_tag(1)])
+    # Requests after the write do not wait for the racing computation
+    assert await response_cache.get_or_compute("k", _compute(b"new", [bet_tag(1)], calls)) == (
+        b"new",
+        False,
+    )
+    release.set()
+    assert await racing == (b"old", False)
+
+    # Whichever entry was stored last, the racing one is never served
+    body, _ = await response_cache.get_or_compute("k", _compute(b"newer", [bet_tag(1)], calls))
+    assert body != b"old"
+    assert calls[:2] == [b"old", b"new"]
+
+
+async def test_keys_and_tags_are_scoped_per_office(response_cache: ResponseCache) -> None:
+    calls: list[bytes] = []
+
+    async def get(office: str | None, body: bytes) -> tuple[bytes, bool]:
+        token = current_tenant.set(office)
+        try:
+            return await response_cache.get_or_compute("k", _compute(body, [bet_tag(1)], calls))
+        finally:
+            current_tenant.reset(token)
+
+    assert await get("acme", b"acme") == (b"acme", False)
+    assert await get("globex", b"globex") == (b"globex", False)
+    assert await get(None, b"main") == (b"main", False)
+    assert await get("acme", b"other") == (b"acme", True)
+
+    # Invalidating one office's bet leaves the others' entries cached
+    token = current_tenant.set("acme")
+    try:
+        response_cache.invalidate([bet_tag(1)])
+    finally:
+        current_tenant.reset(token)
+    assert await get("acme", b"acme again") == (b"acme again", False)
+    assert await get("globex", b"other") == (b"globex", True)
+    assert await get(None, b"other") == (b"main", True)
@@ -0,0 +1,94 @@
+"""Tests of the event outbox and long-polling reads."""
+
+import asyncio
+import sqlite3
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import select
+
+from mirustech.betting.config import Settings
+from mirustech.betting.database import async_session
+from mirustech.betting.models import User
+from mirustech.betting.services.betting import BettingService
+from mirustech.betting.services.events import _get_notifier, prune_expired_events
+
+
+async def _events(client, after: int = 0, wait: float = 0) -> dict:
+    response = await client.get("/api/events", params={"after": after, "wait": wait})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_events_exist_only_once_their_transaction_commits(
+    client, register, create_bet
+) -> None:
+    creator = await register("creator")
+    await register("bettor")
+    bet = await create_bet(creator)
+    page = await _events(client)
+    assert [event["type"] for event in page["events"]] == ["bet.created"]
+
+    wagers = [(bet["id"], outcome["id"], 60) for outcome in bet["outcomes"]]
+    async with async_session() as db:
+        bettor = await db.scalar(select(User).where(User.username == "bettor"))
+        await BettingService(db).place_wagers(bettor, wagers)
+        waiter = _get_notifier().waiter()
+        await db.rollback()
+    assert not waiter.is_set()
+    assert (await _events(client, page["last_seq"]))["events"] == []
+
+    async with async_session() as db:
+        bettor = await db.scalar(select(User).where(User.username == "bettor"))
+        placed = await BettingService(db).place_wagers(bettor, wagers)
+        waiter = _get_notifier().waiter()
+        await db.commit()
+    assert waiter.is_set()
+    events = (await _events(client, page["last_seq"]))["events"]
+    assert [(event["type"], event["payload"]["wager_id"]) for event in events] == [
+        ("wager.placed", wager.id) for wager, _, _ in placed
+    ]
+
+
+async def test_long_poll_wakes_when_an_event_commits(client, register, create_bet) -> None:
+    creator = await register("creator")
+    bettor = await register("bettor")
+    bet = await create_bet(creator)
+    last_seq = (await _events(client))["last_seq"]
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    poll = asyncio.create_task(_events(client, last_seq, wait=30))
+    await asyncio.sleep(0.2)
+    assert not poll.done()
+
+    wager = {"outcome_id": bet["outcomes"][0]["id"], "amount": 60}
+    await client.post(f"/api/bets/{bet['id']}/wager", json=wager, headers=bettor)
+    page = await asyncio.wait_for(poll, 5)
+    assert loop.time() - started < 5
+    assert [event["type"] for event in page["events"]] == ["wager.placed"]
+    assert page["last_seq"] == page["events"][0]["seq"]
+
+    # Nothing new: the poll returns empty once the wait is over
+    assert await _events(client, page["last_seq"], wait=0.1) == {
+        "events": [],
+        "last_seq": page["last_seq"],
+    }
+
+
+async def test_events_past_retention_are_pruned(
+    client, register, create_bet, settings: Settings, tmp_path: Path
+) -> None:
+    creator = await register("creator")
+    for i in range(3):
+        await create_bet(creator, title=f"Bet {i}")
+    now = datetime.now(UTC).replace(tzinfo=None)
+    retention = timedelta(hours=settings.event_retention_hours)
+    with sqlite3.connect(tmp_path / "betting.db") as conn:
+        ages = [(now - retention - timedelta(minutes=1), 1), (now - retention / 2, 2)]
+        conn.executemany("UPDATE events SET created_at = ? WHERE seq = ?", ages)
+    conn.close()
+
+    assert await prune_expired_events() == 1
+    assert [event["seq"] for event in (await _events(client))["events"]] == [2, 3]
+    assert await prune_expired_events() == 0
@@ -0,0 +1,104 @@
+"""Tests of streaming admin exports and their watermarks."""
+
+import csv
+import io
+import json
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from mirustech.betting.config import Settings
+
+BET_COLUMNS = [
+    "id",
+    "creator_id",
+    "title",
+    "description",
+    "status",
+    "winning_outcome_id",
+    "close_time",
+    "created_at",
+    "resolved_at",
+]
+
+
+@pytest.fixture
+def settings(settings: Settings) -> Settings:
+    settings.admin_usernames = ["admin"]
+    # Rows are visible to exports at once, unless a test sets a lag
+    settings.export_watermark_lag_seconds = 0
+    return settings
+
+
+async def _setup(register, create_bet, client):
+    admin = await register("admin")
+    bettor = await register("bettor")
+    bets = [await create_bet(admin, title=f"Bet {i}") for i in range(3)]
+    for bet in bets:
+        wager = {"outcome_id": bet["outcomes"][0]["id"], "amount": 50}
+        await client.post(f"/api/bets/{bet['id']}/wager", json=wager, headers=bettor)
+    return admin, bettor, bets
+
+
+def _watermark(response) -> str:
+    return response.headers["x-export-watermark"].removesuffix("Z")
+
+
+async def test_ndjson_export_has_one_row_per_line(client, register, create_bet) -> None:
+    admin, _, bets = await _setup(register, create_bet, client)
+
+    response = await client.get("/api/admin/export/bets", headers=admin)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == [bet["id"] for bet in bets]
+    assert list(rows[0]) == BET_COLUMNS
+
+    response = await client.get("/api/admin/export/wagers", headers=admin)
+    assert len(response.text.splitlines()) == 3
+
+
+async def test_csv_export_starts_with_a_header(client, register, create_bet) -> None:
+    admin, _, bets = await _setup(register, create_bet, client)
+
+    response = await client.get("/api/admin/export/bets?format=csv", headers=admin)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    header, *rows = csv.reader(io.StringIO(response.text))
+    assert header == BET_COLUMNS
+    assert [int(row[0]) for row in rows] == [bet["id"] for bet in bets]
+    assert {row[4] for row in rows} == {"open"}
+
+
+async def test_rows_after_the_watermark_wait_for_the_next_pull(
+    client, register, create_bet
+) -> None:
+    admin, bettor, _ = await _setup(register, create_bet, client)
+    first = await client.get("/api/admin/export/wagers", headers=admin)
+    watermark = _watermark(first)
+    assert len(first.text.splitlines()) == 3
+
+    later = await create_bet(admin, title="Later")
+    wager = {"outcome_id": later["outcomes"][0]["id"], "amount": 50}
+    await client.post(f"/api/bets/{later['id']}/wager", json=wager, headers=bettor)
+
+    # The first window still holds only the first rows
+    again = await client.get(f"/api/admin/export/wagers?until={watermark}", headers=admin)
+    assert again.text == first.text
+    delta = await client.get(f"/api/admin/export/wagers?since={watermark}", headers=admin)
+    assert [json.loads(line)["bet_id"] for line in delta.text.splitlines()] == [later["id"]]
+
+
+async def test_watermark_trails_uncommitted_writes(
+    client, register, create_bet, settings: Settings
+) -> None:
+    admin, _, _ = await _setup(register, create_bet, client)
+    settings.export_watermark_lag_seconds = 3600
+
+    future = (datetime.now(UTC) + timedelta(days=1)).replace(tzinfo=None).isoformat()
+    response = await client.get(f"/api/admin/export/bets?until={future}", headers=admin)
+    # Capped at the watermark, which is before every row was written
+    assert response.text == ""
+    watermark = datetime.fromisoformat(_watermark(response))
+    expected = datetime.now(UTC).replace(tzinfo=None) - timedelta(hours=1)
+    assert abs(watermark - expected) < timedelta(minutes=1)
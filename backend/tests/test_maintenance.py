@@ -0,0 +1,131 @@
+"""Tests of the maintenance scheduler and its jobs."""
+
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from mirustech.betting import maintenance
+from mirustech.betting.config import Settings
+from mirustech.betting.database import get_engine
+from mirustech.betting.maintenance import JobStatus, _Job, _run_due, get_job_reports
+from mirustech.betting.serialization import JSONDict
+
+
+@pytest.fixture
+def gauge(monkeypatch: pytest.MonkeyPatch) -> maintenance.RequestGauge:
+    """A fresh request gauge, with no reports of earlier tests."""
+    gauge = maintenance.RequestGauge()
+    monkeypatch.setattr(maintenance, "_gauge", gauge)
+    monkeypatch.setattr(maintenance, "_reports", {})
+    return gauge
+
+
+def _busy(gauge: maintenance.RequestGauge) -> None:
+    gauge.in_flight = 1
+
+
+def _quiet(gauge: maintenance.RequestGauge) -> None:
+    gauge.in_flight = 0
+    gauge.last_finished = time.monotonic() - 3600
+
+
+def _report(job: str, database: str = "main") -> JSONDict:
+    reports = get_job_reports()
+    return next(r.to_dict() for r in reports if (r.job, r.database) == (job, database))
+
+
+async def test_checkpoint_truncates_only_when_quiet(
+    database: None, gauge: maintenance.RequestGauge, tmp_path: Path
+) -> None:
+    wal = tmp_path / "betting.db-wal"
+    job = _Job("checkpoint", 300, maintenance.checkpoint)
+
+    async def write() -> None:
+        async with get_engine().begin() as conn:
+            await conn.exec_driver_sql(
+                "INSERT INTO users (username, password_hash, balance, created_at)"
+                f" VALUES ('user{time.monotonic_ns()}', '', 1000, '2026-01-01 00:00:00')"
+            )
+
+    await write()
+    _busy(gauge)
+    await _run_due(job, time.monotonic())
+    report = _report("checkpoint")
+    assert (report["status"], report["mode"]) == ("throttled", "PASSIVE")
+    assert report["wal_pages"] > 0
+    assert wal.stat().st_size > 0
+
+    await write()
+    _quiet(gauge)
+    await _run_due(job, time.monotonic())
+    report = _report("checkpoint")
+    assert (report["status"], report["mode"]) == ("ok", "TRUNCATE")
+    assert wal.stat().st_size == 0
+
+
+async def test_jobs_waiting_for_quiet_run_after_one_interval(
+    database: None, gauge: maintenance.RequestGauge
+) -> None:
+    runs: list[bool] = []
+
+    async def probe(quiet: bool) -> tuple[JobStatus, JSONDict]:
+        runs.append(quiet)
+        return "ok", {}
+
+    job = _Job("probe", 60, probe, waits_for_quiet=True)
+    _busy(gauge)
+    await _run_due(job, 1000)
+    assert runs == []
+    report = _report("probe", "*")
+    assert (report["status"], report["reason"]) == ("skipped", "busy")
+
+    await _run_due(job, 1059)
+    assert runs == []
+    # Deferred for a whole interval, it runs even though the app is still busy
+    await _run_due(job, 1060)
+    assert runs == [False]
+    assert (job.deferred_since, job.next_run) == (None, 1120)
+    assert _report("probe")["status"] == "ok"
+
+    _quiet(gauge)
+    await _run_due(job, 1120)
+    assert runs == [False, True]
+
+
+async def test_failing_jobs_do_not_stop_the_scheduler(
+    database: None,
+    gauge: maintenance.RequestGauge,
+    settings: Settings,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    settings.maintenance_tick_seconds = 0.01
+    runs = 0
+
+    async def broken(quiet: bool) -> tuple[JobStatus, JSONDict]:
+        raise ValueError("broken job")
+
+    async def counter(quiet: bool) -> tuple[JobStatus, JSONDict]:
+        nonlocal runs
+        runs += 1
+        return "ok", {"runs": runs}
+
+    jobs = [
+        _Job("broken", 0.01, broken, run_at_start=True),
+        _Job("counter", 0.01, counter, run_at_start=True),
+    ]
+    monkeypatch.setattr(maintenance, "_jobs", lambda: jobs)
+    scheduler = asyncio.create_task(maintenance.run_maintenance())
+    try:
+        async with asyncio.timeout(5):
+            while runs < 3:
+                await asyncio.sleep(0.01)
+    finally:
+        scheduler.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await scheduler
+
+    report = _report("broken")
+    assert (report["status"], report["error"]) == ("failed", "ValueError: broken job")
+    assert _report("counter")["status"] == "ok"
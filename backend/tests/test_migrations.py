@@ -0,0 +1,149 @@
+"""Tests of upgrading databases created by earlier versions in place."""
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from mirustech.betting.config import Settings, configure_settings
+from mirustech.betting.database import dispose_engine, init_db
+from mirustech.betting.migrations import SCHEMA_VERSION
+from mirustech.betting.models.wager import WEIGHT_SCALE
+
+# The schema before versioning, as the first release created it
+BASELINE_SCHEMA = """
+CREATE TABLE users (
+    id INTEGER NOT NULL, username VARCHAR(50) NOT NULL, password_hash VARCHAR(255) NOT NULL,
+    balance INTEGER NOT NULL, created_at DATETIME NOT NULL, PRIMARY KEY (id)
+);
+CREATE UNIQUE INDEX ix_users_username ON users (username);
+CREATE TABLE bets (
+    id INTEGER NOT NULL, creator_id INTEGER NOT NULL, title VARCHAR(200) NOT NULL,
+    description TEXT NOT NULL, close_time DATETIME NOT NULL, status VARCHAR(8) NOT NULL,
+    winning_outcome_id INTEGER, created_at DATETIME NOT NULL, PRIMARY KEY (id),
+    FOREIGN KEY(creator_id) REFERENCES users (id),
+    FOREIGN KEY(winning_outcome_id) REFERENCES outcomes (id)
+);
+CREATE TABLE outcomes (
+    id INTEGER NOT NULL, bet_id INTEGER NOT NULL, name VARCHAR(100) NOT NULL,
+    PRIMARY KEY (id), FOREIGN KEY(bet_id) REFERENCES bets (id)
+);
+CREATE TABLE wagers (
+    id INTEGER NOT NULL, user_id INTEGER NOT NULL, outcome_id INTEGER NOT NULL,
+    amount INTEGER NOT NULL, weight DOUBLE NOT NULL, payout DOUBLE,
+    created_at DATETIME NOT NULL, PRIMARY KEY (id),
+    FOREIGN KEY(user_id) REFERENCES users (id), FOREIGN KEY(outcome_id) REFERENCES outcomes (id)
+);
+"""
+
+USERS = [(1, "alice"), (2, "bob"), (3, "carol")]
+BETS = [
+    (1, 1, "Open bet", "OPEN", None, "2026-03-01 10:00:00", "2026-02-01 10:00:00"),
+    (2, 1, "Resolved bet", "RESOLVED", 3, "2026-02-10 10:00:00", "2026-02-01 11:00:00"),
+    (3, 2, "Bet without wagers", "OPEN", None, "2026-03-01 10:00:00", "2026-02-02 10:00:00"),
+]
+OUTCOMES = [(1, 1, "Yes"), (2, 1, "No"), (3, 2, "Yes"), (4, 2, "No"), (5, 3, "A"), (6, 3, "B")]
+# (id, user, outcome, amount, weight, payout)
+WAGERS = [
+    (1, 2, 1, 70, 1.2, None),
+    (2, 3, 2, 55, 1.0, None),
+    (3, 2, 1, 130, 1.0, None),
+    (4, 2, 3, 60, 1.2, 112.0),
+    (5, 3, 3, 50, 1.0, 78.0),
+    (6, 1, 4, 80, 1.0, 0.0),
+]
+
+
+def _create_baseline_database(path: Path, user_version: int) -> None:
+    with sqlite3.connect(path) as conn:
+        conn.executescript(BASELINE_SCHEMA)
+        conn.executemany("INSERT INTO users VALUES (?, ?, '', 1000, '2026-01-01 00:00:00')", USERS)
+        conn.executemany(
+            "INSERT INTO bets (id, creator_id, title, description, status, winning_outcome_id,"
+            " close_time, created_at) VALUES (?, ?, ?, '', ?, ?, ?, ?)",
+            BETS,
+        )
+        conn.executemany("INSERT INTO outcomes VALUES (?, ?, ?)", OUTCOMES)
+        conn.executemany(
+            "INSERT INTO wagers VALUES (?, ?, ?, ?, ?, ?, '2026-02-05 12:00:00')", WAGERS
+        )
+        conn.execute(f"PRAGMA user_version = {user_version}")
+    conn.close()
+
+
+async def _migrate(settings: Settings) -> None:
+    configure_settings(settings)
+    try:
+        await init_db()
+    finally:
+        await dispose_engine()
+
+
+def _read_state(path: Path) -> dict[str, object]:
+    with sqlite3.connect(path) as conn:
+        state = {
+            "user_version": conn.execute("PRAGMA user_version").fetchone()[0],
+            "stakes": conn.execute("SELECT id, weighted_stake FROM wagers ORDER BY id").fetchall(),
+            "totals": conn.execute(
+                "SELECT id, pool, wager_count, version FROM bets ORDER BY id"
+            ).fetchall(),
+            "daily_stats": conn.execute(
+                "SELECT user_id, day, staked, settled_stake, payout FROM user_daily_stats"
+                " ORDER BY user_id, day"
+            ).fetchall(),
+            "found": conn.execute(
+                "SELECT rowid FROM bets_fts WHERE bets_fts MATCH 'wagers OR resolved'"
+                " ORDER BY rowid"
+            ).fetchall(),
+        }
+    conn.close()
+    return state
+
+
+@pytest.mark.parametrize("user_version", [0, 1])
+async def test_baseline_database_is_upgraded_with_backfilled_values(
+    settings: Settings, tmp_path: Path, user_version: int
+) -> None:
+    path = tmp_path / "betting.db"
+    _create_baseline_database(path, user_version)
+
+    await _migrate(settings)
+    state = _read_state(path)
+
+    assert state["user_version"] == SCHEMA_VERSION
+    assert state["stakes"] == [
+        (wager_id, round(amount * weight * WEIGHT_SCALE))
+        for wager_id, _, _, amount, weight, _ in WAGERS
+    ]
+    pools = {bet_id: [0, 0] for bet_id, *_ in BETS}
+    bet_of = {outcome_id: bet_id for outcome_id, bet_id, _ in OUTCOMES}
+    for _, _, outcome_id, amount, _, _ in WAGERS:
+        pools[bet_of[outcome_id]][0] += amount
+        pools[bet_of[outcome_id]][1] += 1
+    assert state["totals"] == [(bet_id, pool, count, 0) for bet_id, (pool, count) in pools.items()]
+    # Stakes count on their placement day, settlements on the resolved bet's close day
+    assert state["daily_stats"] == [
+        (1, "2026-02-05", 80, 0, 0),
+        (1, "2026-02-10", 0, 80, 0),
+        (2, "2026-02-05", 260, 0, 0),
+        (2, "2026-02-10", 0, 60, 112),
+        (3, "2026-02-05", 105, 0, 0),
+        (3, "2026-02-10", 0, 50, 78),
+    ]
+    # Existing bets are indexed for search
+    assert state["found"] == [(2,), (3,)]
+
+
+async def test_migration_steps_are_idempotent(settings: Settings, tmp_path: Path) -> None:
+    path = tmp_path / "betting.db"
+    _create_baseline_database(path, 1)
+    await _migrate(settings)
+    migrated = _read_state(path)
+
+    # Run every step again over the migrated schema
+    with sqlite3.connect(path) as conn:
+        conn.execute("PRAGMA user_version = 1")
+    conn.close()
+    await _migrate(settings)
+
+    assert _read_state(path) == migrated
@@ -0,0 +1,60 @@
+"""Tests of the multi-get odds endpoint and its revalidation."""
+
+
+async def test_odds_are_parallel_arrays(client, register, create_bet) -> None:
+    creator = await register("creator")
+    bettor = await register("bettor")
+    first = await create_bet(creator)
+    second = await create_bet(creator, outcomes=3)
+    wager = {"outcome_id": second["outcomes"][1]["id"], "amount": 60}
+    await client.post(f"/api/bets/{second['id']}/wager", json=wager, headers=bettor)
+
+    response = await client.get(f"/api/bets/odds?ids={first['id']},{second['id']},999")
+    assert response.status_code == 200, response.text
+    batch = response.json()
+    # Unknown ids are left out
+    assert batch["ids"] == [first["id"], second["id"]]
+    assert batch["statuses"] == ["open", "open"]
+    assert batch["outcome_ids"] == [
+        [outcome["id"] for outcome in bet["outcomes"]] for bet in (first, second)
+    ]
+    assert batch["pools"] == [[0, 0], [0, 60, 0]]
+
+
+async def test_unchanged_odds_are_not_modified(client, register, create_bet) -> None:
+    creator = await register("creator")
+    bettor = await register("bettor")
+    bet = await create_bet(creator)
+    other = await create_bet(creator)
+    url = f"/api/bets/odds?ids={bet['id']}"
+
+    response = await client.get(url)
+    etag = response.headers["etag"]
+    for _ in range(2):
+        response = await client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+    # Other bets changing does not matter
+    wager = {"outcome_id": other["outcomes"][0]["id"], "amount": 60}
+    await client.post(f"/api/bets/{other['id']}/wager", json=wager, headers=bettor)
+    assert (await client.get(url, headers={"If-None-Match": etag})).status_code == 304
+
+    wager = {"outcome_id": bet["outcomes"][0]["id"], "amount": 60}
+    await client.post(f"/api/bets/{bet['id']}/wager", json=wager, headers=bettor)
+    response = await client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["pools"] == [[60, 0]]
+    # Strong and listed forms of the new tag match too
+    new_etag = response.headers["etag"]
+    for if_none_match in (new_etag.removeprefix("W/"), f'"other", {new_etag}', "*"):
+        response = await client.get(url, headers={"If-None-Match": if_none_match})
+        assert response.status_code == 304
+
+
+async def test_odds_require_a_selection(client) -> None:
+    assert (await client.get("/api/bets/odds")).status_code == 400
+    assert (await client.get("/api/bets/odds?ids=1,x")).status_code == 422
+    ids = ",".join(str(i) for i in range(1, 1000))
+    assert (await client.get(f"/api/bets/odds?ids={ids}")).status_code == 400
@@ -0,0 +1,124 @@
+"""Tests of settling pools in whole coins."""
+
+import random
+
+from hypothesis import given
+from hypothesis import strategies as st
+
+from mirustech.betting.models.wager import WEIGHT_SCALE, to_weighted_stake
+from mirustech.betting.services.payout import distribute_pool
+
+pools = st.integers(min_value=0, max_value=10**12)
+# Distinct wager ids with weighted stakes, some of them zero
+stake_lists = st.dictionaries(
+    st.integers(min_value=1, max_value=10**9),
+    st.integers(min_value=0, max_value=10**9),
+    max_size=60,
+).map(lambda stakes: list(stakes.items()))
+
+
+@given(pools, stake_lists)
+def test_payouts_sum_to_the_pool(pool: int, stakes: list[tuple[int, int]]) -> None:
+    payouts = distribute_pool(pool, stakes)
+    total_stake = sum(stake for _, stake in stakes)
+    if total_stake == 0:
+        assert payouts == {}
+        return
+    assert sum(payouts.values()) == pool
+    assert payouts.keys() == {wager_id for wager_id, _ in stakes}
+    for wager_id, stake in stakes:
+        # Within one coin of the exact share, never negative
+        share = pool * stake // total_stake
+        assert share <= payouts[wager_id] <= share + 1
+        assert payouts[wager_id] >= 0
+
+
+@given(pools, stake_lists, st.randoms(use_true_random=False))
+def test_payouts_do_not_depend_on_wager_order(
+    pool: int, stakes: list[tuple[int, int]], rng: random.Random
+) -> None:
+    shuffled = list(stakes)
+    rng.shuffle(shuffled)
+    assert distribute_pool(pool, shuffled) == distribute_pool(pool, stakes)
+
+
+@given(st.integers(min_value=2, max_value=50), st.integers(min_value=0, max_value=10**6))
+def test_equal_remainders_go_to_earlier_wagers(count: int, pool: int) -> None:
+    payouts = distribute_pool(pool, [(wager_id, 7) for wager_id in range(count, 0, -1)])
+    share, leftover = divmod(pool, count)
+    assert payouts == {wager_id: share + (wager_id <= leftover) for wager_id in range(1, count + 1)}
+
+
+def test_larger_remainders_are_paid_first() -> None:
+    # Shares of 10 coins are 3.33, 5.0 and 1.67; the one leftover coin goes to 1.67
+    assert distribute_pool(10, [(1, 2), (2, 3), (3, 1)]) == {1: 3, 2: 5, 3: 2}
+
+
+def test_weighted_stakes_are_exact() -> None:
+    assert to_weighted_stake(70, 1.2) == 84 * WEIGHT_SCALE
+    assert to_weighted_stake(50, 1.0) == 50 * WEIGHT_SCALE
+
+
+async def test_resolving_pays_out_exactly_the_pool(client, register, create_bet) -> None:
+    rng = random.Random(34)
+    creator = await register("creator")
+    bettors = [await register(f"bettor{i}") for i in range(6)]
+    bet = await create_bet(creator, outcomes=3)
+    outcome_ids = [outcome["id"] for outcome in bet["outcomes"]]
+    for _ in range(40):
+        wager = {"outcome_id": rng.choice(outcome_ids), "amount": rng.randint(50, 90)}
+        response = await client.post(
+            f"/api/bets/{bet['id']}/wager", json=wager, headers=rng.choice(bettors)
+        )
+        assert response.status_code == 201, response.text
+
+    winner = rng.choice(outcome_ids)
+    response = await client.post(
+        f"/api/bets/{bet['id']}/resolve", json={"winning_outcome_id": winner}, headers=creator
+    )
+    assert response.status_code == 200, response.text
+
+    pool = 0
+    paid: dict[str, int] = {}
+    for headers in bettors:
+        me = (await client.get("/api/auth/me", headers=headers)).json()
+        wagers = (await client.get("/api/bets/users/me/wagers", headers=headers)).json()
+        assert all(wager["payout"] >= 0 for wager in wagers)
+        staked = sum(wager["amount"] for wager in wagers)
+        pool += staked
+        paid[me["username"]] = int(sum(wager["payout"] for wager in wagers))
+        assert me["balance"] == 1000 - staked + paid[me["username"]]
+    assert sum(paid.values()) == pool
+
+
+async def test_preview_matches_settlement_under_every_outcome(client, register, create_bet) -> None:
+    rng = random.Random(50)
+    creator = await register("creator")
+    bettors = {f"bettor{i}": await register(f"bettor{i}") for i in range(4)}
+    bet = await create_bet(creator, outcomes=3)
+    outcome_ids = [outcome["id"] for outcome in bet["outcomes"]]
+    for _ in range(20):
+        wager = {"outcome_id": rng.choice(outcome_ids), "amount": rng.randint(50, 70)}
+        await client.post(
+            f"/api/bets/{bet['id']}/wager", json=wager, headers=rng.choice(list(bettors.values()))
+        )
+
+    url = f"/api/bets/{bet['id']}/resolution-preview"
+    assert (await client.get(url, headers=bettors["bettor0"])).status_code == 403
+    assert (
+        await client.get("/api/bets/999/resolution-preview", headers=creator)
+    ).status_code == 404
+    preview = (await client.get(url, headers=creator)).json()
+    assert preview["outcome_ids"] == outcome_ids
+    for row in preview["payouts"]:
+        assert sum(row) in (0, preview["total_pool"])
+
+    winner = outcome_ids[1]
+    await client.post(
+        f"/api/bets/{bet['id']}/resolve", json={"winning_outcome_id": winner}, headers=creator
+    )
+    paid = []
+    for username in preview["usernames"]:
+        wagers = (await client.get("/api/bets/users/me/wagers", headers=bettors[username])).json()
+        paid.append(int(sum(wager["payout"] for wager in wagers)))
+    assert preview["payouts"][outcome_ids.index(winner)] == paid
@@ -0,0 +1,35 @@
+"""Tests of valuing a user's positions on unresolved bets."""
+
+import random
+
+
+async def test_projected_payouts_match_the_resolution_preview(client, register, create_bet) -> None:
+    rng = random.Random(46)
+    creator = await register("creator")
+    bettors = {f"bettor{i}": await register(f"bettor{i}") for i in range(5)}
+    bet = await create_bet(creator, outcomes=3)
+    outcome_ids = [outcome["id"] for outcome in bet["outcomes"]]
+    # Leave the last outcome without wagers
+    for _ in range(25):
+        wager = {"outcome_id": rng.choice(outcome_ids[:2]), "amount": rng.randint(50, 97)}
+        headers = rng.choice(list(bettors.values()))
+        await client.post(f"/api/bets/{bet['id']}/wager", json=wager, headers=headers)
+
+    preview = (
+        await client.get(f"/api/bets/{bet['id']}/resolution-preview", headers=creator)
+    ).json()
+    projected = []
+    for username in preview["usernames"]:
+        portfolio = (await client.get("/api/users/me/portfolio", headers=bettors[username])).json()
+        (position,) = portfolio["positions"]
+        assert position["total_pool"] == preview["total_pool"]
+        assert [outcome["outcome_id"] for outcome in position["outcomes"]] == outcome_ids
+        payouts = [outcome["projected_payout"] for outcome in position["outcomes"]]
+        assert position["best_case"] == max(payouts)
+        assert position["worst_case"] == min(payouts)
+        projected.append(payouts)
+
+    # Preview rows are per outcome, with a column per bettor
+    assert [list(row) for row in zip(*projected, strict=True)] == preview["payouts"]
+    # Leftover coins are handed out, so a winning outcome pays out the whole pool
+    assert [sum(row) for row in preview["payouts"]] == [preview["total_pool"]] * 2 + [0]
@@ -0,0 +1,49 @@
+"""Tests of the sampling profiler."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from mirustech.betting import profiler
+from mirustech.betting.profiler import profile_process
+
+
+async def test_profile_samples_the_event_loop() -> None:
+    profile = await profile_process(0.05, 0.005)
+    assert profile is not None
+    assert profile.samples > 0
+    assert "event-loop" in profile.summary()["threads"]
+
+
+async def test_one_profile_runs_at_a_time() -> None:
+    first = asyncio.create_task(profile_process(0.3, 0.01))
+    await asyncio.sleep(0.05)
+    assert await profile_process(0.05, 0.01) is None
+    assert await first is not None
+
+
+async def test_cancelled_profile_stops_its_sampler(monkeypatch: pytest.MonkeyPatch) -> None:
+    running: list[int] = []
+    overlapped = threading.Event()
+    sample = profiler.sample
+
+    def slow_to_stop(*args: object) -> profiler.Profile:
+        running.append(1)
+        if len(running) > 1:
+            overlapped.set()
+        try:
+            profile = sample(*args)
+            time.sleep(0.1)  # Still finishing after being told to stop
+            return profile
+        finally:
+            running.pop()
+
+    monkeypatch.setattr(profiler, "sample", slow_to_stop)
+    task = asyncio.create_task(profile_process(30, 0.01))
+    await asyncio.sleep(0.05)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    assert await profile_process(0.05, 0.01) is not None
+    assert not overlapped.is_set()
@@ -0,0 +1,73 @@
+"""Tests of sparse fieldsets and response compression."""
+
+import pytest
+
+from mirustech.betting.config import Settings
+
+IDENTITY = {"Accept-Encoding": "identity"}
+
+
+async def test_listing_has_only_the_requested_fields(client, register, create_bet) -> None:
+    creator = await register("creator")
+    for i in range(3):
+        await create_bet(creator, title=f"Bet {i}")
+
+    response = await client.get("/api/bets?fields=id,title,total_pool")
+    assert response.status_code == 200, response.text
+    assert response.json() == [
+        {"id": i, "title": f"Bet {i - 1}", "total_pool": 0} for i in range(3, 0, -1)
+    ]
+    response = await client.get("/api/bets?fields=creator_username, outcome_count")
+    assert response.json()[0] == {"creator_username": "creator", "outcome_count": 2}
+
+
+async def test_detail_and_wagers_have_only_the_requested_fields(
+    client, register, create_bet
+) -> None:
+    creator = await register("creator")
+    bet = await create_bet(creator)
+    wager = {"outcome_id": bet["outcomes"][0]["id"], "amount": 60}
+    await client.post(f"/api/bets/{bet['id']}/wager", json=wager, headers=creator)
+
+    detail = (await client.get(f"/api/bets/{bet['id']}?fields=status,total_pool")).json()
+    assert detail == {"status": "open", "total_pool": 60}
+    wagers = await client.get("/api/bets/users/me/wagers?fields=bet_id,amount", headers=creator)
+    assert wagers.json() == [{"bet_id": bet["id"], "amount": 60}]
+
+
+@pytest.mark.parametrize("fields", ["id,password_hash", "nope", ",", ""])
+async def test_unknown_fields_are_refused(client, register, create_bet, fields: str) -> None:
+    creator = await register("creator")
+    bet = await create_bet(creator)
+
+    for url in ("/api/bets", f"/api/bets/{bet['id']}"):
+        response = await client.get(url, params={"fields": fields})
+        assert response.status_code == 400, url
+
+
+async def test_responses_are_compressed_from_the_minimum_size(
+    client, register, create_bet, settings: Settings
+) -> None:
+    creator = await register("creator")
+    bet = await create_bet(creator, outcomes=5)
+    url = f"/api/bets/{bet['id']}"
+    plain = await client.get(url, headers=IDENTITY)
+    assert "content-encoding" not in plain.headers
+    size = len(plain.content)
+
+    settings.compression_minimum_size = size + 1
+    response = await client.get(url)
+    assert "content-encoding" not in response.headers
+    assert response.content == plain.content
+
+    settings.compression_minimum_size = size
+    response = await client.get(url)
+    assert response.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert int(response.headers["content-length"]) < size
+    assert response.content == plain.content
+    # Clients that do not accept gzip get the body as is
+    response = await client.get(url, headers=IDENTITY)
+    assert "content-encoding" not in response.headers
+    response = await client.get(url, headers={"Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in response.headers
@@ -0,0 +1,66 @@
+"""Tests of full-text bet search."""
+
+import pytest
+
+from mirustech.betting.config import Settings
+
+
+@pytest.fixture
+def settings(settings: Settings) -> Settings:
+    settings.admin_usernames = ["admin"]
+    return settings
+
+
+async def _search(client, q: str, **params) -> list[dict]:
+    response = await client.get("/api/bets/search", params={"q": q, **params})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_bets_are_found_by_title_words(client, register, create_bet) -> None:
+    alice = await register("alice")
+    derby = await create_bet(alice, title="Who wins the office derby?")
+    await create_bet(alice, title="Will it rain on Friday?")
+
+    results = await _search(client, "derby")
+    assert [result["id"] for result in results] == [derby["id"]]
+    assert "<mark>derby</mark>" in results[0]["snippet"]
+    # Words match as prefixes, in any order
+    assert [result["id"] for result in await _search(client, "off WIN")] == [derby["id"]]
+    assert await _search(client, "snow") == []
+
+
+async def test_resolved_bets_are_found_and_archived_bets_are_not(
+    client, register, create_bet
+) -> None:
+    admin = await register("admin")
+    bet = await create_bet(admin, title="Lunch order")
+    await client.post(
+        f"/api/bets/{bet['id']}/resolve",
+        json={"winning_outcome_id": bet["outcomes"][0]["id"]},
+        headers=admin,
+    )
+    await create_bet(admin, title="Coffee order")
+
+    assert [result["id"] for result in await _search(client, "lunch")] == [bet["id"]]
+    assert await _search(client, "lunch", status="open") == []
+    assert [result["id"] for result in await _search(client, "lunch", status="resolved")] == [
+        bet["id"]
+    ]
+
+    response = await client.post("/api/admin/archive?older_than_days=0", headers=admin)
+    assert response.json()["archived"] == 1
+    assert await _search(client, "lunch") == []
+    assert [result["title"] for result in await _search(client, "order")] == ["Coffee order"]
+    # Archived bets are still found by id
+    assert (await client.get(f"/api/bets/{bet['id']}")).status_code == 200
+
+
+@pytest.mark.parametrize(
+    "q", ['"', "AND", "NOT", "a OR", "title:", "NEAR(", "*", "-", "(((", "^x", "'; DROP"]
+)
+async def test_query_syntax_is_searched_literally(client, register, create_bet, q: str) -> None:
+    alice = await register("alice")
+    await create_bet(alice, title="Office derby")
+
+    assert await _search(client, q) == []
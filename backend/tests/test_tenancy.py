@@ -0,0 +1,111 @@
+"""Tests of routing requests to per-office databases."""
+
+from pathlib import Path
+
+import pytest
+
+from mirustech.betting.config import Settings
+from mirustech.betting.database import get_tenant_engines
+from mirustech.betting.services.bet_book import _bet_books
+from mirustech.betting.services.events import _notifiers
+
+OFFICES = ["acme", "globex"]
+
+
+@pytest.fixture
+def settings(settings: Settings, tmp_path: Path) -> Settings:
+    settings.tenants_directory = str(tmp_path / "offices")
+    settings.admin_usernames = ["admin"]
+    return settings
+
+
+@pytest.fixture
+async def offices(client, register) -> dict[str, dict[str, str]]:
+    """Provision the offices, returning the headers of a user registered in each."""
+    admin = await register("admin")
+    users = {}
+    for office in OFFICES:
+        response = await client.post(f"/api/admin/offices/{office}", headers=admin)
+        assert response.status_code == 201, response.text
+        credentials = {"username": f"{office}-user", "password": "password"}
+        response = await client.post(
+            "/api/auth/register", json=credentials, headers={"X-Office": office}
+        )
+        assert response.status_code == 201, response.text
+        response = await client.post(
+            "/api/auth/login", data=credentials, headers={"X-Office": office}
+        )
+        users[office] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return users
+
+
+async def _titles(client, headers: dict[str, str]) -> list[str]:
+    response = await client.get("/api/bets", headers=headers)
+    assert response.status_code == 200, response.text
+    return [bet["title"] for bet in response.json()]
+
+
+async def test_offices_see_only_their_own_data(client, offices, create_bet) -> None:
+    bets = {
+        office: await create_bet(headers, title=f"{office} bet")
+        for office, headers in offices.items()
+    }
+    # Each office numbers its bets from one
+    assert bets["acme"]["id"] == bets["globex"]["id"]
+
+    for office, headers in offices.items():
+        assert await _titles(client, headers) == [f"{office} bet"]
+        detail = (await client.get(f"/api/bets/{bets[office]['id']}", headers=headers)).json()
+        assert detail["title"] == f"{office} bet"
+        assert detail["creator_username"] == f"{office}-user"
+        # Before login the header selects the office
+        assert await _titles(client, {"X-Office": office}) == [f"{office} bet"]
+    assert await _titles(client, {}) == []
+
+
+async def test_token_office_overrides_the_header(client, offices, create_bet) -> None:
+    await create_bet(offices["acme"], title="acme bet")
+
+    headers = {**offices["acme"], "X-Office": "globex"}
+    assert await _titles(client, headers) == ["acme bet"]
+    me = (await client.get("/api/auth/me", headers=headers)).json()
+    assert me["username"] == "acme-user"
+
+
+@pytest.mark.parametrize("office", ["initech", "ACME", "../acme", "acme_archive", "-acme"])
+async def test_unknown_or_invalid_offices_are_refused(client, offices, office: str) -> None:
+    response = await client.get("/api/bets", headers={"X-Office": office})
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Unknown office"}
+
+
+async def test_invalid_office_ids_are_not_provisioned(client, register) -> None:
+    admin = await register("admin")
+    response = await client.post("/api/admin/offices/Bad_Office", headers=admin)
+    assert response.status_code == 400
+
+
+async def test_evicted_office_reopens_with_its_data(
+    client, offices, create_bet, settings: Settings
+) -> None:
+    settings.max_open_tenants = 1
+    acme, globex = offices["acme"], offices["globex"]
+    bet = await create_bet(acme, title="acme bet")
+    wager = {"outcome_id": bet["outcomes"][0]["id"], "amount": 80}
+    response = await client.post(f"/api/bets/{bet['id']}/wager", json=wager, headers=acme)
+    assert response.status_code == 201, response.text
+    await client.get("/api/events", headers=acme)
+    assert "acme" in _bet_books and "acme" in _notifiers
+
+    # Using another office closes acme's engine, and its in-process state with it
+    assert await _titles(client, globex) == []
+    engines = get_tenant_engines()
+    assert "acme" not in engines and "globex" in engines
+    assert "acme" not in _bet_books and "acme" not in _notifiers
+
+    assert await _titles(client, acme) == ["acme bet"]
+    detail = (await client.get(f"/api/bets/{bet['id']}", headers=acme)).json()
+    assert detail["total_pool"] == 80
+    events = (await client.get("/api/events", headers=acme)).json()["events"]
+    assert [event["type"] for event in events] == ["bet.created", "wager.placed"]
+    assert "globex" not in engines
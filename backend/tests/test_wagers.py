@@ -0,0 +1,50 @@
+"""Tests of placing wagers, singly and in batches."""
+
+
+async def test_batch_places_every_wager(client, register, create_bet) -> None:
+    creator = await register("creator")
+    bettor = await register("bettor")
+    first = await create_bet(creator)
+    second = await create_bet(creator, outcomes=3)
+    wagers = [
+        {"bet_id": first["id"], "outcome_id": first["outcomes"][0]["id"], "amount": 100},
+        {"bet_id": first["id"], "outcome_id": first["outcomes"][1]["id"], "amount": 60},
+        {"bet_id": second["id"], "outcome_id": second["outcomes"][2]["id"], "amount": 75},
+    ]
+    response = await client.post("/api/wagers/batch", json={"wagers": wagers}, headers=bettor)
+    assert response.status_code == 201, response.text
+    assert [(w["bet_id"], w["outcome_id"], w["amount"]) for w in response.json()] == [
+        (w["bet_id"], w["outcome_id"], w["amount"]) for w in wagers
+    ]
+
+    me = (await client.get("/api/auth/me", headers=bettor)).json()
+    assert me["balance"] == 1000 - 235
+    detail = (await client.get(f"/api/bets/{first['id']}")).json()
+    assert detail["total_pool"] == 160
+    assert [outcome["pool_total"] for outcome in detail["outcomes"]] == [100, 60]
+
+
+async def test_batch_places_nothing_when_one_wager_fails(client, register, create_bet) -> None:
+    creator = await register("creator")
+    bettor = await register("bettor")
+    bet = await create_bet(creator)
+    outcome_id = bet["outcomes"][0]["id"]
+    invalid = [
+        # Within the balance one at a time, over it together
+        ([(outcome_id, 600), (outcome_id, 500)], 400),
+        # The last wager's outcome does not exist
+        ([(outcome_id, 100), (999, 100)], 404),
+    ]
+    for stakes, status_code in invalid:
+        wagers = [
+            {"bet_id": bet["id"], "outcome_id": outcome, "amount": amount}
+            for outcome, amount in stakes
+        ]
+        response = await client.post("/api/wagers/batch", json={"wagers": wagers}, headers=bettor)
+        assert response.status_code == status_code, response.text
+
+    me = (await client.get("/api/auth/me", headers=bettor)).json()
+    assert me["balance"] == 1000
+    assert (await client.get("/api/bets/users/me/wagers", headers=bettor)).json() == []
+    detail = (await client.get(f"/api/bets/{bet['id']}")).json()
+    assert detail["total_pool"] == 0